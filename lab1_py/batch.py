@@ -0,0 +1,66 @@
+import numpy as np
+
+from entropy import EPS
+
+# Vectorized counterpart of entropy.from_joint_to_all for stacks of joint matrices
+
+def as_joint_stack(Pab, na=None, nb=None):
+    """Return Pab as a float64 array of shape (N, na, nb).
+
+    Pab may be any array-like of that shape or a raw float64 buffer
+    (bytes, memoryview, mmap); a buffer needs na and nb to be reshaped.
+    """
+    if na is not None and nb is not None and not isinstance(Pab, np.ndarray):
+        arr = np.frombuffer(Pab, dtype=np.float64).reshape(-1, na, nb)
+    else:
+        arr = np.asarray(Pab, dtype=np.float64)
+    if arr.ndim == 2:
+        arr = arr[np.newaxis]
+    if arr.ndim != 3:
+        raise ValueError('Expected a stack of joint matrices with shape (N, na, nb)')
+    return arr
+
+def entropy_rows(P, axis=-1):
+    """-sum p*log2(p) along axis, treating p <= 0 as contributing nothing."""
+    logs = np.zeros_like(P)
+    np.log2(P, out=logs, where=P > 0)
+    return -(P * logs).sum(axis=axis)
+
+def _safe_divide(num, den):
+    out = np.zeros(np.broadcast_shapes(num.shape, den.shape))
+    np.divide(num, den, out=out, where=den > EPS)
+    return out
+
+def batch_from_joint(Pab, na=None, nb=None):
+    """Compute every from_joint_to_all metric for a stack of joint matrices.
+
+    Returns a dict with the same keys as from_joint_to_all; each value has
+    a leading axis of length N (scalars become arrays of shape (N,)).
+    """
+    joint = np.maximum(as_joint_stack(Pab, na, nb), 0.0)
+    total = joint.sum(axis=(1, 2))
+    rescale = (np.abs(total - 1.0) > 1e-6) & (total > 0)
+    joint = np.where(rescale[:, None, None], joint / np.where(rescale, total, 1.0)[:, None, None], joint)
+    Pa = joint.sum(axis=2)
+    Pb = joint.sum(axis=1)
+    P_b_given_a = _safe_divide(joint, Pa[:, :, None])
+    P_a_given_b = _safe_divide(joint, Pb[:, None, :])
+    H_A = entropy_rows(Pa)
+    H_B = entropy_rows(Pb)
+    H_B_given_A = (Pa * entropy_rows(P_b_given_a, axis=2)).sum(axis=1)
+    H_A_given_B = (Pb * entropy_rows(P_a_given_b, axis=1)).sum(axis=1)
+    H_AB = entropy_rows(joint.reshape(joint.shape[0], -1))
+    I = H_A + H_B - H_AB
+    return {
+        'joint': joint,
+        'Pa': Pa,
+        'Pb': Pb,
+        'P(B|A)': P_b_given_a,
+        'P(A|B)': P_a_given_b,
+        'H(A)': H_A,
+        'H(B)': H_B,
+        'H(B|A)': H_B_given_A,
+        'H(A|B)': H_A_given_B,
+        'H(AB)': H_AB,
+        'I(A;B)': I,
+    }
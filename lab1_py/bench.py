@@ -0,0 +1,193 @@
+import argparse
+import time
+from itertools import combinations
+
+import numpy as np
+
+from batch import batch_from_joint, entropy_rows
+from capacity import blahut_arimoto
+from countentropy import CountEntropy, entropy_from_counts
+from entropy import entropy_from_probs, from_joint_to_all, safe_log2
+from multivariate import JointTensor, tensor_from_joint
+from rolling import rolling_entropy
+from sparse import SparseJoint, sparse_from_joint
+
+# Benchmarks for the vectorized engines against the per-matrix reference code
+
+def _timed(fn, *args):
+    t0 = time.perf_counter()
+    res = fn(*args)
+    return res, time.perf_counter() - t0
+
+def bench_batch(n, na, nb, seed=0):
+    rng = np.random.default_rng(seed)
+    stack = rng.random((n, na, nb))
+    stack[rng.random((n, na, nb)) < 0.2] = 0.0
+    matrices = stack.tolist()
+
+    ref, t_loop = _timed(lambda: [from_joint_to_all(M) for M in matrices])
+    res, t_batch = _timed(batch_from_joint, stack)
+
+    for key in ('H(A)', 'H(B)', 'H(B|A)', 'H(A|B)', 'H(AB)', 'I(A;B)'):
+        expected = np.array([r[key] for r in ref])
+        if not np.allclose(res[key], expected, atol=1e-9):
+            raise AssertionError(f'{key} differs from from_joint_to_all')
+    for key in ('Pa', 'Pb', 'P(B|A)', 'P(A|B)'):
+        expected = np.array([r[key] for r in ref])
+        if not np.allclose(res[key], expected, atol=1e-12):
+            raise AssertionError(f'{key} differs from from_joint_to_all')
+
+    print(f'batch_from_joint N={n} {na}x{nb}: loop {t_loop:.3f} s, '
+          f'batch {t_batch:.3f} s, speedup x{t_loop / t_batch:.1f}')
+
+def _loop_capacity(W, tol=1e-6, max_iter=10000):
+    # plain Blahut–Arimoto with Python loops over one channel (reference)
+    na, nb = len(W), len(W[0])
+    p = [1.0 / na] * na
+    for _ in range(max_iter):
+        q = [sum(p[i] * W[i][j] for i in range(na)) for j in range(nb)]
+        D = [sum(W[i][j] * (safe_log2(W[i][j]) - safe_log2(q[j])) for j in range(nb)) for i in range(na)]
+        I = sum(p[i] * D[i] for i in range(na))
+        top = max(D)
+        if top - I < tol:
+            break
+        p = [p[i] * 2.0 ** (D[i] - top) for i in range(na)]
+        total = sum(p)
+        p = [x / total for x in p]
+    return I
+
+def bench_capacity(n, na, nb, seed=0, loop_channels=5):
+    rng = np.random.default_rng(seed)
+    stack = rng.random((n, na, nb)) ** 3
+    stack /= stack.sum(axis=2, keepdims=True)
+    res, t_batch = _timed(blahut_arimoto, stack)
+    print(f'blahut_arimoto N={n} {na}x{nb}: batch {1e3 * t_batch / n:.3f} ms/channel ({t_batch:.3f} s total), '
+          f'{res["iterations"].mean():.0f} iterations on average, {res["converged"].sum()}/{n} converged')
+    # the loop reference takes minutes on large channels, so it checks small ones only
+    if na * nb <= 1024:
+        k = min(n, loop_channels)
+        ref, t_loop = _timed(lambda: [_loop_capacity(W) for W in stack[:k].tolist()])
+        if not np.allclose(res['C'][:k], ref, atol=1e-5):
+            raise AssertionError('capacity differs from the loop reference')
+        print(f'  loop reference: {1e3 * t_loop / k:.1f} ms/channel')
+    eps = 0.1
+    bsc = blahut_arimoto([[1 - eps, eps], [eps, 1 - eps]])['C'][0]
+    if abs(bsc - (1 + eps * np.log2(eps) + (1 - eps) * np.log2(1 - eps))) > 1e-6:
+        raise AssertionError('binary symmetric channel capacity is wrong')
+
+def bench_sparse(n, nnz, seed=0):
+    rng = np.random.default_rng(seed)
+    # agreement with the dense engine on a small matrix with empty rows and columns
+    dense = rng.random((60, 40)) * (rng.random((60, 40)) < 0.1)
+    ref = from_joint_to_all(dense.tolist())
+    res = sparse_from_joint(SparseJoint.from_dense(dense))
+    for key in ('H(A)', 'H(B)', 'H(B|A)', 'H(A|B)', 'H(AB)', 'I(A;B)'):
+        if abs(res[key] - ref[key]) > 1e-9:
+            raise AssertionError(f'{key} differs from from_joint_to_all')
+    if not np.allclose([list(row) for row in res['P(A|B)']], ref['P(A|B)'], atol=1e-12):
+        raise AssertionError('P(A|B) differs from from_joint_to_all')
+
+    rows = rng.integers(0, n, nnz)
+    cols = rng.integers(0, n, nnz)
+    values = rng.random(nnz)
+    joint, t_build = _timed(SparseJoint.from_coo, rows, cols, values, (n, n))
+    res, t_metrics = _timed(sparse_from_joint, joint)
+    stored = joint.indptr.nbytes + joint.indices.nbytes + joint.data.nbytes
+    print(f'sparse_from_joint {n}x{n}, {joint.nnz} nonzeros ({stored / 1e6:.0f} MB stored, '
+          f'dense would be {8 * n * n / 1e9:.0f} GB): build {t_build:.2f} s, metrics {t_metrics:.2f} s, '
+          f"I(A;B) = {res['I(A;B)']:.4f}")
+
+def bench_tensor(nvars, states, nnz, seed=0):
+    rng = np.random.default_rng(seed)
+    P = rng.random((states,) * nvars)
+    P /= P.sum()
+    everything = tuple(range(nvars))
+
+    def H(axes):
+        return float(entropy_rows(P.sum(axis=tuple(k for k in everything if k not in axes)).ravel()))
+
+    def uncached():
+        # every subset entropy reduced again from the full tensor
+        out = {}
+        for i, j in combinations(everything, 2):
+            rest = tuple(k for k in everything if k not in (i, j))
+            out[i, j] = (H((i,)) + H((j,)) - H((i, j)),
+                         H((i,) + rest) + H((j,) + rest) - H(everything) - H(rest))
+        return out
+
+    ref, t_loop = _timed(uncached)
+    res, t_tensor = _timed(tensor_from_joint, P)
+    names = JointTensor(P).names
+    for (i, j), (mi, cmi) in ref.items():
+        rest = ''.join(names[k] for k in everything if k not in (i, j))
+        if abs(res[f'I({names[i]};{names[j]})'] - mi) > 1e-9 or abs(res[f'I({names[i]};{names[j]}|{rest})'] - cmi) > 1e-9:
+            raise AssertionError('tensor_from_joint differs from the uncached reductions')
+    print(f'{nvars} variables x {states} states, pairwise and conditional MI: '
+          f'uncached {t_loop:.2f} s, cached marginals {t_tensor:.2f} s ({t_loop / t_tensor:.1f}x)')
+
+    coords = rng.integers(0, 100, (nvars, nnz))
+    T, t_build = _timed(JointTensor.from_coo, coords, rng.random(nnz), (100,) * nvars)
+    res, t_sparse = _timed(tensor_from_joint, T)
+    print(f'sparse {nvars} variables x 100 states, {nnz} nonzeros: build {t_build:.2f} s, '
+          f"report {t_sparse:.2f} s, TC = {res['TC']:.4f}")
+
+def bench_counts(bins, updates, seed=0):
+    rng = np.random.default_rng(seed)
+    counts = rng.zipf(1.3, bins) % 100000
+    probs = (counts / counts.sum()).tolist()
+    ref, t_probs = _timed(entropy_from_probs, probs)
+    H, t_counts = _timed(entropy_from_counts, counts)
+    if abs(H - ref) > 1e-9:
+        raise AssertionError('entropy_from_counts differs from entropy_from_probs')
+    print(f'{bins} bins: entropy_from_probs {t_probs * 1e3:.1f} ms, entropy_from_counts {t_counts * 1e3:.1f} ms '
+          f'({t_probs / t_counts:.0f}x)')
+
+    running = CountEntropy(counts)
+    symbols = rng.integers(0, bins, updates).tolist()
+    _, t_add = _timed(lambda: [running.add(s) for s in symbols])
+    if abs(running.entropy() - entropy_from_counts(running.counts)) > 1e-9:
+        raise AssertionError('incremental entropy drifted from the counts')
+    print(f'CountEntropy.add: {t_add / updates * 1e9:.0f} ns per update')
+
+def bench_rolling(size, window, seed=0):
+    rng = np.random.default_rng(seed)
+    data = (rng.zipf(1.2, size) % 256).astype(np.uint8)
+    # reference: a fresh histogram for every sampled window
+    check = data[:200000]
+    ends, H = rolling_entropy(check, window, 1)
+    for k in range(0, len(ends), max(1, len(ends) // 50)):
+        end = int(ends[k])
+        ref = entropy_from_counts(np.bincount(check[end - window:end], minlength=256))
+        if abs(H[k] - ref) > 1e-9:
+            raise AssertionError('rolling entropy differs from the window histogram')
+    for stride in (1, 64, 1024, window):
+        n = size if stride >= 128 else size // 8
+        (_, H), t = _timed(rolling_entropy, data[:n], window, stride)
+        print(f'rolling_entropy window {window}, stride {stride}: {len(H)} samples, {n / t / 1e6:.0f} MB/s')
+
+BENCHMARKS = {
+    'batch': lambda args: bench_batch(args.n, args.na, args.nb),
+    'capacity': lambda args: bench_capacity(min(args.n, 1000), args.na, args.nb),
+    'sparse': lambda args: bench_sparse(args.size, args.nnz),
+    'counts': lambda args: bench_counts(args.size * 10, 10**6),
+    'rolling': lambda args: bench_rolling(args.size * 320, args.window),
+    'tensor': lambda args: bench_tensor(args.vars, args.states, min(args.nnz, 10**6)),
+}
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='lab1_py benchmarks')
+    parser.add_argument('which', nargs='*', help=f"benchmarks to run: {', '.join(BENCHMARKS)} (default: all)")
+    parser.add_argument('-n', type=int, default=10**5, help='number of joint matrices')
+    parser.add_argument('--na', type=int, default=4)
+    parser.add_argument('--nb', type=int, default=4)
+    parser.add_argument('--size', type=int, default=10**5, help='rows and columns of the sparse joint matrix')
+    parser.add_argument('--vars', type=int, default=6, help='variables of the joint tensor')
+    parser.add_argument('--states', type=int, default=10, help='states per variable of the dense joint tensor')
+    parser.add_argument('--window', type=int, default=4096, help='window of the rolling entropy')
+    parser.add_argument('--nnz', type=int, default=3 * 10**6, help='nonzero cells of the sparse joint matrix')
+    args = parser.parse_args()
+    unknown = [name for name in args.which if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f'unknown benchmark: {", ".join(unknown)}')
+    for name in args.which or BENCHMARKS:
+        BENCHMARKS[name](args)
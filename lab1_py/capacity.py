@@ -0,0 +1,94 @@
+import numpy as np
+
+from batch import as_joint_stack, entropy_rows
+from entropy import EPS
+
+# Channel capacity C = max over P(A) of I(A;B) for channel matrices P(B|A)
+# (Blahut–Arimoto), vectorized over a stack of channels
+
+TOL = 1e-6
+MAX_ITER = 10000
+# largest over-relaxation exponent of the accelerated update
+MU_MAX = 16.0
+
+def as_channel_stack(PbgivenA, na=None, nb=None):
+    """Return P(B|A) as an array of shape (N, na, nb) with every row summing to 1."""
+    W = np.maximum(as_joint_stack(PbgivenA, na, nb), 0.0)
+    rows = W.sum(axis=2, keepdims=True)
+    if (rows <= EPS).any():
+        raise ValueError('Every row of P(B|A) must have a positive sum')
+    return W / rows
+
+def _divergences(p, W, WlogW):
+    """D[n, i] = KL(P(B|A=i) || P(B)) in bits for the input distributions p."""
+    q = np.einsum('ni,nij->nj', p, W)
+    logq = np.zeros_like(q)
+    np.log2(q, out=logq, where=q > 0)
+    return WlogW - np.einsum('nij,nj->ni', W, logq)
+
+def blahut_arimoto(PbgivenA, tol=TOL, max_iter=MAX_ITER, accelerate=True, na=None, nb=None):
+    """Capacity of every channel in a stack of P(B|A) matrices.
+
+    Each iteration updates P(A) proportionally to P(A) * 2**(mu * D), where
+    D is the divergence of each row from the output distribution. With
+    accelerate, mu is doubled after every step that raised I(A;B), up to
+    MU_MAX; a step that lowered it is undone and retaken with mu = 1, the
+    plain monotone update. A channel stops once max D - I(A;B) < tol, since
+    I(A;B) <= C <= max D; the rest keep iterating on a compacted stack.
+
+    Returns a dict with arrays over the N channels: 'C' (I(A;B) at the final
+    P(A), within tol of the capacity when converged), 'Pa' (N, na),
+    'upper' (max D, an upper bound on C), 'iterations' and 'converged'.
+    """
+    W = as_channel_stack(PbgivenA, na, nb)
+    n, na, nb = W.shape
+    WlogW = -entropy_rows(W, axis=2)
+    C = np.zeros(n)
+    upper = np.zeros(n)
+    Pa = np.full((n, na), 1.0 / na)
+    iterations = np.zeros(n, dtype=np.int64)
+    converged = np.zeros(n, dtype=bool)
+
+    active = np.arange(n)
+    p = Pa.copy()
+    D = _divergences(p, W, WlogW)
+    I = (p * D).sum(axis=1)
+    mu = np.ones(n)
+    p_prev, D_prev, I_prev = p, D, I
+    for it in range(max_iter + 1):
+        if accelerate and it > 0:
+            undo = I < I_prev
+            if undo.any():
+                p = np.where(undo[:, None], p_prev, p)
+                D = np.where(undo[:, None], D_prev, D)
+                I = np.where(undo, I_prev, I)
+            mu = np.where(undo, 1.0, np.minimum(2.0 * mu, MU_MAX))
+        top = D.max(axis=1)
+        done = top - I < tol
+        if it == max_iter:
+            done[:] = True
+        if done.any():
+            ids = active[done]
+            C[ids] = I[done]
+            upper[ids] = top[done]
+            Pa[ids] = p[done]
+            iterations[ids] = it
+            converged[ids] = top[done] - I[done] < tol
+            keep = ~done
+            active = active[keep]
+            if not len(active):
+                break
+            W, WlogW = W[keep], WlogW[keep]
+            p, D, I, mu, top = p[keep], D[keep], I[keep], mu[keep], top[keep]
+        p_prev, D_prev, I_prev = p, D, I
+        step = mu[:, None] if accelerate else 1.0
+        p = p * np.exp2(step * (D - top[:, None]))
+        p /= p.sum(axis=1, keepdims=True)
+        D = _divergences(p, W, WlogW)
+        I = (p * D).sum(axis=1)
+    return {'C': C, 'Pa': Pa, 'upper': upper, 'iterations': iterations, 'converged': converged}
+
+def channel_capacity(PbgivenA, tol=TOL, max_iter=MAX_ITER):
+    """Capacity of one channel: (C in bits, capacity-achieving P(A) as a list)."""
+    res = blahut_arimoto(PbgivenA, tol, max_iter)
+    return float(res['C'][0]), res['Pa'][0].tolist()
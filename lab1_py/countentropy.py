@@ -0,0 +1,107 @@
+import numpy as np
+
+# Entropy straight from integer count histograms:
+#   H = log2(N) - sum c*log2(c) / N
+# with c*log2(c) looked up in a table for small counts
+
+TABLE_SIZE = 1 << 16
+# table entries are exact for c < TABLE_SIZE; counts past it are computed directly
+XLOGX = np.zeros(TABLE_SIZE)
+XLOGX[1:] = np.arange(1, TABLE_SIZE) * np.log2(np.arange(1, TABLE_SIZE))
+XLOGX_STEP = np.diff(XLOGX)
+# incremental updates between recomputations of the running sum from the counts
+RESYNC = 1 << 20
+
+def xlogx(counts):
+    """c*log2(c) for every count (0 for c = 0), by table lookup where it fits."""
+    c = np.asarray(counts)
+    if c.dtype.kind in 'iu' and (c.size == 0 or (c.min() >= 0 and c.max() < TABLE_SIZE)):
+        return XLOGX[c]
+    c = c.astype(np.float64)
+    logs = np.zeros_like(c)
+    np.log2(c, out=logs, where=c > 0)
+    return c * logs
+
+def xlogx_step(counts):
+    """(c+1)*log2(c+1) - c*log2(c): the change of the sum when a count c grows by one."""
+    c = np.asarray(counts)
+    if c.dtype.kind in 'iu' and (c.size == 0 or (c.min() >= 0 and c.max() < TABLE_SIZE - 1)):
+        return XLOGX_STEP[c]
+    return xlogx(c + 1) - xlogx(c)
+
+def entropy_from_counts(counts, axis=-1):
+    """Entropy in bits of count histograms along axis (0 for an empty histogram)."""
+    c = np.asarray(counts)
+    n = c.sum(axis=axis).astype(np.float64)
+    S = xlogx(c).sum(axis=axis)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        H = np.where(n > 0, np.log2(n) - S / n, 0.0)
+    H = np.maximum(H, 0.0)
+    return float(H) if H.ndim == 0 else H
+
+def _xlogx(c):
+    # scalar xlogx for the O(1) update path
+    return float(XLOGX[c]) if c < TABLE_SIZE else c * float(np.log2(c))
+
+class CountEntropy:
+    """Histogram over symbol ids 0..K-1 with its entropy kept up to date.
+
+    The sum S = sum c*log2(c) is maintained with the counts, so changing one
+    count costs two table lookups and entropy() is O(1). S is recomputed
+    from the counts every RESYNC updates to keep rounding from drifting.
+    """
+    def __init__(self, counts=None, nsymbols=0):
+        if counts is None:
+            counts = np.zeros(nsymbols, dtype=np.int64)
+        self.counts = np.array(counts, dtype=np.int64)
+        self.resync()
+
+    def resync(self):
+        self.n = int(self.counts.sum())
+        self.S = float(xlogx(self.counts).sum())
+        self._updates = 0
+
+    def _grow(self, size):
+        grown = np.zeros(max(size, 2 * len(self.counts)), dtype=np.int64)
+        grown[:len(self.counts)] = self.counts
+        self.counts = grown
+
+    def add(self, symbol, delta=1):
+        """Change the count of one symbol by delta in O(1)."""
+        if symbol >= len(self.counts):
+            self._grow(symbol + 1)
+        old = int(self.counts[symbol])
+        new = old + delta
+        if new < 0:
+            raise ValueError(f'Count of symbol {symbol} would become negative')
+        self.counts[symbol] = new
+        self.n += delta
+        self.S += _xlogx(new) - _xlogx(old)
+        self._updates += 1
+        if self._updates >= RESYNC:
+            self.resync()
+
+    def update(self, symbols, sign=1):
+        """Add (sign=1) or remove (sign=-1) a batch of symbol ids at once."""
+        symbols = np.asarray(symbols, dtype=np.int64)
+        if not symbols.size:
+            return
+        if symbols.max() >= len(self.counts):
+            self._grow(int(symbols.max()) + 1)
+        delta = np.bincount(symbols, minlength=len(self.counts))
+        changed = np.flatnonzero(delta)
+        old = self.counts[changed]
+        new = old + sign * delta[changed]
+        if (new < 0).any():
+            raise ValueError('Removed symbols were not counted')
+        self.counts[changed] = new
+        self.n += sign * len(symbols)
+        self.S += float((xlogx(new) - xlogx(old)).sum())
+        self._updates += len(changed)
+        if self._updates >= RESYNC:
+            self.resync()
+
+    def entropy(self):
+        if self.n <= 0:
+            return 0.0
+        return max(0.0, float(np.log2(self.n)) - self.S / self.n)
@@ -0,0 +1,84 @@
+import math
+
+# Helper math functions
+EPS = 1e-12
+
+def safe_log2(x):
+    return math.log2(x) if x > 0 else 0.0
+
+def entropy_from_probs(probs):
+    H = 0.0
+    for p in probs:
+        if p > 0:
+            H -= p * math.log2(p)
+    return H
+
+# Core computations for different input cases
+
+def from_joint_to_all(Pab):
+    na = len(Pab)
+    nb = len(Pab[0]) if na>0 else 0
+    joint = [[max(0.0, float(Pab[i][j])) for j in range(nb)] for i in range(na)]
+    total = sum(sum(row) for row in joint)
+    if abs(total - 1.0) > 1e-6 and total > 0:
+        joint = [[x/total for x in row] for row in joint]
+    Pa = [sum(joint[i][j] for j in range(nb)) for i in range(na)]
+    Pb = [sum(joint[i][j] for i in range(na)) for j in range(nb)]
+    P_b_given_a = [[0.0]*nb for _ in range(na)]
+    P_a_given_b = [[0.0]*nb for _ in range(na)]
+    for i in range(na):
+        for j in range(nb):
+            if Pa[i] > EPS:
+                P_b_given_a[i][j] = joint[i][j] / Pa[i]
+            else:
+                P_b_given_a[i][j] = 0.0
+            if Pb[j] > EPS:
+                P_a_given_b[i][j] = joint[i][j] / Pb[j]
+            else:
+                P_a_given_b[i][j] = 0.0
+    H_A = entropy_from_probs(Pa)
+    H_B = entropy_from_probs(Pb)
+    H_B_given_A = sum(Pa[i] * entropy_from_probs(P_b_given_a[i]) for i in range(na))
+    H_A_given_B = sum(Pb[j] * entropy_from_probs([P_a_given_b[i][j] for i in range(na)]) for j in range(nb))
+    flat = [joint[i][j] for i in range(na) for j in range(nb)]
+    H_AB = entropy_from_probs(flat)
+    I = H_A + H_B - H_AB
+    return {
+        'joint': joint,
+        'Pa': Pa,
+        'Pb': Pb,
+        'P(B|A)': P_b_given_a,
+        'P(A|B)': P_a_given_b,
+        'H(A)': H_A,
+        'H(B)': H_B,
+        'H(B|A)': H_B_given_A,
+        'H(A|B)': H_A_given_B,
+        'H(AB)': H_AB,
+        'I(A;B)': I,
+    }
+
+def from_Pa_and_PbgivenA(Pa, PbgivenA):
+    na = len(Pa)
+    nb = len(PbgivenA[0]) if na>0 else 0
+    joint = [[max(0.0, Pa[i] * PbgivenA[i][j]) for j in range(nb)] for i in range(na)]
+    total = sum(sum(row) for row in joint)
+    if total <= 0:
+        raise ValueError('Joint probability sums to zero; check inputs')
+    if abs(total-1.0) > 1e-6:
+        joint = [[x/total for x in row] for row in joint]
+    res = from_joint_to_all(joint)
+    res['joint'] = joint  # explicitly store joint for display
+    return res
+
+def from_Pb_and_PagivenB(Pb, PagivenB):
+    na = len(PagivenB)
+    nb = len(Pb)
+    joint = [[max(0.0, PagivenB[i][j] * Pb[j]) for j in range(nb)] for i in range(na)]
+    total = sum(sum(row) for row in joint)
+    if total <= 0:
+        raise ValueError('Joint probability sums to zero; check inputs')
+    if abs(total-1.0) > 1e-6:
+        joint = [[x/total for x in row] for row in joint]
+    res = from_joint_to_all(joint)
+    res['joint'] = joint  # explicitly store joint for display
+    return res
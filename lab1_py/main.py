@@ -1,90 +1,96 @@
 import tkinter as tk
-from tkinter import ttk, messagebox
-import math
+from tkinter import ttk, messagebox, filedialog
 from functools import partial
+import threading
+import time
 
-# Helper math functions
-EPS = 1e-12
+from capacity import channel_capacity
+from entropy import EPS, from_joint_to_all, from_Pa_and_PbgivenA, from_Pb_and_PagivenB
+from sparse import load_joint, sparse_from_joint
 
-def safe_log2(x):
-    return math.log2(x) if x > 0 else 0.0
+# большие матрицы и ансамбли выводятся не целиком
+SHOW_CELLS = 400
+SHOW_VALUES = 50
 
-def entropy_from_probs(probs):
-    H = 0.0
-    for p in probs:
-        if p > 0:
-            H -= p * math.log2(p)
-    return H
+class Cancelled(Exception):
+    pass
 
-# Core computations for different input cases
+class BackgroundRunner:
+    """Runs one job at a time in a worker thread and polls it from Tk with root.after.
 
-def from_joint_to_all(Pab):
-    na = len(Pab)
-    nb = len(Pab[0]) if na>0 else 0
-    joint = [[max(0.0, float(Pab[i][j])) for j in range(nb)] for i in range(na)]
-    total = sum(sum(row) for row in joint)
-    if abs(total - 1.0) > 1e-6 and total > 0:
-        joint = [[x/total for x in row] for row in joint]
-    Pa = [sum(joint[i][j] for j in range(nb)) for i in range(na)]
-    Pb = [sum(joint[i][j] for i in range(na)) for j in range(nb)]
-    P_b_given_a = [[0.0]*nb for _ in range(na)]
-    P_a_given_b = [[0.0]*nb for _ in range(na)]
-    for i in range(na):
-        for j in range(nb):
-            if Pa[i] > EPS:
-                P_b_given_a[i][j] = joint[i][j] / Pa[i]
-            else:
-                P_b_given_a[i][j] = 0.0
-            if Pb[j] > EPS:
-                P_a_given_b[i][j] = joint[i][j] / Pb[j]
-            else:
-                P_a_given_b[i][j] = 0.0
-    H_A = entropy_from_probs(Pa)
-    H_B = entropy_from_probs(Pb)
-    H_B_given_A = sum(Pa[i] * entropy_from_probs(P_b_given_a[i]) for i in range(na))
-    H_A_given_B = sum(Pb[j] * entropy_from_probs([P_a_given_b[i][j] for i in range(na)]) for j in range(nb))
-    flat = [joint[i][j] for i in range(na) for j in range(nb)]
-    H_AB = entropy_from_probs(flat)
-    I = H_A + H_B - H_AB
-    return {
-        'joint': joint,
-        'Pa': Pa,
-        'Pb': Pb,
-        'P(B|A)': P_b_given_a,
-        'P(A|B)': P_a_given_b,
-        'H(A)': H_A,
-        'H(B)': H_B,
-        'H(B|A)': H_B_given_A,
-        'H(A|B)': H_A_given_B,
-        'H(AB)': H_AB,
-        'I(A;B)': I,
-    }
+    The job is called as work(report); report(fraction) moves the progress bar
+    and raises Cancelled after cancel().
+    """
+    POLL_MS = 100
+
+    def __init__(self, root, progressbar, status, buttons, cancel_button):
+        self.root = root
+        self.progressbar = progressbar
+        self.status = status
+        self.buttons = buttons
+        self.cancel_button = cancel_button
+        self.cancel_button.configure(command=self.cancel, state='disabled')
+        self.thread = None
+
+    @property
+    def busy(self):
+        return self.thread is not None
 
-def from_Pa_and_PbgivenA(Pa, PbgivenA):
-    na = len(Pa)
-    nb = len(PbgivenA[0]) if na>0 else 0
-    joint = [[max(0.0, Pa[i] * PbgivenA[i][j]) for j in range(nb)] for i in range(na)]
-    total = sum(sum(row) for row in joint)
-    if total <= 0:
-        raise ValueError('Joint probability sums to zero; check inputs')
-    if abs(total-1.0) > 1e-6:
-        joint = [[x/total for x in row] for row in joint]
-    res = from_joint_to_all(joint)
-    res['joint'] = joint  # explicitly store joint for display
-    return res
+    def start(self, work, on_done, error_title='Ошибка'):
+        if self.busy:
+            return False
+        self._cancel = threading.Event()
+        self._fraction = 0.0
+        self._result = None
+        self._t0 = time.perf_counter()
+        self._on_done = on_done
+        self._error_title = error_title
+        for b in self.buttons:
+            b.configure(state='disabled')
+        self.cancel_button.configure(state='normal')
+        self.thread = threading.Thread(target=self._run, args=(work,), daemon=True)
+        self.thread.start()
+        self.root.after(self.POLL_MS, self._poll)
+        return True
 
-def from_Pb_and_PagivenB(Pb, PagivenB):
-    na = len(PagivenB)
-    nb = len(Pb)
-    joint = [[max(0.0, PagivenB[i][j] * Pb[j]) for j in range(nb)] for i in range(na)]
-    total = sum(sum(row) for row in joint)
-    if total <= 0:
-        raise ValueError('Joint probability sums to zero; check inputs')
-    if abs(total-1.0) > 1e-6:
-        joint = [[x/total for x in row] for row in joint]
-    res = from_joint_to_all(joint)
-    res['joint'] = joint  # explicitly store joint for display
-    return res
+    def cancel(self):
+        if self.busy:
+            self._cancel.set()
+
+    def _report(self, fraction):
+        if self._cancel.is_set():
+            raise Cancelled()
+        self._fraction = fraction
+
+    def _run(self, work):
+        try:
+            self._result = ('ok', work(self._report))
+        except Cancelled:
+            self._result = ('cancelled', None)
+        except Exception as ex:
+            self._result = ('error', ex)
+
+    def _poll(self):
+        self.progressbar['value'] = 100 * self._fraction
+        self.status.config(text=f'{100 * self._fraction:.0f}%')
+        if self.thread.is_alive():
+            self.root.after(self.POLL_MS, self._poll)
+            return
+        self.thread = None
+        for b in self.buttons:
+            b.configure(state='normal')
+        self.cancel_button.configure(state='disabled')
+        status, value = self._result
+        if status == 'ok':
+            self.progressbar['value'] = 100
+            self.status.config(text=f'Готово за {time.perf_counter() - self._t0:.2f} с')
+            self._on_done(value)
+        elif status == 'cancelled':
+            self.progressbar['value'] = 0
+            self.status.config(text='Отменено')
+        else:
+            self.status.config(text='')
+            messagebox.showerror(self._error_title, str(value))
 
 class EntropyApp:
     def __init__(self, root):
@@ -115,23 +121,58 @@ class EntropyApp:
         self.nb_spin = tk.Spinbox(sizeframe, from_=1, to=10, width=5)
         self.nb_spin.grid(column=3, row=1, sticky='w')
 
-        ttk.Button(self.mainframe, text='Сформировать поля ввода', command=self.build_matrix_inputs).grid(column=0, row=5, pady=(10,0), sticky='w')
+        matrixframe = ttk.Frame(self.mainframe)
+        matrixframe.grid(column=0, row=5, pady=(10,0), sticky='w')
+        build_button = ttk.Button(matrixframe, text='Сформировать поля ввода', command=self.build_matrix_inputs)
+        build_button.grid(column=0, row=0)
+        load_button = ttk.Button(matrixframe, text='Загрузить P(AB) из файла', command=self.load_matrix)
+        load_button.grid(column=1, row=0, padx=(10,0))
         self.inputs_frame = ttk.Frame(self.mainframe)
         self.inputs_frame.grid(column=0, row=6, sticky='nsew', pady=(10,0))
 
-        ttk.Button(self.mainframe, text='Рассчитать', command=self.calculate).grid(column=0, row=7, pady=(10,0), sticky='w')
+        runframe = ttk.Frame(self.mainframe)
+        runframe.grid(column=0, row=7, pady=(10,0), sticky='w')
+        calc_button = ttk.Button(runframe, text='Рассчитать', command=self.calculate)
+        calc_button.grid(column=0, row=0)
+        progressbar = ttk.Progressbar(runframe, length=200, maximum=100)
+        progressbar.grid(column=1, row=0, padx=(10,0))
+        cancel_button = ttk.Button(runframe, text='Отмена')
+        cancel_button.grid(column=2, row=0, padx=(10,0))
+        status_label = ttk.Label(runframe, text='')
+        status_label.grid(column=3, row=0, padx=(10,0))
+        self.runner = BackgroundRunner(root, progressbar, status_label, [build_button, load_button, calc_button], cancel_button)
         ttk.Label(self.mainframe, text='Результаты:').grid(column=0, row=8, sticky='w', pady=(10,0))
         self.out_text = tk.Text(self.mainframe, width=90, height=20)
         self.out_text.grid(column=0, row=9, sticky='nsew')
 
         self.matrix_entries = []
         self.ensemble_entries = []
+        self.loaded_joint = None
 
     def clear_inputs(self):
         for child in self.inputs_frame.winfo_children():
             child.destroy()
         self.matrix_entries = []
         self.ensemble_entries = []
+        self.loaded_joint = None
+
+    def load_matrix(self):
+        # матрица из файла хранится разреженной, поля ввода для неё не строятся
+        if self.runner.busy:
+            return
+        path = filedialog.askopenfilename(
+            title='Матрица совместных вероятностей P(AB)',
+            filetypes=[('Матрицы', '*.csv *.npy *.npz'), ('Все файлы', '*.*')])
+        if not path:
+            return
+        self.runner.start(lambda report: load_joint(path), self.set_loaded_joint, 'Не удалось загрузить матрицу')
+
+    def set_loaded_joint(self, joint):
+        self.clear_inputs()
+        self.loaded_joint = joint
+        self.case_var.set('joint')
+        na, nb = joint.shape
+        ttk.Label(self.inputs_frame, text=f'Загружена матрица P(AB) {na}×{nb}, ненулевых элементов: {joint.nnz}').grid(column=0, row=0, sticky='w')
 
     def build_matrix_inputs(self):
         self.clear_inputs()
@@ -200,51 +241,70 @@ class EntropyApp:
             arr.append(val)
         return arr
 
+    def format_vector(self, v):
+        shown = ', '.join(f'{p:.6f}' for p in v[:SHOW_VALUES])
+        return '[' + shown + (f', … (всего {len(v)})' if len(v) > SHOW_VALUES else '') + ']'
+
     def format_matrix(self, M):
+        if len(M) and len(M) * len(M[0]) > SHOW_CELLS:
+            return f'(матрица {len(M)}×{len(M[0])} слишком велика для вывода)\n'
         s = ''
         for row in M:
             s += '[' + ', '.join(f'{v:.6f}' for v in row) + ']\n'
         return s
 
     def calculate(self):
+        if self.runner.busy:
+            return
         case = self.case_var.get()
         na = int(self.na_spin.get())
         nb = int(self.nb_spin.get())
-        try:
-            if case == 'joint':
+        if case == 'joint':
+            if self.loaded_joint is not None:
+                joint = self.loaded_joint
+                work = lambda report: sparse_from_joint(joint)
+            else:
                 M = self.read_matrix()
-                res = from_joint_to_all(M)
-            elif case == 'A_given_B':
-                PagivenB = self.read_matrix()
-                Pb = self.read_ensemble()
-                if len(Pb) != nb:
-                    messagebox.showerror('Ошибка', 'Длина ансамбля B не совпадает с числом столбцов')
-                    return
+                work = lambda report: from_joint_to_all(M)
+        elif case == 'A_given_B':
+            PagivenB = self.read_matrix()
+            Pb = self.read_ensemble()
+            if len(Pb) != nb:
+                messagebox.showerror('Ошибка', 'Длина ансамбля B не совпадает с числом столбцов')
+                return
+            def work(report):
                 for j in range(nb):
                     col_sum = sum(PagivenB[i][j] for i in range(na))
                     if abs(col_sum - 1.0) > 1e-6 and col_sum>EPS:
                         for i in range(na):
                             PagivenB[i][j] = PagivenB[i][j] / col_sum
-                res = from_Pb_and_PagivenB(Pb, PagivenB)
-            elif case == 'B_given_A':
-                PbgivenA = self.read_matrix()
-                Pa = self.read_ensemble()
-                if len(Pa) != na:
-                    messagebox.showerror('Ошибка', 'Длина ансамбля A не совпадает с числом строк')
-                    return
+                report(0.5)
+                return from_Pb_and_PagivenB(Pb, PagivenB)
+        elif case == 'B_given_A':
+            PbgivenA = self.read_matrix()
+            Pa = self.read_ensemble()
+            if len(Pa) != na:
+                messagebox.showerror('Ошибка', 'Длина ансамбля A не совпадает с числом строк')
+                return
+            def work(report):
                 for i in range(na):
                     row_sum = sum(PbgivenA[i][j] for j in range(nb))
                     if abs(row_sum - 1.0) > 1e-6 and row_sum>EPS:
                         for j in range(nb):
                             PbgivenA[i][j] = PbgivenA[i][j] / row_sum
+                report(0.3)
                 res = from_Pa_and_PbgivenA(Pa, PbgivenA)
-            else:
-                messagebox.showerror('Ошибка', 'Неизвестный случай')
-                return
-        except Exception as ex:
-            messagebox.showerror('Ошибка вычисления', str(ex))
+                report(0.5)
+                # пропускная способность канала P(B|A): максимум I(A;B) по всем ансамблям A
+                if all(sum(row) > EPS for row in PbgivenA):
+                    res['C'], res['Pa*'] = channel_capacity(PbgivenA)
+                return res
+        else:
+            messagebox.showerror('Ошибка', 'Неизвестный случай')
             return
+        self.runner.start(work, partial(self.show_results, case), 'Ошибка вычисления')
 
+    def show_results(self, case, res):
         self.out_text.delete('1.0', tk.END)
         out = []
         # Вывод совместной вероятности при ансамбле
@@ -254,15 +314,19 @@ class EntropyApp:
             out.append('\n')
 
         out.append('Ансамбль A (P(A_i)):\n')
-        out.append('[' + ', '.join(f'{p:.6f}' for p in res['Pa']) + ']\n\n')
+        out.append(self.format_vector(res['Pa']) + '\n\n')
         out.append('Ансамбль B (P(B_j)):\n')
-        out.append('[' + ', '.join(f'{p:.6f}' for p in res['Pb']) + ']\n\n')
+        out.append(self.format_vector(res['Pb']) + '\n\n')
         out.append(f"H(A) = {res['H(A)']:.6f} бит\n")
         out.append(f"H(B) = {res['H(B)']:.6f} бит\n")
         out.append(f"H(B|A) = {res['H(B|A)']:.6f} бит\n")
         out.append(f"H(A|B) = {res['H(A|B)']:.6f} бит\n")
         out.append(f"H(AB) = {res['H(AB)']:.6f} бит\n")
         out.append(f"I(A;B) = {res['I(A;B)']:.6f} бит\n\n")
+        if 'C' in res:
+            out.append(f"Пропускная способность канала C = max I(A;B) = {res['C']:.6f} бит\n")
+            out.append('Ансамбль A, на котором она достигается:\n')
+            out.append('[' + ', '.join(f'{p:.6f}' for p in res['Pa*']) + ']\n\n')
         out.append('Матрица условных вероятностей P(B|A) (строки=A, столбцы=B):\n')
         out.append(self.format_matrix(res['P(B|A)']))
         out.append('\nМатрица условных вероятностей P(A|B) (строки=A, столбцы=B):\n')
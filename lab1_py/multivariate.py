@@ -0,0 +1,223 @@
+import string
+from itertools import combinations
+
+import numpy as np
+
+from batch import entropy_rows, _safe_divide
+from sparse import Conditional, SparseJoint
+
+# Joint distributions of N ensembles: entropies of arbitrary subsets of the
+# variables, computed from cached marginals of a dense or sparse tensor
+
+class JointTensor:
+    """Joint distribution P(X1, ..., XN) as an N-dimensional tensor.
+
+    The tensor is either dense (any array-like with one axis per variable)
+    or sparse: COO coordinates of shape (N, nnz) with their values, see
+    from_coo; a 2-D SparseJoint is accepted as well. Like from_joint_to_all,
+    negative cells are dropped and the values rescaled when they do not sum
+    to 1.
+
+    Variables are named A, B, C, ... unless names are given, and may be
+    referred to by name or by axis number. Every marginal is cached under
+    its set of axes and computed from the smallest cached marginal that
+    contains it, so the subset entropies of one analysis share their
+    reductions.
+    """
+    def __init__(self, P, names=None):
+        if isinstance(P, SparseJoint):
+            self._init_sparse(np.vstack([P.row_ids(), P.indices]), P.data, P.shape)
+        else:
+            P = np.maximum(np.asarray(P, dtype=np.float64), 0.0)
+            total = P.sum()
+            if abs(total - 1.0) > 1e-6 and total > 0:
+                P = P / total
+            self.shape = P.shape
+            self.sparse = False
+            self._marginals = {tuple(range(P.ndim)): P}
+        self.names = list(names) if names is not None else _default_names(len(self.shape))
+        if len(self.names) != len(self.shape):
+            raise ValueError('Expected one name per variable')
+        self._entropies = {(): 0.0}
+
+    @classmethod
+    def from_coo(cls, coords, values, shape=None, names=None):
+        """Sparse tensor from coordinates (N, nnz) and values (nnz,)."""
+        tensor = cls.__new__(cls)
+        coords = np.asarray(coords, dtype=np.int64)
+        if coords.ndim != 2:
+            raise ValueError('Expected coordinates of shape (N, nnz)')
+        if shape is None:
+            shape = tuple(int(c.max()) + 1 if c.size else 0 for c in coords)
+        tensor._init_sparse(coords, np.asarray(values, dtype=np.float64), tuple(shape))
+        tensor.names = list(names) if names is not None else _default_names(len(tensor.shape))
+        if len(tensor.names) != len(tensor.shape):
+            raise ValueError('Expected one name per variable')
+        tensor._entropies = {(): 0.0}
+        return tensor
+
+    def _init_sparse(self, coords, values, shape):
+        if coords.shape[0] != len(shape):
+            raise ValueError('Expected one coordinate row per variable')
+        if coords.size and ((coords < 0).any() or (coords.max(axis=1) >= np.asarray(shape)).any()):
+            raise ValueError('Cell index outside the tensor')
+        keep = values > 0
+        coords, values = _group(coords[:, keep], values[keep], shape)
+        total = values.sum()
+        if abs(total - 1.0) > 1e-6 and total > 0:
+            values = values / total
+        self.shape = tuple(shape)
+        self.sparse = True
+        self._marginals = {tuple(range(len(shape))): (coords, values)}
+
+    @property
+    def ndim(self):
+        return len(self.shape)
+
+    def axes(self, variables):
+        """Sorted tuple of axes for a name, an axis number or an iterable of them."""
+        if isinstance(variables, (str, int, np.integer)):
+            variables = [variables]
+        out = set()
+        for v in variables:
+            axis = self.names.index(v) if isinstance(v, str) else int(v)
+            if not 0 <= axis < self.ndim:
+                raise ValueError(f'No variable {v!r}')
+            out.add(axis)
+        return tuple(sorted(out))
+
+    def _size(self, marginal):
+        return len(marginal[1]) if self.sparse else marginal.size
+
+    def marginal(self, variables):
+        """P over the given variables: an array with their axes in ascending
+        order, or (coords, values) of its nonzero cells for a sparse tensor."""
+        keep = self.axes(variables)
+        cached = self._marginals.get(keep)
+        if cached is not None:
+            return cached
+        source = min((axes for axes in self._marginals if set(keep) <= set(axes)),
+                      key=lambda axes: self._size(self._marginals[axes]))
+        P = self._marginals[source]
+        if self.sparse:
+            coords, values = P
+            rows = [source.index(axis) for axis in keep]
+            out = _group(coords[rows], values, [self.shape[axis] for axis in keep])
+        else:
+            out = P.sum(axis=tuple(i for i, axis in enumerate(source) if axis not in keep))
+        self._marginals[keep] = out
+        return out
+
+    def entropy(self, variables):
+        """H of the given variables, in bits."""
+        keep = self.axes(variables)
+        H = self._entropies.get(keep)
+        if H is None:
+            P = self.marginal(keep)
+            H = float(entropy_rows(P[1] if self.sparse else P.ravel()))
+            self._entropies[keep] = H
+        return H
+
+    def conditional_entropy(self, variables, given=()):
+        """H(X | Y) = H(X, Y) - H(Y)."""
+        X, Y = self.axes(variables), self.axes(given)
+        return self.entropy(X + Y) - self.entropy(Y)
+
+    def mutual_information(self, x, y, given=()):
+        """I(X; Y | Z) = H(X, Z) + H(Y, Z) - H(X, Y, Z) - H(Z)."""
+        X, Y, Z = self.axes(x), self.axes(y), self.axes(given)
+        return self.entropy(X + Z) + self.entropy(Y + Z) - self.entropy(X + Y + Z) - self.entropy(Z)
+
+    def total_correlation(self, variables=None):
+        """Sum of the single-variable entropies minus their joint entropy."""
+        keep = self.axes(range(self.ndim) if variables is None else variables)
+        return sum(self.entropy(axis) for axis in keep) - self.entropy(keep)
+
+    def pairwise_information(self, given=()):
+        """N x N matrix of I(Xi; Xj | given); the diagonal holds H(Xi | given)."""
+        Z = self.axes(given)
+        M = np.zeros((self.ndim, self.ndim))
+        for i in range(self.ndim):
+            if i not in Z:
+                M[i, i] = self.conditional_entropy(i, Z)
+        for i, j in combinations(range(self.ndim), 2):
+            if i not in Z and j not in Z:
+                M[i, j] = M[j, i] = self.mutual_information(i, j, Z)
+        return M
+
+    def dense(self, variables=None):
+        """Marginal over the given variables (all by default) as a dense array."""
+        keep = self.axes(range(self.ndim) if variables is None else variables)
+        P = self.marginal(keep)
+        if not self.sparse:
+            return P
+        out = np.zeros([self.shape[axis] for axis in keep])
+        out[tuple(P[0])] = P[1]
+        return out
+
+def _default_names(n):
+    if n <= len(string.ascii_uppercase):
+        return list(string.ascii_uppercase[:n])
+    return [f'X{i + 1}' for i in range(n)]
+
+def _group(coords, values, shape):
+    """Sum the values of equal coordinate columns; returns them sorted."""
+    if not coords.shape[1]:
+        return coords, values
+    cells = np.prod([float(n) for n in shape])
+    if cells <= 4 * len(values):
+        # small marginal: accumulate densely instead of sorting
+        keys = np.ravel_multi_index(tuple(coords), shape)
+        dense = np.bincount(keys, values, minlength=int(cells))
+        unique = np.flatnonzero(dense)
+        return np.vstack(np.unravel_index(unique, shape)).astype(np.int64).reshape(len(shape), -1), dense[unique]
+    if cells < 2.0 ** 62:
+        keys = np.ravel_multi_index(tuple(coords), shape)
+        unique, inverse = np.unique(keys, return_inverse=True)
+        return (np.vstack(np.unravel_index(unique, shape)).astype(np.int64).reshape(len(shape), -1),
+                np.bincount(inverse, values, minlength=len(unique)))
+    unique, inverse = np.unique(coords, axis=1, return_inverse=True)
+    return unique, np.bincount(inverse.ravel(), values, minlength=unique.shape[1])
+
+def tensor_from_joint(P, names=None):
+    """Entropy report for a joint distribution of N variables.
+
+    For every variable X: its marginal 'P' + lower-case name (e.g. 'Pa'),
+    'H(X)' and 'H(X|rest)'; 'H(ABC...)' for the whole joint; 'I(X;Y)' for
+    every pair. With two variables this gives exactly the keys of
+    from_joint_to_all, with 'P(B|A)' and 'P(A|B)' added (lazy views when
+    the input is sparse). With more, 'I(X;Y|rest)' for every pair and the
+    total correlation 'TC' are added. P may be a JointTensor.
+    """
+    T = P if isinstance(P, JointTensor) else JointTensor(P, names)
+    names = T.names
+    everything = tuple(range(T.ndim))
+    res = {'joint': T.marginal(everything) if T.sparse else T.dense()}
+    for axis, name in enumerate(names):
+        res[f'P{name.lower()}'] = T.dense(axis)
+    if T.ndim == 2:
+        a, b = names
+        if T.sparse:
+            coords, values = T.marginal((0, 1))
+            joint = SparseJoint.from_coo(coords[0], coords[1], values, T.shape)
+            res['joint'] = joint
+            res[f'P({b}|{a})'] = Conditional(joint, 'A', res[f'P{a.lower()}'], res[f'P{b.lower()}'])
+            res[f'P({a}|{b})'] = Conditional(joint, 'B', res[f'P{a.lower()}'], res[f'P{b.lower()}'])
+        else:
+            joint = res['joint']
+            res[f'P({b}|{a})'] = _safe_divide(joint, joint.sum(axis=1)[:, None])
+            res[f'P({a}|{b})'] = _safe_divide(joint, joint.sum(axis=0)[None, :])
+    for axis, name in enumerate(names):
+        res[f'H({name})'] = T.entropy(axis)
+    for axis, name in enumerate(names):
+        rest = tuple(i for i in everything if i != axis)
+        res[f'H({name}|{"".join(names[i] for i in rest)})'] = T.conditional_entropy(axis, rest)
+    res[f'H({"".join(names)})'] = T.entropy(everything)
+    for i, j in combinations(everything, 2):
+        res[f'I({names[i]};{names[j]})'] = T.mutual_information(i, j)
+    if T.ndim > 2:
+        for i, j in combinations(everything, 2):
+            rest = tuple(k for k in everything if k not in (i, j))
+            res[f'I({names[i]};{names[j]}|{"".join(names[k] for k in rest)})'] = T.mutual_information(i, j, rest)
+        res['TC'] = T.total_correlation()
+    return res
@@ -0,0 +1,191 @@
+import argparse
+import codecs
+import math
+
+import numpy as np
+
+from countentropy import entropy_from_counts, xlogx, xlogx_step
+
+# Entropy over a sliding window of the last W symbols of a stream.
+# Every step removes the symbol leaving the window and adds the one entering
+# it, which changes S = sum c*log2(c) by two terms; H = log2(W) - S / W.
+# A chunk of steps is done at once: the enter/leave events are grouped by
+# symbol with a stable sort, a cumulative sum per group gives every count
+# before and after its event, and the per-step changes of S are summed up.
+
+WINDOW = 4096
+CHUNK_SIZE = 1 << 18
+# sample through block histograms when gcd(window, stride) * BLOCK_RATIO >= alphabet size
+BLOCK_RATIO = 2
+
+def text_symbols(text):
+    """Code points of a str as an array of symbol ids."""
+    return np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32)
+
+class RollingEntropy:
+    """Entropy of the last `window` symbols, sampled every `stride` symbols.
+
+    Symbols are non-negative integer ids (bytes, code points, token ids).
+    feed() takes the stream in chunks of any size and returns the samples
+    that became available: the stream position each window ends at (the
+    number of symbols consumed) and the window's entropy in bits. The first
+    sample is the first full window; later ones follow every stride symbols.
+    The counts and S are kept between chunks, and S is recomputed from the
+    counts after each chunk so rounding does not accumulate. When
+    gcd(window, stride) is large against the alphabet, the samples are taken
+    from block histograms instead of per-symbol updates (see BLOCK_RATIO).
+    """
+    def __init__(self, window=WINDOW, stride=1, nsymbols=256):
+        if window < 1 or stride < 1:
+            raise ValueError('Window and stride must be positive')
+        self.window = window
+        self.stride = stride
+        self.counts = np.zeros(nsymbols, dtype=np.int64)
+        self.S = 0.0
+        self.seen = 0
+        self.tail = np.zeros(0, dtype=np.uint8)  # the last min(window, seen) symbols
+
+    def entropy(self):
+        """Entropy of the current window (of all symbols while fewer than window were seen)."""
+        n = min(self.seen, self.window)
+        return max(0.0, float(np.log2(n)) - self.S / n) if n else 0.0
+
+    def feed(self, symbols):
+        """Consume a chunk; returns (ends, H) arrays of the new samples."""
+        x = np.asarray(symbols)
+        if x.dtype.kind not in 'iu':
+            raise ValueError('Expected integer symbol ids')
+        n = len(x)
+        if not n:
+            return np.zeros(0, dtype=np.int64), np.zeros(0)
+        if x.min() < 0:
+            raise ValueError('Symbol ids must be non-negative')
+        top = int(x.max())
+        if top >= len(self.counts):
+            grown = np.zeros(max(top + 1, 2 * len(self.counts)), dtype=np.int64)
+            grown[:len(self.counts)] = self.counts
+            self.counts = grown
+        # the smallest unsigned type keeps the stable sort a radix sort for bytes
+        dtype = np.min_scalar_type(len(self.counts) - 1)
+        W = self.window
+        m = len(self.tail)
+        ext = np.concatenate([self.tail.astype(dtype), x.astype(dtype)])
+        # step i adds x[i] and, once the window is full, removes ext[m + i - W]
+        first_leave = min(n, max(0, W - m))
+        leaving = ext[m + first_leave - W:m + n - W] if first_leave < n else ext[:0]
+
+        first = max(W, self.seen + 1)
+        first += (W - first) % self.stride
+        pick = np.arange(first - self.seen - 1, n, self.stride)
+        if not len(pick):
+            H = np.zeros(0)
+        elif math.gcd(W, self.stride) * BLOCK_RATIO >= len(self.counts):
+            H = self._sample_blocks(ext, m, pick)
+        else:
+            H = self._sample_events(ext[m:], leaving, first_leave, pick)
+
+        tail = ext[-W:]
+        if len(tail) <= 2 * n:
+            # recounting the new window is cheaper than the two chunk histograms
+            self.counts = np.bincount(tail, minlength=len(self.counts))
+        else:
+            self.counts += np.bincount(ext[m:], minlength=len(self.counts))
+            if len(leaving):
+                self.counts -= np.bincount(leaving, minlength=len(self.counts))
+        self.S = float(xlogx(self.counts).sum())
+        self.seen += n
+        self.tail = tail
+        return self.seen - n + pick + 1, H
+
+    def _sample_events(self, x, leaving, first_leave, pick):
+        # O(1) per symbol: every enter/leave event changes S by one table step
+        n = len(x)
+        ev_sym = np.empty(2 * n - first_leave, dtype=x.dtype)
+        ev_delta = np.empty(len(ev_sym), dtype=np.int8)
+        ev_sym[:first_leave] = x[:first_leave]
+        ev_delta[:first_leave] = 1
+        ev_sym[first_leave:] = np.column_stack([leaving, x[first_leave:]]).ravel()
+        ev_delta[first_leave:] = np.tile(np.array([-1, 1], dtype=np.int8), n - first_leave)
+
+        # per symbol, the events in time order; a running sum gives the count
+        # after each event, offset per group by the count the chunk started with
+        order = np.argsort(ev_sym, kind='stable')
+        sym = ev_sym[order]
+        delta = ev_delta[order]
+        running = np.cumsum(delta, dtype=np.int64)
+        starts = np.flatnonzero(np.r_[True, sym[1:] != sym[:-1]])
+        offset = self.counts.copy()
+        offset[sym[starts]] -= np.r_[0, running][starts]
+        after = running + offset[sym]
+        # an enter raises the count from after - 1, a leave lowers it to after
+        dS = np.empty(len(sym))
+        dS[order] = delta * xlogx_step(after - (delta > 0))
+
+        # S after the last event of each sampled step
+        last = np.where(pick < first_leave, pick, 2 * pick - first_leave + 1)
+        S = self.S + np.cumsum(dS)[last]
+        size = np.minimum(self.seen + pick + 1, self.window)
+        return np.maximum(np.log2(size) - S / size, 0.0)
+
+    def _sample_blocks(self, ext, m, pick):
+        # coarse strides: every window is a whole number of blocks of
+        # gcd(window, stride) symbols, so its counts are a difference of
+        # prefix sums of per-block histograms, computed exactly
+        W, K = self.window, len(self.counts)
+        g = math.gcd(W, self.stride)
+        ends = self.seen + pick + 1
+        # ext starts at stream position seen - m; blocks are aligned to multiples of g
+        origin = -(-(self.seen - m) // g) * g
+        skip = origin - (self.seen - m)
+        nblocks = (int(ends[-1]) - origin) // g
+        blocks = ext[skip:skip + nblocks * g].reshape(nblocks, g)
+        keys = np.add(blocks, (np.arange(nblocks) * K)[:, None], dtype=np.int64)
+        prefix = np.zeros((nblocks + 1, K), dtype=np.int64)
+        np.cumsum(np.bincount(keys.ravel(), minlength=nblocks * K).reshape(nblocks, K), axis=0, out=prefix[1:])
+        hi = (ends - origin) // g
+        return entropy_from_counts(prefix[hi] - prefix[hi - W // g], axis=1)
+
+def rolling_entropy(symbols, window=WINDOW, stride=1):
+    """(ends, H) of every stride-th full window of a whole symbol array."""
+    roller = RollingEntropy(window, stride)
+    ends, H = [], []
+    x = np.asarray(symbols)
+    for start in range(0, len(x), CHUNK_SIZE):
+        e, h = roller.feed(x[start:start + CHUNK_SIZE])
+        ends.append(e)
+        H.append(h)
+    if not ends:
+        return np.zeros(0, dtype=np.int64), np.zeros(0)
+    return np.concatenate(ends), np.concatenate(H)
+
+def rolling_file(path, window=WINDOW, stride=1, chunk_size=CHUNK_SIZE, text=False):
+    """Yield (ends, H) per chunk of a file without loading it whole.
+
+    Symbols are bytes, or with text=True the characters of a UTF-8 file
+    (ends then count characters; invalid bytes become U+FFFD).
+    """
+    roller = RollingEntropy(window, stride)
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='replace') if text else None
+    buf = bytearray(chunk_size)
+    with open(path, 'rb') as f:
+        while True:
+            size = f.readinto(buf)
+            if not size:
+                return
+            if decoder is not None:
+                yield roller.feed(text_symbols(decoder.decode(memoryview(buf)[:size])))
+            else:
+                yield roller.feed(np.frombuffer(buf, dtype=np.uint8, count=size))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Sliding-window entropy of a byte or text stream')
+    parser.add_argument('path', help='file to scan')
+    parser.add_argument('-w', '--window', type=int, default=WINDOW, help='window length in symbols')
+    parser.add_argument('-s', '--stride', type=int, default=WINDOW, help='symbols between samples')
+    parser.add_argument('--text', action='store_true', help='symbols are UTF-8 characters instead of bytes')
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+    args = parser.parse_args()
+
+    for ends, H in rolling_file(args.path, args.window, args.stride, args.chunk_size, args.text):
+        for end, h in zip(ends.tolist(), H.tolist()):
+            print(f'{end}\t{h:.6f}')
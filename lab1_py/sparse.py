@@ -0,0 +1,179 @@
+import os
+
+import numpy as np
+
+from batch import entropy_rows
+
+# Sparse joint distributions P(A,B): only nonzero cells are stored (CSR), the
+# metrics run over those cells and the conditionals are computed on access
+
+class SparseJoint:
+    """Joint matrix P(A,B) in CSR form: row i holds the cells
+    indices[indptr[i]:indptr[i+1]] with values data[indptr[i]:indptr[i+1]].
+
+    Negative and zero cells are dropped and duplicate cells summed; like
+    from_joint_to_all, the values are rescaled when they do not sum to 1.
+    """
+    def __init__(self, indptr, indices, data, shape):
+        self.indptr = indptr
+        self.indices = indices
+        self.data = data
+        self.shape = shape
+
+    @classmethod
+    def from_coo(cls, rows, cols, values, shape=None):
+        rows = np.asarray(rows, dtype=np.int64)
+        cols = np.asarray(cols, dtype=np.int64)
+        values = np.asarray(values, dtype=np.float64)
+        if shape is None:
+            shape = (int(rows.max()) + 1 if len(rows) else 0, int(cols.max()) + 1 if len(cols) else 0)
+        na, nb = shape
+        if len(rows) and (rows.min() < 0 or cols.min() < 0 or rows.max() >= na or cols.max() >= nb):
+            raise ValueError('Cell index outside the matrix')
+        keep = values > 0
+        rows, cols, values = rows[keep], cols[keep], values[keep]
+        keys = rows * nb + cols
+        order = np.argsort(keys, kind='stable')
+        keys, values = keys[order], values[order]
+        starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]]) if len(keys) else np.zeros(0, dtype=np.intp)
+        keys = keys[starts]
+        values = np.add.reduceat(values, starts) if len(starts) else values
+        total = values.sum()
+        if abs(total - 1.0) > 1e-6 and total > 0:
+            values = values / total
+        indptr = np.zeros(na + 1, dtype=np.int64)
+        np.cumsum(np.bincount(keys // nb, minlength=na), out=indptr[1:])
+        return cls(indptr, (keys % nb).astype(np.int32 if nb < 2**31 else np.int64), values, (na, nb))
+
+    @classmethod
+    def from_dense(cls, M, block_cells=1 << 22):
+        """Collect the nonzeros of a dense (possibly memory-mapped) matrix block by block."""
+        M = np.asanyarray(M)
+        if M.ndim != 2:
+            raise ValueError('Expected a 2-D joint matrix')
+        step = max(1, block_cells // max(1, M.shape[1]))
+        rows, cols, values = [], [], []
+        for start in range(0, M.shape[0], step):
+            block = np.asarray(M[start:start + step], dtype=np.float64)
+            r, c = np.nonzero(block > 0)
+            rows.append(r + start)
+            cols.append(c)
+            values.append(block[r, c])
+        if not rows:
+            return cls.from_coo([], [], [], M.shape)
+        return cls.from_coo(np.concatenate(rows), np.concatenate(cols), np.concatenate(values), M.shape)
+
+    @property
+    def nnz(self):
+        return len(self.data)
+
+    def row_ids(self):
+        """Row index of every stored cell."""
+        return np.repeat(np.arange(self.shape[0]), np.diff(self.indptr))
+
+    def row(self, i):
+        """(column indices, values) of the stored cells of row i."""
+        lo, hi = self.indptr[i], self.indptr[i + 1]
+        return self.indices[lo:hi], self.data[lo:hi]
+
+    def marginals(self):
+        """(Pa, Pb)."""
+        na, nb = self.shape
+        return (np.bincount(self.row_ids(), self.data, minlength=na),
+                np.bincount(self.indices, self.data, minlength=nb))
+
+    def toarray(self):
+        M = np.zeros(self.shape)
+        M[self.row_ids(), self.indices] = self.data
+        return M
+
+class Conditional:
+    """Lazy conditional matrix of a SparseJoint, rows = A, columns = B.
+
+    given='A' is P(B|A) (each row divided by Pa[i]), given='B' is P(A|B)
+    (each cell divided by Pb[j]). Rows are built densely only when accessed,
+    so iterating is meant for small matrices; row_cells() stays sparse.
+    """
+    def __init__(self, joint, given, Pa, Pb):
+        self.joint = joint
+        self.given = given
+        self.Pa = Pa
+        self.Pb = Pb
+
+    def __len__(self):
+        return self.joint.shape[0]
+
+    def row_cells(self, i):
+        """(column indices, conditional probabilities) of the nonzero cells of row i."""
+        cols, p = self.joint.row(i)
+        return cols, p / (self.Pa[i] if self.given == 'A' else self.Pb[cols])
+
+    def __getitem__(self, i):
+        out = np.zeros(self.joint.shape[1])
+        cols, p = self.row_cells(i)
+        out[cols] = p
+        return out
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+def sparse_from_joint(joint):
+    """from_joint_to_all for a SparseJoint, in O(nnz) time and memory.
+
+    The conditional entropies are summed directly over the nonzero cells,
+    H(B|A) = -sum p(a,b) log2(p(a,b) / p(a)); 'P(B|A)' and 'P(A|B)' are
+    lazy Conditional views instead of dense matrices.
+    """
+    Pa, Pb = joint.marginals()
+    p = joint.data
+    rows = joint.row_ids()
+    H_A = float(entropy_rows(Pa))
+    H_B = float(entropy_rows(Pb))
+    H_AB = float(entropy_rows(p))
+    H_B_given_A = float(-(p * np.log2(p / Pa[rows])).sum())
+    H_A_given_B = float(-(p * np.log2(p / Pb[joint.indices])).sum())
+    return {
+        'joint': joint,
+        'Pa': Pa,
+        'Pb': Pb,
+        'P(B|A)': Conditional(joint, 'A', Pa, Pb),
+        'P(A|B)': Conditional(joint, 'B', Pa, Pb),
+        'H(A)': H_A,
+        'H(B)': H_B,
+        'H(B|A)': H_B_given_A,
+        'H(A|B)': H_A_given_B,
+        'H(AB)': H_AB,
+        'I(A;B)': H_A + H_B - H_AB,
+    }
+
+def load_joint(path):
+    """Read a joint matrix from a file into a SparseJoint.
+
+    .npy  - dense 2-D array (memory-mapped while the nonzeros are collected)
+    .npz  - COO arrays 'rows', 'cols', 'values' and optionally 'shape'
+    .csv  - either a dense grid of numbers, or COO triplets "a,b,p" (zero-based
+            row and column) under a header line such as "a,b,p"; the shape of
+            a triplet file is given by its largest indices
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.npy':
+        return SparseJoint.from_dense(np.load(path, mmap_mode='r'))
+    if ext == '.npz':
+        with np.load(path) as f:
+            shape = tuple(int(n) for n in f['shape']) if 'shape' in f else None
+            return SparseJoint.from_coo(f['rows'], f['cols'], f['values'], shape)
+    if ext == '.csv':
+        with open(path, 'r', encoding='utf-8') as f:
+            header = f.readline()
+        try:
+            [float(x) for x in header.split(',')]
+            triplets = False
+        except ValueError:
+            triplets = True
+        if not triplets:
+            return SparseJoint.from_dense(np.loadtxt(path, delimiter=',', ndmin=2))
+        cells = np.loadtxt(path, delimiter=',', skiprows=1, ndmin=2)
+        if cells.shape[1] != 3:
+            raise ValueError('Expected "a,b,p" triplets after the CSV header')
+        return SparseJoint.from_coo(cells[:, 0], cells[:, 1], cells[:, 2])
+    raise ValueError(f'Unsupported matrix file: {path}')
@@ -0,0 +1,119 @@
+import argparse
+import itertools
+
+import numpy as np
+
+from batch import batch_from_joint
+from countentropy import entropy_from_counts
+
+# Streaming estimation of the joint distribution P(A,B) from (A, B) symbol pairs
+
+CHUNK_SIZE = 1 << 16
+
+def chunked(iterable, size):
+    it = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+def read_pairs(source, sep=None):
+    """Yield (a, b) pairs from a text file (one pair per line) or an iterable of lines.
+
+    Lines are split once on sep (whitespace by default); blank lines are skipped.
+    The file is read lazily, so its size is not limited by memory.
+    """
+    if isinstance(source, (str, bytes)) or hasattr(source, '__fspath__'):
+        with open(source, 'r', encoding='utf-8') as f:
+            yield from read_pairs(f, sep)
+        return
+    for line in source:
+        line = line.strip()
+        if not line:
+            continue
+        parts = line.split(sep, 1)
+        if len(parts) != 2:
+            raise ValueError(f'Expected a pair of symbols, got {line!r}')
+        yield parts[0], parts[1].strip()
+
+class JointCounter:
+    """Count matrix of (A, B) pairs built incrementally.
+
+    Memory is O(|A|*|B|) regardless of how many pairs were fed; symbols are
+    assigned row/column indices in order of first appearance.
+    """
+    def __init__(self):
+        self.a_index = {}
+        self.b_index = {}
+        self.counts = np.zeros((0, 0), dtype=np.int64)
+        self.total = 0
+
+    @staticmethod
+    def _ids(index, symbols):
+        return np.fromiter((index.setdefault(s, len(index)) for s in symbols), dtype=np.intp, count=len(symbols))
+
+    def update(self, pairs):
+        if not pairs:
+            return
+        a_syms, b_syms = zip(*pairs)
+        ia = self._ids(self.a_index, a_syms)
+        ib = self._ids(self.b_index, b_syms)
+        na, nb = len(self.a_index), len(self.b_index)
+        if self.counts.shape != (na, nb):
+            grown = np.zeros((na, nb), dtype=np.int64)
+            grown[:self.counts.shape[0], :self.counts.shape[1]] = self.counts
+            self.counts = grown
+        self.counts += np.bincount(ia * nb + ib, minlength=na * nb).reshape(na, nb)
+        self.total += len(ia)
+
+    def feed(self, pairs, every=None, chunk_size=CHUNK_SIZE):
+        """Consume an iterable of pairs chunk by chunk.
+
+        If every is given, yields running() after each block of `every` pairs.
+        """
+        for chunk in chunked(pairs, chunk_size):
+            start = 0
+            while start < len(chunk):
+                take = len(chunk) - start
+                if every:
+                    take = min(take, every - self.total % every)
+                self.update(chunk[start:start + take])
+                start += take
+                if every and self.total % every == 0:
+                    yield self.running()
+
+    def running(self):
+        """H(A), H(B), H(AB) and I(A;B) of the pairs seen so far."""
+        if self.total == 0:
+            return {'n': 0, 'H(A)': 0.0, 'H(B)': 0.0, 'H(AB)': 0.0, 'I(A;B)': 0.0}
+        # entropies straight from the integer counts, no probability matrix
+        H_A = entropy_from_counts(self.counts.sum(axis=1))
+        H_B = entropy_from_counts(self.counts.sum(axis=0))
+        H_AB = entropy_from_counts(self.counts.ravel())
+        return {'n': self.total, 'H(A)': H_A, 'H(B)': H_B, 'H(AB)': H_AB, 'I(A;B)': H_A + H_B - H_AB}
+
+    def metrics(self):
+        """Full from_joint_to_all result for the accumulated counts."""
+        if self.total == 0:
+            raise ValueError('No pairs have been counted yet')
+        res = {key: value[0] for key, value in batch_from_joint(self.counts).items()}
+        res['A'] = list(self.a_index)
+        res['B'] = list(self.b_index)
+        return res
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Entropy of a stream of (A, B) symbol pairs')
+    parser.add_argument('path', help='file with one "a b" pair per line')
+    parser.add_argument('--sep', default=None, help='pair separator (default: whitespace)')
+    parser.add_argument('--every', type=int, default=None, help='print running entropies every K pairs')
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+    args = parser.parse_args()
+
+    counter = JointCounter()
+    for snap in counter.feed(read_pairs(args.path, args.sep), args.every, args.chunk_size):
+        print(f"n={snap['n']} H(A)={snap['H(A)']:.6f} H(B)={snap['H(B)']:.6f} "
+              f"H(AB)={snap['H(AB)']:.6f} I(A;B)={snap['I(A;B)']:.6f}")
+    res = counter.metrics()
+    for key in ('H(A)', 'H(B)', 'H(B|A)', 'H(A|B)', 'H(AB)', 'I(A;B)'):
+        print(f'{key} = {res[key]:.6f} бит')
@@ -0,0 +1,394 @@
+import argparse
+import heapq
+import itertools
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import Counter
+from typing import Dict
+
+from blocks import BLOCK_SIZE, compress_blocks, decompress_blocks
+from bytecodec import decode_bytes, encode_bytes
+from codec import encode_packed
+from codecache import CodeTableCache
+from compression import Node, TextCompression
+from countentropy import CountEntropy, entropy_from_counts
+from dictionary import StaticDictionary, decode_with_dictionary, encode_with_dictionary
+from tokens import MODES, decode_tokens, encode_tokens, tokenize
+
+
+def make_corpus(size: int, seed: int = 0) -> str:
+    """Pseudo-natural text: Zipf-distributed words over a mixed Latin/Cyrillic alphabet."""
+    rng = random.Random(seed)
+    letters = 'etaoinshrdlucmfwypvbgkjqxzоеаинтсрвлкмдпуяыьгзбчйхжшюцщэфъё'
+    vocab = [''.join(rng.choice(letters) for _ in range(rng.randint(1, 9))) for _ in range(5000)]
+    weights = [1.0 / (rank + 1) for rank in range(len(vocab))]
+    parts = []
+    total = 0
+    while total < size:
+        for word in rng.choices(vocab, weights, k=10000):
+            parts.append(word)
+            parts.append('\n' if rng.random() < 0.05 else ' ')
+            total += len(word) + 1
+    return ''.join(parts)[:size]
+
+
+def _timed(fn, *args):
+    t0 = time.perf_counter()
+    res = fn(*args)
+    return res, time.perf_counter() - t0
+
+
+def _mbps(nbytes: int, seconds: float) -> float:
+    return nbytes / 1e6 / seconds if seconds > 0 else float('inf')
+
+
+def bench_encode(text: str):
+    tc = TextCompression()
+    tc.calculate_frequencies(text)
+    tc.generate_huffman_codes()
+    nbytes = len(text.encode('utf-8'))
+
+    bits, t_str = _timed(tc.encode_text, text, tc.huffman_codes_map)
+    packed, t_packed = _timed(tc.encode_packed, text)
+
+    print(f'input: {len(text)} chars, {nbytes} bytes UTF-8')
+    print(f'  encode_text   : {t_str:.3f} s, {_mbps(nbytes, t_str):7.1f} MB/s, output {len(bits)} bytes (str)')
+    print(f'  encode_packed : {t_packed:.3f} s, {_mbps(nbytes, t_packed):7.1f} MB/s, output {len(packed)} bytes, '
+          f'x{t_str / t_packed:.1f} faster, x{len(bits) / len(packed):.1f} smaller')
+
+
+def _tree_walk_decode(bits: str, codes_map) -> str:
+    # bit-at-a-time reference decoder
+    by_code = {code: sym for sym, code in codes_map.items()}
+    out = []
+    cur = ''
+    for b in bits:
+        cur += b
+        sym = by_code.get(cur)
+        if sym is not None:
+            out.append(sym)
+            cur = ''
+    return ''.join(out)
+
+
+def bench_decode(text: str):
+    tc = TextCompression()
+    tc.calculate_frequencies(text)
+    tc.generate_shannon_fano_codes()
+    tc.generate_huffman_codes()
+    nbytes = len(text.encode('utf-8'))
+    print(f'input: {len(text)} chars, {nbytes} bytes UTF-8')
+
+    for name, codes_map in (('fano', tc.fano_codes_map), ('huffman', tc.huffman_codes_map)):
+        bits = tc.encode_text(text, codes_map)
+        decoded, t_bits = _timed(tc.decode, bits, codes_map)
+        assert decoded == text, f'{name}: bit-string round trip failed'
+        _, t_walk = _timed(_tree_walk_decode, bits, codes_map)
+        print(f'  {name:8s} bit-string : table {_mbps(nbytes, t_bits):6.1f} MB/s, '
+              f'tree walk {_mbps(nbytes, t_walk):6.1f} MB/s')
+
+    packed = tc.encode_packed(text)
+    decoded, t_packed = _timed(tc.decode, packed)
+    assert decoded == text, 'packed round trip failed'
+    print(f'  huffman  packed     : table {_mbps(nbytes, t_packed):6.1f} MB/s')
+
+
+def _count_loop(text: str):
+    # the original per-character dict.get loop
+    freqs = {}
+    for ch in text:
+        freqs[ch] = freqs.get(ch, 0) + 1
+    return freqs
+
+
+def bench_count(text: str):
+    nbytes = len(text.encode('utf-8'))
+    ref, t_loop = _timed(_count_loop, text)
+    tc = TextCompression()
+    _, t_counter = _timed(tc.calculate_frequencies, text)
+    assert tc.frequencies == ref and list(tc.frequencies) == list(ref)
+    nodes = tc.nodes
+    print(f'input: {len(text)} chars, {nbytes} bytes UTF-8')
+    print(f'  dict.get loop          : {_mbps(nbytes, t_loop):7.1f} MB/s')
+    print(f'  Counter                : {_mbps(nbytes, t_counter):7.1f} MB/s')
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'corpus.txt')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        workers = 1
+        while workers <= (os.cpu_count() or 1):
+            tc = TextCompression()
+            _, t_file = _timed(tc.calculate_file_frequencies, path, workers)
+            assert tc.nodes == nodes and list(tc.frequencies) == list(ref)
+            print(f'  count_file, {workers:2d} workers : {_mbps(nbytes, t_file):7.1f} MB/s')
+            workers *= 2
+
+
+def bench_blocks(text: str):
+    # heterogeneous input: the first half Latin-only, the second Cyrillic-only
+    half = len(text) // 2
+    mixed = (text[:half].translate({ord(c): None for c in 'оеаинтсрвлкмдпуяыьгзбчйхжшюцщэфъё'})
+             + text[half:].translate({ord(c): None for c in 'etaoinshrdlucmfwypvbgkjqxz'}))
+    nbytes = len(mixed.encode('utf-8'))
+    tc = TextCompression()
+    packed, t_global = _timed(tc.encode_packed, mixed)
+    print(f'input: {len(mixed)} chars, {nbytes} bytes UTF-8 (Latin half + Cyrillic half)')
+    print(f'  one global code        : {_mbps(nbytes, t_global):6.1f} MB/s, {len(packed)} bytes')
+
+    for block_size in (1 << 16, 1 << 18, BLOCK_SIZE):
+        workers = 1
+        while workers <= (os.cpu_count() or 1):
+            container, t_enc = _timed(compress_blocks, mixed, block_size, 'huffman', workers)
+            decoded, t_dec = _timed(decompress_blocks, container, workers)
+            assert decoded == mixed, 'block round trip failed'
+            print(f'  blocks of {block_size:7d}, {workers:2d} workers: encode {_mbps(nbytes, t_enc):6.1f} MB/s, '
+                  f'decode {_mbps(nbytes, t_dec):6.1f} MB/s, {len(container)} bytes '
+                  f'({100 * (len(container) / len(packed) - 1):+.1f}%)')
+            workers *= 2
+
+
+def _reference_fano(items):
+    # the original slicing/re-summing Shannon-Fano, kept for comparison
+    codes = {sym: '' for sym, _ in items}
+
+    def split_index(probs):
+        total = sum(probs)
+        acc = 0.0
+        best_idx = 0
+        best_diff = float('inf')
+        for i in range(len(probs)):
+            acc += probs[i]
+            diff = abs(acc - (total - acc))
+            if diff < best_diff:
+                best_diff = diff
+                best_idx = i
+        return best_idx
+
+    def recurse(items):
+        if len(items) <= 1:
+            return
+        split = split_index([p for (_, p) in items])
+        left = items[:split + 1]
+        right = items[split + 1:]
+        for sym, _ in left:
+            codes[sym] += '0'
+        for sym, _ in right:
+            codes[sym] += '1'
+        recurse(left)
+        recurse(right)
+
+    recurse(items)
+    return codes
+
+
+def _token_alphabet(size: int, seed: int = 0) -> Dict[str, int]:
+    # Zipf-like counts over size distinct tokens (word / n-gram level alphabets)
+    rng = random.Random(seed)
+    return {f't{i}': max(1, int(10**7 / (i + 1) * rng.uniform(0.5, 1.5))) for i in range(size)}
+
+
+def bench_fano(text: str):
+    tc = TextCompression()
+    tc.calculate_frequencies(text)
+    sizes = [len(tc.frequencies), 10**3, 10**4, 10**5, 10**6]
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), 10**5))
+    for size in sizes:
+        if size != sizes[0]:
+            tc.set_frequencies(_token_alphabet(size))
+        _, t_new = _timed(tc.generate_shannon_fano_codes)
+        line = f'  {len(tc.frequencies):8d} symbols: prefix sums {t_new:8.3f} s'
+        if size <= 10**5:
+            # integer weights: with float probabilities the original settled exact ties by rounding
+            items = [(n['symbol'], n['frequency']) for n in tc.nodes]
+            ref, t_ref = _timed(_reference_fano, items)
+            assert ref == tc.fano_codes_map, f'codes differ for {size} symbols'
+            line += f', slicing {t_ref:8.3f} s, x{t_ref / t_new:.0f} faster, same codes'
+        print(line)
+
+
+def _reference_huffman_lengths(frequencies: Dict[str, int]) -> Dict[str, int]:
+    # the original heapq + Node build with a recursive traversal, kept for comparison
+    heap = []
+    counter = itertools.count()
+    for sym, freq in frequencies.items():
+        heapq.heappush(heap, (freq, next(counter), Node(symbol=sym, frequency=freq)))
+    while len(heap) > 1:
+        f1, _, n1 = heapq.heappop(heap)
+        f2, _, n2 = heapq.heappop(heap)
+        parent = Node(symbol=None, frequency=f1 + f2)
+        parent.left = n1
+        parent.right = n2
+        heapq.heappush(heap, (parent.frequency, next(counter), parent))
+    lengths = {}
+
+    def traverse(node: Node, depth: int):
+        if node.is_leaf():
+            lengths[node.symbol] = depth
+            return
+        traverse(node.left, depth + 1)
+        traverse(node.right, depth + 1)
+
+    traverse(heap[0][2], 0)
+    return lengths
+
+
+def bench_huffman(text: str):
+    tc = TextCompression()
+    tc.calculate_frequencies(text)
+    cases = [('corpus', tc.frequencies)]
+    cases += [('zipf', _token_alphabet(size)) for size in (10**4, 10**5, 10**6)]
+    # doubling weights give a chain as deep as the alphabet is large
+    cases.append(('skewed', {f't{i}': 1 << i for i in range(3000)}))
+    # the reference recurses once per level of that chain
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), 10**5))
+    for name, frequencies in cases:
+        # a fresh instance per case: reusing one would charge freeing the
+        # previous case's tables (a million codes after zipf 1e6) to this build
+        tc = TextCompression()
+        tc.set_frequencies(frequencies)
+        _, t_new = _timed(tc.generate_huffman_codes)
+        lengths = {sym: len(code) for sym, code in tc.huffman_codes_map.items()}
+        ref, t_ref = _timed(_reference_huffman_lengths, frequencies)
+        assert ref == lengths, f'{name}: code lengths differ'
+        print(f'  {name:6s} {len(frequencies):8d} symbols: two queues {t_new:7.3f} s, '
+              f'heap + Node {t_ref:7.3f} s, x{t_ref / t_new:.1f} faster, same lengths')
+
+
+def bench_bytes(text: str):
+    raw = text.encode('utf-8')
+    nbytes = len(raw)
+    packed, t_chars = _timed(TextCompression().encode_packed, text)
+    data, t_bytes = _timed(encode_bytes, raw)
+    decoded, t_dec = _timed(decode_bytes, data)
+    assert decoded == raw, 'byte round trip failed'
+    print(f'input: {len(text)} chars, {nbytes} bytes UTF-8')
+    print(f'  characters (decode + str keys): {_mbps(nbytes, t_chars):6.1f} MB/s, {len(packed)} bytes')
+    print(f'  bytes (256-entry tables)      : {_mbps(nbytes, t_bytes):6.1f} MB/s, {len(data)} bytes, '
+          f'decode {_mbps(nbytes, t_dec):6.1f} MB/s')
+
+
+def bench_tokens(text: str):
+    nbytes = len(text.encode('utf-8'))
+    print(f'input: {len(text)} chars, {nbytes} bytes UTF-8')
+    for mode in MODES:
+        data, t_enc = _timed(encode_tokens, text, mode)
+        decoded, t_dec = _timed(decode_tokens, data)
+        assert decoded == text, f'{mode}: token round trip failed'
+        table, ids = tokenize(text, mode)
+        print(f'  {mode:6s}: {len(table.tokens):6d} table entries, {len(ids):8d} tokens, '
+              f'{8 * len(data) / len(text):.3f} bits/char, '
+              f'encode {_mbps(nbytes, t_enc):6.1f} MB/s, decode {_mbps(nbytes, t_dec):6.1f} MB/s')
+
+
+def _build_codes(frequencies, cache=None):
+    for freqs in frequencies:
+        tc = TextCompression()
+        tc.code_cache = cache
+        tc.set_frequencies(freqs)
+        tc.generate_shannon_fano_codes()
+        tc.generate_huffman_codes()
+
+
+def _edited(text: str, edits: int, rng: random.Random) -> str:
+    chars = list(text)
+    for _ in range(edits):
+        chars[rng.randrange(len(chars))] = rng.choice(text)
+    return ''.join(chars)
+
+
+def bench_cache(text: str, message_size: int = 1 << 14):
+    messages = [text[i:i + message_size] for i in range(0, len(text), message_size)]
+    print(f'input: {len(messages)} messages of {message_size} chars')
+    # the cache pays off for repeated, near-identical distributions (edited
+    # revisions of a document); independent samples rarely share a fingerprint
+    rng = random.Random(0)
+    for name, batch in (('independent', messages),
+                        ('revisions', [_edited(msg, 16, rng) for msg in messages[:8] for _ in range(16)])):
+        frequencies = [Counter(msg) for msg in batch]
+        _, t_plain = _timed(_build_codes, frequencies)
+        cache = CodeTableCache()
+        _, t_cached = _timed(_build_codes, frequencies, cache)
+        stats = cache.stats()
+        print(f'  {name:11s}: code tables {t_plain * 1e3:8.1f} ms without cache, {t_cached * 1e3:8.1f} ms with cache '
+              f'({stats["hits"]} hits, {stats["misses"]} misses)')
+
+    # half the messages train the dictionary, the other half are coded with it
+    train, test = messages[::2], messages[1::2]
+    dictionary = StaticDictionary.train(train)
+    own = dic = 0
+    for msg in test:
+        tc = TextCompression()
+        tc.calculate_frequencies(msg)
+        tc.generate_huffman_codes()
+        own += len(encode_packed(msg, tc.huffman_codes_map))
+        data = encode_with_dictionary(msg, dictionary)
+        assert decode_with_dictionary(data, dictionary) == msg, 'dictionary round trip failed'
+        dic += len(data)
+    print(f'  {len(test)} messages: {own} bytes with per-message tables, {dic} bytes with a static dictionary')
+
+
+def _probability_entropy(nodes) -> float:
+    # the per-node float loop calculate_entropy used before the count kernel
+    ent = 0.0
+    for node in nodes:
+        p = node['probability']
+        if p > 0:
+            ent -= p * math.log2(p)
+    return ent
+
+
+def bench_entropy(text: str):
+    tc = TextCompression()
+    tc.calculate_frequencies(text)
+    sizes = [len(tc.frequencies), 10**4, 10**5, 10**6]
+    for size in sizes:
+        if size != sizes[0]:
+            tc.set_frequencies(_token_alphabet(size))
+        h_new, t_new = _timed(tc.calculate_entropy)
+        h_old, t_old = _timed(_probability_entropy, tc.nodes)
+        assert abs(h_new - h_old) < 1e-9, f'entropy differs for {size} symbols'
+        print(f'  {len(tc.frequencies):8d} symbols: counts {t_new * 1e3:8.2f} ms, '
+              f'probabilities {t_old * 1e3:8.2f} ms, x{t_old / t_new:.1f}')
+
+    running = CountEntropy()
+    _, t_add = _timed(lambda: [running.add(ch) for ch in text])
+    assert abs(running.entropy() - entropy_from_counts(Counter(text).values())) < 1e-9
+    print(f'  incremental: {len(text)} updates in {t_add:.2f} s ({t_add / len(text) * 1e9:.0f} ns each)')
+
+
+BENCHMARKS = {
+    'encode': bench_encode,
+    'decode': bench_decode,
+    'count': bench_count,
+    'blocks': bench_blocks,
+    'fano': bench_fano,
+    'huffman': bench_huffman,
+    'bytes': bench_bytes,
+    'tokens': bench_tokens,
+    'cache': bench_cache,
+    'entropy': bench_entropy,
+}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='lab2 benchmarks')
+    parser.add_argument('which', nargs='*', help=f"benchmarks to run: {', '.join(BENCHMARKS)} (default: all)")
+    parser.add_argument('--size', type=int, default=8 * 10**6, help='corpus size in characters')
+    parser.add_argument('--file', help='use this UTF-8 file instead of a generated corpus')
+    args = parser.parse_args()
+    unknown = [name for name in args.which if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f'unknown benchmark: {", ".join(unknown)}')
+
+    if args.file:
+        with open(args.file, 'r', encoding='utf-8') as f:
+            corpus = f.read()
+    else:
+        corpus = make_corpus(args.size)
+    for name in args.which or BENCHMARKS:
+        BENCHMARKS[name](corpus)
@@ -0,0 +1,62 @@
+from typing import Optional
+
+
+class BitWriter:
+    """
+    MSB-first bit buffer that appends whole bytes to a bytearray.
+    At most 7 pending bits are kept outside the output buffer.
+    """
+
+    def __init__(self, out: Optional[bytearray] = None):
+        self.out = out if out is not None else bytearray()
+        self._acc = 0
+        self._nbits = 0
+        self.total_bits = 0
+
+    def write(self, value: int, nbits: int):
+        self._acc = (self._acc << nbits) | value
+        self._nbits += nbits
+        self.total_bits += nbits
+        self._drain()
+
+    def write_bitstring(self, bits):
+        """Append a '0'/'1' str or ASCII bytes, converted in one step by int(bits, 2)."""
+        if not bits:
+            return
+        self.write(int(bits, 2), len(bits))
+
+    def _drain(self):
+        nbytes = self._nbits >> 3
+        if nbytes:
+            rest = self._nbits & 7
+            self.out += (self._acc >> rest).to_bytes(nbytes, 'big')
+            self._acc &= (1 << rest) - 1
+            self._nbits = rest
+
+    def flush(self) -> bytearray:
+        """Pad the last byte with zero bits and return the output buffer."""
+        if self._nbits:
+            self.out.append(self._acc << (8 - self._nbits))
+            self._acc = 0
+            self._nbits = 0
+        return self.out
+
+
+def write_varint(out: bytearray, value: int):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def read_varint(data, pos: int):
+    """Return (value, new_pos) for the LEB128 varint starting at data[pos]."""
+    value = 0
+    shift = 0
+    while True:
+        b = data[pos]
+        pos += 1
+        value |= (b & 0x7F) << shift
+        if b < 0x80:
+            return value, pos
+        shift += 7
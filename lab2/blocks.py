@@ -0,0 +1,109 @@
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import List, NamedTuple, Optional
+
+from bitio import read_varint, write_varint
+from codec import decode_packed, encode_packed
+from compression import TextCompression
+
+# Block container layout:
+#   BLOCK_MAGIC | varint block count |
+#   per block: varint text length, varint stream size |
+#   the blocks, each a complete encode_packed stream with its own code table
+BLOCK_MAGIC = b'HB'
+BLOCK_SIZE = 1 << 20
+
+
+class Block(NamedTuple):
+    text_length: int
+    offset: int
+    size: int
+
+
+def _pool_map(fn, workers: Optional[int], count: int, *iterables) -> list:
+    """map() over a process pool, or in this process for one worker or one item."""
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or count <= 1:
+        return list(map(fn, *iterables))
+    with ProcessPoolExecutor(max_workers=min(workers, count)) as pool:
+        return list(pool.map(fn, *iterables))
+
+
+def compress_block(text: str, code: str = 'huffman', max_length: Optional[int] = None) -> bytes:
+    """Encode one block with a code built from the block's own frequencies."""
+    tc = TextCompression()
+    tc.max_code_length = max_length
+    tc.set_frequencies(Counter(text))
+    if code == 'fano':
+        tc.generate_shannon_fano_codes()
+        codes_map = tc.fano_codes_map
+    else:
+        tc.generate_huffman_codes()
+        codes_map = tc.huffman_codes_map
+    return encode_packed(text, codes_map)
+
+
+def compress_blocks(text: str, block_size: int = BLOCK_SIZE, code: str = 'huffman',
+                    workers: Optional[int] = None, max_length: Optional[int] = None) -> bytes:
+    """
+    Split text into blocks of block_size characters and code them
+    independently in a process pool (workers=1 codes in this process).
+    """
+    if block_size <= 0:
+        raise ValueError('Block size must be positive')
+    pieces = [text[start:start + block_size] for start in range(0, len(text), block_size)]
+    streams = _pool_map(compress_block, workers, len(pieces), pieces, repeat(code), repeat(max_length))
+    out = bytearray(BLOCK_MAGIC)
+    write_varint(out, len(streams))
+    for piece, stream in zip(pieces, streams):
+        write_varint(out, len(piece))
+        write_varint(out, len(stream))
+    for stream in streams:
+        out += stream
+    return bytes(out)
+
+
+def is_block_stream(data) -> bool:
+    return bytes(data[:len(BLOCK_MAGIC)]) == BLOCK_MAGIC
+
+
+def read_index(data) -> List[Block]:
+    """Return the block index with absolute stream offsets."""
+    if not is_block_stream(data):
+        raise ValueError('Not a block container')
+    count, pos = read_varint(data, len(BLOCK_MAGIC))
+    entries = []
+    for _ in range(count):
+        text_length, pos = read_varint(data, pos)
+        size, pos = read_varint(data, pos)
+        entries.append((text_length, size))
+    blocks = []
+    for text_length, size in entries:
+        blocks.append(Block(text_length, pos, size))
+        pos += size
+    if pos > len(data):
+        raise ValueError('Block container is truncated')
+    return blocks
+
+
+def decompress_block(data, index: int, blocks: Optional[List[Block]] = None) -> str:
+    """Decode a single block without touching the others."""
+    blocks = blocks if blocks is not None else read_index(data)
+    block = blocks[index]
+    text = decode_packed(memoryview(data)[block.offset:block.offset + block.size])
+    if len(text) != block.text_length:
+        raise ValueError(f'Block {index} does not match the index')
+    return text
+
+
+def decompress_blocks(data, workers: Optional[int] = None) -> str:
+    """Decode every block of a container, in a process pool for several blocks."""
+    blocks = read_index(data)
+    streams = [bytes(data[b.offset:b.offset + b.size]) for b in blocks]
+    pieces = _pool_map(decode_packed, workers, len(streams), streams)
+    for i, (piece, block) in enumerate(zip(pieces, blocks)):
+        if len(piece) != block.text_length:
+            raise ValueError(f'Block {i} does not match the index')
+    return ''.join(pieces)
@@ -0,0 +1,103 @@
+import codecs
+from collections import Counter
+from typing import List, Optional
+
+from bitio import BitWriter, read_varint, write_varint
+from codec import CHUNK_SIZE, TableDecoder, canonical_codes
+from compression import HuffmanTree, package_merge_lengths
+
+# Byte-alphabet stream layout:
+#   BYTE_MAGIC | varint data length | varint used byte count |
+#   per used byte (ascending): 1 byte value, 1 byte code length |
+#   canonical code bits, MSB first, zero-padded to a whole byte
+BYTE_MAGIC = b'HY'
+
+
+def byte_frequencies(data) -> List[int]:
+    """
+    256-entry count table. Small byte sets take one bytes.count pass per value
+    that occurs; wide ones (binary data) a single Counter pass.
+    """
+    data = bytes(data)
+    freqs = [0] * 256
+    present = set(data)
+    if len(present) <= 64:
+        for b in present:
+            freqs[b] = data.count(b)
+    else:
+        for b, n in Counter(data).items():
+            freqs[b] = n
+    return freqs
+
+
+def byte_code_lengths(freqs: List[int], max_length: Optional[int] = None) -> List[int]:
+    """256-entry Huffman code length table (0 for absent bytes)."""
+    used = [b for b in range(256) if freqs[b]]
+    lengths = [0] * 256
+    if len(used) == 1:
+        lengths[used[0]] = 1
+        return lengths
+    if not used:
+        return lengths
+    tree = HuffmanTree([freqs[b] for b in used])
+    depths = tree.depths()
+    if max_length and max(depths) > max_length:
+        depths = package_merge_lengths(tree.freq[:len(used)], max_length)
+    for leaf, depth in enumerate(depths):
+        lengths[used[tree.order[leaf]]] = depth
+    return lengths
+
+
+def byte_codes(lengths: List[int]) -> List[str]:
+    """256-entry canonical code table, '' for absent bytes."""
+    codes = canonical_codes({chr(b): n for b, n in enumerate(lengths) if n})
+    return [codes.get(chr(b), '') for b in range(256)]
+
+
+def encode_bytes(data, max_length: Optional[int] = None, chunk_size: int = CHUNK_SIZE) -> bytes:
+    """
+    Huffman-code raw bytes with no text decoding. Each chunk is viewed as
+    latin-1 (a one-to-one widening of byte b to code point b) so that
+    codecs.charmap_encode can expand it to code bits in C.
+    """
+    data = memoryview(data).cast('B')
+    freqs = byte_frequencies(data)
+    lengths = byte_code_lengths(freqs, max_length)
+    if any(n > 255 for n in lengths):
+        raise ValueError('Code lengths above 255 bits cannot be stored in the header')
+    out = bytearray(BYTE_MAGIC)
+    write_varint(out, len(data))
+    used = [b for b in range(256) if lengths[b]]
+    write_varint(out, len(used))
+    for b in used:
+        out.append(b)
+        out.append(lengths[b])
+    codes = byte_codes(lengths)
+    table = [code.encode('ascii') if code else None for code in codes]
+    writer = BitWriter(out)
+    for start in range(0, len(data), chunk_size):
+        chunk = codecs.latin_1_decode(data[start:start + chunk_size])[0]
+        writer.write_bitstring(codecs.charmap_encode(chunk, 'strict', table)[0])
+    writer.flush()
+    return bytes(out)
+
+
+def decode_bytes(data) -> bytes:
+    """Decode a stream produced by encode_bytes."""
+    if bytes(data[:len(BYTE_MAGIC)]) != BYTE_MAGIC:
+        raise ValueError('Not a byte-alphabet Huffman stream')
+    length, pos = read_varint(data, len(BYTE_MAGIC))
+    count, pos = read_varint(data, pos)
+    lengths = [0] * 256
+    for _ in range(count):
+        lengths[data[pos]] = data[pos + 1]
+        pos += 2
+    if length == 0:
+        return b''
+    codes = byte_codes(lengths)
+    decoder = TableDecoder({chr(b): code for b, code in enumerate(codes) if code})
+    pieces, _ = decoder.decode_bytes(memoryview(data)[pos:])
+    out = ''.join(pieces).encode('latin-1')
+    if len(out) < length:
+        raise ValueError('Byte stream is truncated or corrupt')
+    return out[:length]
@@ -0,0 +1,406 @@
+"""
+Headless command line for lab2: no tkinter import, data on stdout,
+statistics as JSON on stderr (analyze prints its JSON on stdout).
+
+    python cli.py compress   [-c huffman|fano] [-L max_length] [--bytes | -t tokens | --dict path]
+                             [-b block_size] [-j workers] [--cache path] [input] [-o output]
+    python cli.py decompress [-j workers] [--dict path] [input] [-o output]
+    python cli.py analyze    [-L max_length] [-j workers] [-k order] [--bytes | -t tokens] [--cache path] [input]
+    python cli.py train-dict [-L max_length] corpus... -o dictionary
+
+input/output default to stdin/stdout ('-').
+"""
+import argparse
+import json
+import math
+import os
+import sys
+import time
+from typing import Dict, Optional
+
+from blocks import compress_blocks, decompress_blocks, is_block_stream, read_index
+from bytecodec import BYTE_MAGIC, byte_code_lengths, byte_frequencies, decode_bytes, encode_bytes
+from codec import decode_packed, encode_packed
+from codecache import CodeTableCache
+from compression import TextCompression
+from dictionary import DICT_MAGIC, StaticDictionary, decode_with_dictionary, encode_with_dictionary
+from tokens import BPE_MERGES, MODES, TOKEN_MAGIC, decode_tokens, encode_tokens, tokenize
+
+
+def read_input(path: str) -> bytes:
+    if path == '-':
+        return sys.stdin.buffer.read()
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def write_output(path: str, data: bytes):
+    if path == '-':
+        sys.stdout.buffer.write(data)
+        sys.stdout.buffer.flush()
+        return
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+def report(stats: Dict, stream=None):
+    print(json.dumps(stats, ensure_ascii=False), file=stream or sys.stderr)
+
+
+def _throughput(nbytes: int, seconds: float) -> float:
+    return round(nbytes / 1e6 / seconds, 3) if seconds > 0 else None
+
+
+def open_cache(args) -> Optional[CodeTableCache]:
+    return CodeTableCache(path=args.cache) if args.cache else None
+
+
+def close_cache(cache: Optional[CodeTableCache], stats: Dict):
+    # persist the cache and report how many code tables were reused
+    if cache is not None:
+        cache.save()
+        stats['cache'] = cache.stats()
+
+
+def analyze_text(text: str, max_length: Optional[int] = None,
+                 cache: Optional[CodeTableCache] = None) -> Dict:
+    tc = TextCompression()
+    tc.max_code_length = max_length
+    tc.code_cache = cache
+    tc.calculate_frequencies(text)
+    return code_statistics(tc)
+
+
+def code_statistics(tc: TextCompression) -> Dict:
+    tc.generate_shannon_fano_codes()
+    tc.generate_huffman_codes()
+    entropy = tc.calculate_entropy()
+    stats = {'length': sum(tc.frequencies.values()), 'symbols': len(tc.frequencies), 'entropy': entropy}
+    for name, codes_map in (('fano', tc.fano_codes_map), ('huffman', tc.huffman_codes_map)):
+        avg = tc.calculate_average_length(codes_map)
+        stats[name] = {'avg_length': avg, 'redundancy': tc.calculate_redundancy(avg, entropy)}
+    if tc.max_code_length:
+        stats['huffman'].update({'max_length': tc.max_code_length,
+                                 'length_penalty': tc.huffman_length_penalty})
+    return stats
+
+
+def cmd_compress(args):
+    if args.bytes:
+        return compress_as_bytes(args)
+    if args.tokens != 'chars':
+        return compress_tokens(args)
+    if args.dict:
+        return compress_with_dictionary(args)
+    if args.block_size:
+        return compress_in_blocks(args)
+    data = read_input(args.input)
+    t0 = time.perf_counter()
+    text = data.decode('utf-8')
+    cache = open_cache(args)
+    tc = TextCompression()
+    tc.max_code_length = args.max_length
+    tc.code_cache = cache
+    tc.calculate_frequencies(text)
+    if args.code == 'fano':
+        tc.generate_shannon_fano_codes()
+        codes_map = tc.fano_codes_map
+    else:
+        tc.generate_huffman_codes()
+        codes_map = tc.huffman_codes_map
+    packed = encode_packed(text, codes_map)
+    seconds = time.perf_counter() - t0
+    write_output(args.output, packed)
+    entropy = tc.calculate_entropy()
+    avg = tc.calculate_average_length(codes_map)
+    stats = {
+        'command': 'compress',
+        'code': args.code,
+        'input_bytes': len(data),
+        'output_bytes': len(packed),
+        'ratio': len(data) / len(packed) if packed else None,
+        'seconds': seconds,
+        'mb_per_s': _throughput(len(data), seconds),
+        'entropy': entropy,
+        'avg_length': avg,
+        'redundancy': tc.calculate_redundancy(avg, entropy),
+    }
+    if args.code == 'huffman' and args.max_length:
+        stats.update({'max_length': args.max_length, 'length_penalty': tc.huffman_length_penalty})
+    close_cache(cache, stats)
+    report(stats)
+
+
+def compress_with_dictionary(args):
+    # the code comes from a shared dictionary; the stream stores only its ID
+    if args.code != 'huffman' or args.block_size or args.cache:
+        raise ValueError('--dict supports only the Huffman code without blocks or --cache')
+    dictionary = StaticDictionary.load(args.dict)
+    data = read_input(args.input)
+    t0 = time.perf_counter()
+    text = data.decode('utf-8')
+    packed = encode_with_dictionary(text, dictionary)
+    seconds = time.perf_counter() - t0
+    write_output(args.output, packed)
+    report({
+        'command': 'compress',
+        'code': 'huffman',
+        'dictionary': dictionary.id.hex(),
+        'escaped_symbols': len(set(text) - dictionary.codes.keys()),
+        'input_bytes': len(data),
+        'output_bytes': len(packed),
+        'ratio': len(data) / len(packed) if packed else None,
+        'seconds': seconds,
+        'mb_per_s': _throughput(len(data), seconds),
+        'bits_per_char': 8 * len(packed) / len(text) if text else 0.0,
+    })
+
+
+def compress_in_blocks(args):
+    data = read_input(args.input)
+    t0 = time.perf_counter()
+    text = data.decode('utf-8')
+    packed = compress_blocks(text, args.block_size, args.code, args.workers, args.max_length)
+    seconds = time.perf_counter() - t0
+    write_output(args.output, packed)
+    tc = TextCompression()
+    tc.calculate_frequencies(text)
+    entropy = tc.calculate_entropy()
+    report({
+        'command': 'compress',
+        'code': args.code,
+        'block_size': args.block_size,
+        'blocks': len(read_index(packed)),
+        'input_bytes': len(data),
+        'output_bytes': len(packed),
+        'ratio': len(data) / len(packed) if packed else None,
+        'seconds': seconds,
+        'mb_per_s': _throughput(len(data), seconds),
+        'entropy': entropy,
+        'bits_per_symbol': 8 * len(packed) / len(text) if text else 0.0,
+    })
+
+
+def byte_statistics(data, max_length: Optional[int] = None) -> Dict:
+    freqs = byte_frequencies(data)
+    lengths = byte_code_lengths(freqs, max_length)
+    n = len(data)
+    entropy = -sum(f / n * math.log2(f / n) for f in freqs if f) if n else 0.0
+    avg = sum(f * l for f, l in zip(freqs, lengths)) / n if n else 0.0
+    return {'length': n, 'symbols': sum(1 for f in freqs if f), 'entropy': entropy,
+            'huffman': {'avg_length': avg, 'redundancy': (avg - entropy) / avg if avg else 0.0}}
+
+
+def compress_as_bytes(args):
+    # any file: the symbols are the 256 byte values, no UTF-8 decoding
+    if args.code != 'huffman' or args.block_size or args.cache:
+        raise ValueError('--bytes supports only the Huffman code without blocks or --cache')
+    data = read_input(args.input)
+    t0 = time.perf_counter()
+    packed = encode_bytes(data, args.max_length)
+    seconds = time.perf_counter() - t0
+    write_output(args.output, packed)
+    stats = {
+        'command': 'compress',
+        'code': 'huffman',
+        'alphabet': 'bytes',
+        'input_bytes': len(data),
+        'output_bytes': len(packed),
+        'ratio': len(data) / len(packed) if packed else None,
+        'seconds': seconds,
+        'mb_per_s': _throughput(len(data), seconds),
+    }
+    stats.update(byte_statistics(data, args.max_length))
+    report(stats)
+
+
+def token_statistics(text: str, args) -> Dict:
+    table, ids = tokenize(text, args.tokens, args.ngram, args.merges)
+    tc = TextCompression()
+    tc.max_code_length = args.max_length
+    tc.calculate_frequencies(ids)
+    stats = code_statistics(tc)
+    table_bytes = bytearray()
+    table.write(table_bytes)
+    stats.update({'tokens': args.tokens, 'characters': len(text), 'table_bytes': len(table_bytes),
+                  'bits_per_char': stats['huffman']['avg_length'] * len(ids) / len(text) if text else 0.0})
+    return stats
+
+
+def compress_tokens(args):
+    if args.code != 'huffman' or args.block_size or args.cache:
+        raise ValueError('--tokens supports only the Huffman code without blocks or --cache')
+    data = read_input(args.input)
+    t0 = time.perf_counter()
+    text = data.decode('utf-8')
+    packed = encode_tokens(text, args.tokens, args.ngram, args.merges, args.max_length)
+    seconds = time.perf_counter() - t0
+    write_output(args.output, packed)
+    report({
+        'command': 'compress',
+        'code': 'huffman',
+        'tokens': args.tokens,
+        'input_bytes': len(data),
+        'output_bytes': len(packed),
+        'ratio': len(data) / len(packed) if packed else None,
+        'seconds': seconds,
+        'mb_per_s': _throughput(len(data), seconds),
+        'bits_per_char': 8 * len(packed) / len(text) if text else 0.0,
+    })
+
+
+def cmd_decompress(args):
+    data = read_input(args.input)
+    t0 = time.perf_counter()
+    if data.startswith(DICT_MAGIC):
+        if not args.dict:
+            raise ValueError('stream was coded with a static dictionary: pass it with --dict')
+        out = decode_with_dictionary(data, StaticDictionary.load(args.dict)).encode('utf-8')
+    elif data.startswith(BYTE_MAGIC):
+        out = decode_bytes(data)
+    elif data.startswith(TOKEN_MAGIC):
+        out = decode_tokens(data).encode('utf-8')
+    elif is_block_stream(data):
+        out = decompress_blocks(data, args.workers).encode('utf-8')
+    else:
+        out = decode_packed(data).encode('utf-8')
+    seconds = time.perf_counter() - t0
+    write_output(args.output, out)
+    report({
+        'command': 'decompress',
+        'input_bytes': len(data),
+        'output_bytes': len(out),
+        'seconds': seconds,
+        'mb_per_s': _throughput(len(out), seconds),
+    })
+
+
+def cmd_analyze(args):
+    if (args.bytes or args.tokens != 'chars') and (args.cache or args.order):
+        raise ValueError('--cache and --order apply only to character statistics, not to --bytes or --tokens')
+    t0 = time.perf_counter()
+    cache = open_cache(args)
+    if args.bytes:
+        data = read_input(args.input)
+        nbytes = len(data)
+        stats = byte_statistics(data, args.max_length)
+    elif args.tokens != 'chars':
+        data = read_input(args.input)
+        nbytes = len(data)
+        stats = token_statistics(data.decode('utf-8'), args)
+    elif args.input == '-':
+        data = read_input(args.input)
+        nbytes = len(data)
+        stats = analyze_text(data.decode('utf-8'), args.max_length, cache)
+    else:
+        # files are counted in parallel chunks straight from a memory map
+        nbytes = os.path.getsize(args.input)
+        tc = TextCompression()
+        tc.max_code_length = args.max_length
+        tc.code_cache = cache
+        tc.calculate_file_frequencies(args.input, args.workers)
+        stats = code_statistics(tc)
+    if args.order:
+        text = read_input(args.input).decode('utf-8') if args.input != '-' else data.decode('utf-8')
+        stats['conditional_entropy'] = {k: TextCompression.calculate_conditional_entropy(text, k)
+                                        for k in range(1, args.order + 1)}
+    seconds = time.perf_counter() - t0
+    stats.update({'command': 'analyze', 'input_bytes': nbytes, 'seconds': seconds,
+                  'mb_per_s': _throughput(nbytes, seconds)})
+    close_cache(cache, stats)
+    report(stats, sys.stdout)
+
+
+def cmd_train_dict(args):
+    t0 = time.perf_counter()
+    texts = [read_input(path).decode('utf-8') for path in args.corpus]
+    dictionary = StaticDictionary.train(texts, args.max_length)
+    dictionary.save(args.output)
+    report({
+        'command': 'train-dict',
+        'dictionary': dictionary.id.hex(),
+        'symbols': len(dictionary.lengths) - 1,
+        'corpus_chars': sum(map(len, texts)),
+        'seconds': time.perf_counter() - t0,
+    })
+
+
+def add_cache_argument(p: argparse.ArgumentParser):
+    p.add_argument('--cache', default=None,
+                   help='JSON file with code tables reused for similar frequency distributions')
+
+
+def add_token_arguments(p: argparse.ArgumentParser, group):
+    group.add_argument('-t', '--tokens', choices=MODES, default='chars',
+                   help='symbols: characters, words, fixed n-grams or learned BPE tokens')
+    p.add_argument('-n', '--ngram', type=int, default=2, help='n-gram length for --tokens ngrams')
+    p.add_argument('--merges', type=int, default=BPE_MERGES, help='merges to learn for --tokens bpe')
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description='Shannon-Fano / Huffman compression without a GUI')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('compress', help='encode UTF-8 text into a packed canonical-code stream')
+    p.add_argument('input', nargs='?', default='-')
+    p.add_argument('-o', '--output', default='-')
+    p.add_argument('-c', '--code', choices=('huffman', 'fano'), default='huffman')
+    p.add_argument('-b', '--block-size', type=int, default=0,
+                   help='code independent blocks of this many characters, each with its own table')
+    p.add_argument('-j', '--workers', type=int, default=None,
+                   help='processes for block mode (default: all cores)')
+    p.add_argument('-L', '--max-length', type=int, default=None,
+                   help='limit Huffman code lengths to this many bits (package-merge)')
+    # one alphabet per stream: the flags would otherwise silently override each other
+    alphabet = p.add_mutually_exclusive_group()
+    alphabet.add_argument('--bytes', action='store_true',
+                          help='code the 256 byte values of any file instead of UTF-8 characters')
+    add_token_arguments(p, alphabet)
+    alphabet.add_argument('--dict', default=None,
+                          help='code with a shared dictionary from train-dict; the output stores only its ID')
+    add_cache_argument(p)
+    p.set_defaults(func=cmd_compress)
+
+    p = sub.add_parser('decompress', help='decode a packed stream or block container back to UTF-8 text')
+    p.add_argument('input', nargs='?', default='-')
+    p.add_argument('-o', '--output', default='-')
+    p.add_argument('-j', '--workers', type=int, default=None,
+                   help='processes for decoding a block container (default: all cores)')
+    p.add_argument('--dict', default=None, help='dictionary the stream was coded with')
+    p.set_defaults(func=cmd_decompress)
+
+    p = sub.add_parser('analyze', help='entropy, average code lengths and redundancy as JSON')
+    p.add_argument('input', nargs='?', default='-')
+    p.add_argument('-j', '--workers', type=int, default=None,
+                   help='processes for counting a file (default: all cores)')
+    p.add_argument('-k', '--order', type=int, default=0,
+                   help='also report H(X | previous k symbols) for k = 1..order')
+    alphabet = p.add_mutually_exclusive_group()
+    alphabet.add_argument('--bytes', action='store_true', help='statistics over byte values instead of characters')
+    add_token_arguments(p, alphabet)
+    p.add_argument('-L', '--max-length', type=int, default=None,
+                   help='limit Huffman code lengths to this many bits (package-merge)')
+    add_cache_argument(p)
+    p.set_defaults(func=cmd_analyze)
+
+    p = sub.add_parser('train-dict', help='train a static Huffman dictionary on a corpus')
+    p.add_argument('corpus', nargs='+')
+    p.add_argument('-o', '--output', required=True)
+    p.add_argument('-L', '--max-length', type=int, default=None,
+                   help='limit the dictionary code lengths to this many bits (package-merge)')
+    p.set_defaults(func=cmd_train_dict)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        args.func(args)
+    except (OSError, UnicodeDecodeError, ValueError) as e:
+        print(f'error: {e}', file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
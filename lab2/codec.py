@@ -0,0 +1,462 @@
+import bisect
+import codecs
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+from bitio import BitWriter, write_varint, read_varint
+
+# Packed stream layout:
+#   MAGIC | varint text length | varint symbol count |
+#   per symbol (sorted by code point): varint code point delta, 1 byte code length |
+#   canonical code bits, MSB first, zero-padded to a whole byte
+MAGIC = b'HC'
+CHUNK_SIZE = 1 << 16
+
+
+def code_lengths(codes_map: Dict[str, str]) -> Dict[str, int]:
+    return {sym: len(code) for sym, code in codes_map.items()}
+
+
+def canonical_codes(lengths: Dict[str, int]) -> Dict[str, str]:
+    """
+    Assign canonical prefix codes: symbols ordered by (length, symbol) get
+    consecutive code values, so the lengths alone determine every code.
+    """
+    codes: Dict[str, str] = {}
+    by_length: Dict[int, List[str]] = {}
+    for sym, length in lengths.items():
+        by_length.setdefault(length, []).append(sym)
+    code = 0
+    prev_len = 0
+    for length in sorted(by_length):
+        code <<= length - prev_len
+        spec = f'0{length}b'
+        for sym in sorted(by_length[length]):
+            codes[sym] = format(code, spec)
+            code += 1
+        prev_len = length
+    return codes
+
+
+def write_header(out: bytearray, lengths: Dict[str, int], text_length: int):
+    out += MAGIC
+    write_varint(out, text_length)
+    write_varint(out, len(lengths))
+    prev = 0
+    for sym in sorted(lengths):
+        cp = ord(sym)
+        write_varint(out, cp - prev)
+        out.append(lengths[sym])
+        prev = cp
+
+
+def read_header(data, pos: int = 0) -> Tuple[Dict[str, int], int, int]:
+    """Return (code lengths, text length, offset of the first payload byte)."""
+    if bytes(data[pos:pos + len(MAGIC)]) != MAGIC:
+        raise ValueError('Not a packed Huffman stream')
+    pos += len(MAGIC)
+    text_length, pos = read_varint(data, pos)
+    count, pos = read_varint(data, pos)
+    lengths: Dict[str, int] = {}
+    cp = 0
+    for _ in range(count):
+        delta, pos = read_varint(data, pos)
+        cp += delta
+        lengths[chr(cp)] = data[pos]
+        pos += 1
+    return lengths, text_length, pos
+
+
+# code points up to which bit_table is a list instead of a dict
+LIST_TABLE_LIMIT = 1 << 16
+
+
+def bit_table(codes: Dict[str, str]) -> Union[List[Optional[bytes]], Dict[int, bytes]]:
+    """
+    Charmap table: code point -> ASCII '0'/'1' bytes of the symbol's code.
+    A list indexed by code point (None for symbols without a code) when the
+    code points are small, as charmap_encode looks up a list about a third
+    faster than a dict; a dict otherwise.
+    """
+    table = {ord(sym): code.encode('ascii') for sym, code in codes.items()}
+    top = max(table, default=-1)
+    if top >= LIST_TABLE_LIMIT:
+        return table
+    dense: List[Optional[bytes]] = [None] * (top + 1)
+    for cp, bits in table.items():
+        dense[cp] = bits
+    return dense
+
+
+def pack_bits(text: str, codes_map: Dict[str, str], out: Optional[bytearray] = None,
+              chunk_size: int = CHUNK_SIZE,
+              progress: Optional[Callable[[float], None]] = None) -> Tuple[bytearray, int]:
+    """
+    Append the code bits of text (any prefix code) to out, MSB first and
+    zero-padded to a whole byte; return (out, number of code bits).
+    progress, if given, is called with the fraction of text coded after each chunk.
+
+    Each chunk is expanded to its bit string by codecs.charmap_encode (a C-level
+    table lookup per symbol) and packed with a single int(bits, 2), so only one
+    chunk's bit string exists at a time.
+    """
+    table = bit_table(codes_map)
+    writer = BitWriter(out)
+    for start in range(0, len(text), chunk_size):
+        chunk = text[start:start + chunk_size]
+        try:
+            bits, _ = codecs.charmap_encode(chunk, 'strict', table)
+        except UnicodeEncodeError:
+            missing = sorted(set(chunk) - codes_map.keys())
+            raise ValueError(f'Symbols without a code: {missing!r}') from None
+        writer.write_bitstring(bits)
+        if progress is not None:
+            progress(min(1.0, (start + chunk_size) / len(text)))
+    return writer.flush(), writer.total_bits
+
+
+class PackedBits:
+    """
+    Code bits of a text packed as by pack_bits, with (text index, bit offset)
+    checkpoints every chunk. An edit is applied by splicing: the bits of the
+    inserted symbols replace those of the removed ones, and the bits after
+    the edit are shifted as one big int instead of being coded again.
+    """
+
+    def __init__(self, codes_map: Dict[str, str], chunk_size: int = CHUNK_SIZE):
+        self.codes_map = dict(codes_map)
+        self.chunk_size = chunk_size
+        self.data = bytearray()
+        self.total_bits = 0
+        self.starts: List[int] = []
+        self.offsets: List[int] = []
+        self._table = bit_table(codes_map)
+
+    def _bits(self, text: str) -> bytes:
+        try:
+            return codecs.charmap_encode(text, 'strict', self._table)[0]
+        except UnicodeEncodeError:
+            missing = sorted(set(text) - self.codes_map.keys())
+            raise ValueError(f'Symbols without a code: {missing!r}') from None
+
+    def pack(self, text: str, progress: Optional[Callable[[float], None]] = None):
+        """Pack the whole text."""
+        writer = BitWriter()
+        self.starts, self.offsets = [], []
+        for start in range(0, len(text), self.chunk_size):
+            self.starts.append(start)
+            self.offsets.append(writer.total_bits)
+            writer.write_bitstring(self._bits(text[start:start + self.chunk_size]))
+            if progress is not None:
+                progress(min(1.0, (start + self.chunk_size) / len(text)))
+        self.total_bits = writer.total_bits
+        self.data = writer.flush()
+
+    def bit_position(self, text: str, index: int) -> int:
+        """Bit offset at which the code of text[index] starts (text is the packed text)."""
+        k = bisect.bisect_right(self.starts, index) - 1
+        if k < 0:
+            return 0
+        return self.offsets[k] + len(self._bits(text[self.starts[k]:index]))
+
+    def replace(self, old: str, new: str, start: int, removed: int, inserted: int):
+        """Apply the edit old -> new described by compression.edit_span."""
+        b0 = self.bit_position(old, start)
+        b1 = self.bit_position(old, start + removed)
+        mid = self._bits(new[start:start + inserted])
+        total = self.total_bits
+        value = int.from_bytes(self.data, 'big') >> (8 * len(self.data) - total)
+        value = ((value >> (total - b0) << len(mid) | (int(mid, 2) if mid else 0)) << (total - b1)
+                 | value & ((1 << (total - b1)) - 1))
+        self.total_bits = total = b0 + len(mid) + total - b1
+        size = (total + 7) >> 3
+        # a fresh buffer, so views of the previous data stay valid
+        self.data = bytearray((value << (8 * size - total)).to_bytes(size, 'big'))
+
+        # checkpoints before the edit stay, those inside it go, those after it shift
+        shift_index = inserted - removed
+        shift_bits = len(mid) - (b1 - b0)
+        starts, offsets = [], []
+        for i, bit in zip(self.starts, self.offsets):
+            if i <= start:
+                starts.append(i)
+                offsets.append(bit)
+            elif i >= start + removed and (not starts or starts[-1] < i + shift_index):
+                starts.append(i + shift_index)
+                offsets.append(bit + shift_bits)
+        # and one right after the edit keeps the next lookup there short
+        k = bisect.bisect_left(starts, start + inserted)
+        if k == len(starts) or starts[k] != start + inserted:
+            starts.insert(k, start + inserted)
+            offsets.insert(k, b0 + len(mid))
+        self.starts, self.offsets = starts, offsets
+
+
+def bits_at(data, start: int, count: int) -> str:
+    """'0'/'1' string of count bits of packed data starting at bit offset start."""
+    if count <= 0:
+        return ''
+    lo = start >> 3
+    hi = (start + count + 7) >> 3
+    bits = format(int.from_bytes(data[lo:hi], 'big'), f'0{8 * (hi - lo)}b')
+    offset = start - 8 * lo
+    return bits[offset:offset + count]
+
+
+def encode_packed(text: str, codes_map: Dict[str, str], chunk_size: int = CHUNK_SIZE) -> bytes:
+    """
+    Encode text with the canonical code derived from codes_map's code lengths
+    and return header + packed bits.
+    """
+    lengths = code_lengths(codes_map)
+    if any(length > 255 for length in lengths.values()):
+        raise ValueError('Code lengths above 255 bits cannot be stored in the header')
+    out = bytearray()
+    write_header(out, lengths, len(text))
+    out, _ = pack_bits(text, canonical_codes(lengths), out, chunk_size)
+    return bytes(out)
+
+
+ROOT_BITS = 12
+# bytes appended to the decoder bit buffer at a time
+LOAD_BYTES = 32
+
+
+class TableDecoder:
+    """
+    Table decoder for an arbitrary prefix code, with memory O(2**ROOT_BITS + alphabet).
+
+    The root table is indexed by the next ROOT_BITS bits of the stream and
+    holds every symbol completed within them, so one probe decodes several
+    short codes at once. A code longer than ROOT_BITS continues in a
+    second-level subtable of the internal node the root bits lead to, and so
+    on for longer codes. A subtable of w bits is only made as wide as keeps
+    at least half of its 2**w slots distinct (a symbol or a deeper subtable),
+    so the subtables together stay within a small multiple of the alphabet
+    even for sparse or very deep codes.
+    """
+
+    def __init__(self, codes_map: Dict[str, str], root_bits: int = ROOT_BITS):
+        if not codes_map:
+            raise ValueError('Empty code table')
+        self.root_bits = root_bits
+        self.children = self._build_tree(codes_map)
+        # subtables[i] = (width, entries); entry = (symbol or None, bits used, subtable or -1)
+        self.subtables: List[Tuple[int, List[Tuple[Optional[str], int, int]]]] = []
+        self._subtable_of: Dict[int, int] = {}
+        self.root_sub: List[int] = []
+        self.root = self._build_root()
+
+    @staticmethod
+    def _build_tree(codes_map: Dict[str, str]) -> List[list]:
+        # children[node] = [child for bit 0, child for bit 1];
+        # a child is an internal node id (int), a symbol (str) or None.
+        # Codes are inserted in sorted order, so each one shares the path of
+        # the previous code up to their common prefix and only the rest is new.
+        children: List[list] = [[None, None]]
+        path = [0]   # path[d] = node at depth d on the previous code
+        prev = ''
+        for sym, code in sorted(codes_map.items(), key=lambda item: item[1]):
+            if not code:
+                raise ValueError(f'Empty code for symbol {sym!r}')
+            common = 0
+            if prev:
+                width = max(len(code), len(prev))
+                diff = int(code.ljust(width, '0'), 2) ^ int(prev.ljust(width, '0'), 2)
+                common = min(width - diff.bit_length(), len(prev))
+                if common == len(prev):
+                    raise ValueError('Codes do not form a prefix code')
+            del path[common + 1:]
+            node = path[common]
+            for d in range(common, len(code) - 1):
+                child = len(children)
+                children.append([None, None])
+                children[node][code[d] == '1'] = child
+                node = child
+                path.append(node)
+            children[node][code[-1] == '1'] = sym
+            prev = code
+        return children
+
+    def _descend(self, node: int, value: int, nbits: int):
+        """Follow nbits of value (MSB first) from node: (symbol, depth) at a leaf,
+        (None, node) after nbits inside the tree, or (None, -1) off the code."""
+        for k in range(nbits):
+            child = self.children[node][(value >> (nbits - 1 - k)) & 1]
+            if child is None:
+                return None, -1
+            if isinstance(child, str):
+                return child, k + 1
+            node = child
+        return None, node
+
+    def _subtable(self, node: int) -> int:
+        """Index of the subtable decoding the codes below internal node node."""
+        index = self._subtable_of.get(node)
+        if index is not None:
+            return index
+        children = self.children
+        # widen while at least half of the 2**width outcomes stay distinct
+        width = 0
+        leaves = 0
+        frontier = [node]
+        while width < self.root_bits:
+            deeper = [child for n in frontier for child in children[n] if type(child) is int]
+            found = sum(isinstance(child, str) for n in frontier for child in children[n])
+            if width and 2 ** (width + 1) > 2 * (leaves + found + len(deeper)):
+                break
+            leaves += found
+            frontier = deeper
+            width += 1
+        index = len(self.subtables)
+        self._subtable_of[node] = index
+        entries: List[Tuple[Optional[str], int, int]] = []
+        self.subtables.append((width, entries))
+        # expand level by level: a leaf at depth d fills 2**(width - d) slots
+        slots: list = [node]
+        for depth in range(1, width + 1):
+            expanded = []
+            for item in slots:
+                if type(item) is int:
+                    for child in children[item]:
+                        expanded.append((child, depth) if isinstance(child, str) else child)
+                else:
+                    expanded.append(item)
+                    expanded.append(item)
+            slots = expanded
+        for item in slots:
+            if type(item) is int:
+                entries.append((None, width, self._subtable(item)))
+            elif item is None:
+                entries.append((None, 0, -1))
+            else:
+                entries.append((item[0], item[1], -1))
+        return index
+
+    def _build_root(self) -> List[Tuple[str, int, int]]:
+        # root[value] = (symbols completed in the bits, bits they take, subtable
+        # to continue in when not even the first code fits, else -1)
+        k = self.root_bits
+        root: List[Tuple[str, int, int]] = []
+        for value in range(1 << k):
+            out = []
+            used = 0
+            sub = -1
+            while used < k:
+                sym, reached = self._descend(0, value & ((1 << (k - used)) - 1), k - used)
+                if sym is None:
+                    if not out and reached >= 0:
+                        sub = self._subtable(reached)
+                    break
+                out.append(sym)
+                used += reached
+            root.append((''.join(out), used))
+            self.root_sub.append(sub)
+        return root
+
+    def decode_bytes(self, data, nbits: Optional[int] = None,
+                     strict: bool = False) -> Tuple[List[str], int]:
+        """
+        Decode the first nbits bits of data (all of it by default); return
+        (list of decoded pieces, number of bits consumed). Trailing bits that
+        do not complete a code are left over, or rejected when strict.
+        """
+        data = memoryview(data).cast('B')
+        if nbits is None:
+            nbits = 8 * len(data)
+        end = (nbits + 7) >> 3
+        pad = 8 * end - nbits
+        k = self.root_bits
+        mask = (1 << k) - 1
+        root = self.root
+        subtables = self.subtables
+        out: List[str] = []
+        append = out.append
+        acc = 0
+        nb = 0       # bits at the bottom of acc not consumed yet
+        p = 0        # next byte of data to load
+
+        def load():
+            # append up to LOAD_BYTES more bytes to the bit buffer
+            nonlocal acc, nb, p
+            take = min(LOAD_BYTES, end - p)
+            acc = ((acc & ((1 << nb) - 1)) << (8 * take)) | int.from_bytes(data[p:p + take], 'big')
+            p += take
+            nb += 8 * take
+            if p == end and pad:
+                acc >>= pad
+                nb -= pad
+
+        while True:
+            while nb >= k:
+                piece, used = root[(acc >> (nb - k)) & mask]
+                if not used:
+                    break
+                append(piece)
+                nb -= used
+            else:
+                if p < end:
+                    load()
+                    continue
+                break
+            sub = self.root_sub[(acc >> (nb - k)) & mask]
+            if sub < 0:
+                break  # off the code: corrupt data
+            # a code longer than the root: continue through the subtables
+            rest = nb - k
+            while sub >= 0:
+                width, entries = subtables[sub]
+                if rest < width:
+                    break
+                sym, used, sub = entries[(acc >> (rest - width)) & ((1 << width) - 1)]
+                rest -= used
+                if sym is not None:
+                    append(sym)
+                    nb = rest
+                    break
+            else:
+                break  # off the code
+            if sub >= 0:
+                # ran out of loaded bits inside the code
+                if p == end:
+                    break
+                load()
+
+        # what is left is shorter than the code that starts there: walk it bit by bit
+        loaded = 8 * p - (pad if p == end else 0)
+        node = 0
+        consumed = loaded - nb
+        for shift in range(nb - 1, -1, -1):
+            child = self.children[node][(acc >> shift) & 1]
+            if child is None:
+                break
+            if isinstance(child, str):
+                append(child)
+                node = 0
+                consumed = loaded - shift
+            else:
+                node = child
+        if strict and consumed != nbits:
+            raise ValueError('Bit string does not end on a code boundary')
+        return out, consumed
+
+    def decode_bits(self, bits: str) -> str:
+        """Decode a '0'/'1' string as produced by TextCompression.encode_text."""
+        if not bits:
+            return ''
+        pad = -len(bits) % 8
+        data = (int(bits, 2) << pad).to_bytes((len(bits) + pad) // 8, 'big')
+        pieces, _ = self.decode_bytes(data, len(bits), strict=True)
+        return ''.join(pieces)
+
+
+def decode_packed(data) -> str:
+    """Decode a stream produced by encode_packed."""
+    lengths, text_length, pos = read_header(data)
+    if text_length == 0:
+        return ''
+    decoder = TableDecoder(canonical_codes(lengths))
+    pieces, _ = decoder.decode_bytes(memoryview(data)[pos:])
+    text = ''.join(pieces)
+    if len(text) < text_length:
+        raise ValueError('Packed stream is truncated or corrupt')
+    return text[:text_length]
@@ -0,0 +1,84 @@
+import hashlib
+import json
+import os
+from collections import OrderedDict
+from typing import Dict, Optional
+
+FINGERPRINT_BITS = 6
+CACHE_SIZE = 128
+
+
+def fingerprint(frequencies: Dict[str, int], bits: int = FINGERPRINT_BITS) -> str:
+    """
+    Hex digest of the symbol set with every probability rounded to a multiple
+    of 2**-bits. Texts with the same alphabet and roughly the same
+    distribution share a fingerprint, so they can share code tables.
+    """
+    total = sum(frequencies.values())
+    scale = 1 << bits
+    half = total // 2
+    key = ';'.join(f'{ord(sym):x}:{(frequencies[sym] * scale + half) // total}' for sym in sorted(frequencies))
+    return hashlib.sha1(key.encode('ascii')).hexdigest()
+
+
+class CodeTableCache:
+    """
+    LRU cache: 'kind/fingerprint' key -> code table entry. With a path the
+    cache is loaded from and saved to a JSON file. hits/misses count lookups
+    so the size can be tuned.
+    """
+
+    def __init__(self, maxsize: int = CACHE_SIZE, path: Optional[str] = None,
+                 bits: int = FINGERPRINT_BITS):
+        self.maxsize = maxsize
+        self.path = path
+        self.bits = bits
+        self.hits = 0
+        self.misses = 0
+        self._entries: 'OrderedDict[str, Dict]' = OrderedDict()
+        if path and os.path.exists(path):
+            self.load()
+
+    def fingerprint(self, frequencies: Dict[str, int]) -> str:
+        return fingerprint(frequencies, self.bits)
+
+    def get(self, key: str) -> Optional[Dict]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key: str, entry: Dict):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {'size': len(self._entries), 'maxsize': self.maxsize, 'hits': self.hits,
+                'misses': self.misses, 'hit_rate': self.hits / lookups if lookups else 0.0}
+
+    def load(self):
+        with open(self.path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('bits') != self.bits:
+            return  # quantized differently: none of the keys can match
+        self._entries = OrderedDict(data['entries'])
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def save(self):
+        """Write the cache to its path (entries in LRU order, oldest first)."""
+        if not self.path:
+            return
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'bits': self.bits, 'entries': list(self._entries.items())}, f)
+        os.replace(tmp, self.path)
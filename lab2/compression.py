@@ -0,0 +1,443 @@
+from typing import Dict, List, Tuple, Optional
+import bisect
+import itertools
+from collections import Counter
+
+from codec import TableDecoder, canonical_codes, decode_packed, encode_packed
+from codecache import CodeTableCache
+from countentropy import entropy_from_counts, xlogx
+from counting import count_file
+
+
+class Node:
+    def __init__(self, symbol: Optional[str] = None, frequency: float = 0.0):
+        self.symbol = symbol
+        self.frequency = frequency
+        self.left: Optional["Node"] = None
+        self.right: Optional["Node"] = None
+
+    def is_leaf(self):
+        return self.left is None and self.right is None
+
+
+def shannon_fano_codes(symbols: List[str], weights: List[int]) -> Dict[str, str]:
+    """
+    Shannon-Fano codes for symbols sorted by descending weight.
+
+    Each range [lo, hi) is split after the first index where the running sum
+    is closest to half of the range total. With one prefix-sum array the split
+    is a bisect, ranges are index pairs rather than list copies and a code
+    string is built only once per symbol, so the whole build is O(n log n).
+    """
+    n = len(symbols)
+    if n == 1:
+        return {symbols[0]: '0'}
+    prefix = list(itertools.accumulate(weights, initial=0))
+    codes: Dict[str, str] = {}
+    stack = [(0, n, '')]
+    while stack:
+        lo, hi, code = stack.pop()
+        if hi - lo == 1:
+            codes[symbols[lo]] = code
+            continue
+        base = prefix[lo]
+        total = prefix[hi] - base
+        # first split j (left = [lo, j)) whose left sum reaches half of the total;
+        # the previous split wins ties, as the first minimum of |left - right| did
+        j = bisect.bisect_left(prefix, base + (total + 1) // 2, lo + 1, hi)
+        if j > lo + 1 and total - 2 * (prefix[j - 1] - base) <= 2 * (prefix[j] - base) - total:
+            j -= 1
+        stack.append((j, hi, code + '1'))
+        stack.append((lo, j, code + '0'))
+    return codes
+
+
+class HuffmanTree:
+    """
+    Huffman tree in parallel integer arrays, built by the two-queue method.
+
+    Leaves 0..n-1 are the symbols in ascending weight order (order[leaf] is
+    the index into the input weights); internal node n + k has children
+    left[k], right[k]. Merged nodes are created with non-decreasing weights,
+    so the second queue is just the tail of freq and every merge is O(1)
+    after one sort. Ties go to the leaf, then to the older node, which is the
+    order the (freq, counter) heap used to pop them in.
+    """
+
+    def __init__(self, weights: List[int]):
+        n = len(weights)
+        self.order = sorted(range(n), key=weights.__getitem__)
+        self.freq = [weights[i] for i in self.order] + [0] * (n - 1)
+        self.parent = [0] * (2 * n - 1)
+        self.left = [0] * (n - 1)
+        self.right = [0] * (n - 1)
+        freq, parent, left, right = self.freq, self.parent, self.left, self.right
+        leaf = 0      # head of the sorted leaf queue
+        merged = n    # head of the merged-node queue, which ends just before k
+        for k in range(n, 2 * n - 1):
+            if leaf < n and (merged == k or freq[leaf] <= freq[merged]):
+                a = leaf
+                leaf += 1
+            else:
+                a = merged
+                merged += 1
+            if leaf < n and (merged == k or freq[leaf] <= freq[merged]):
+                b = leaf
+                leaf += 1
+            else:
+                b = merged
+                merged += 1
+            freq[k] = freq[a] + freq[b]
+            parent[a] = parent[b] = k
+            left[k - n] = a
+            right[k - n] = b
+
+    def depths(self) -> List[int]:
+        """Code length of every leaf, from parents to children without recursion."""
+        n = len(self.order)
+        parent = self.parent
+        depth = [0] * (2 * n - 1)
+        for node in range(2 * n - 3, -1, -1):
+            depth[node] = depth[parent[node]] + 1
+        return depth[:n]
+
+
+def package_merge_lengths(weights: List[int], max_length: int) -> List[int]:
+    """
+    Optimal code lengths no longer than max_length for weights sorted ascending
+    (package-merge, O(n * max_length)).
+
+    Each level is the sorted merge of the leaves with the pairwise packages of
+    the level below; the code length of a leaf is the number of levels whose
+    selected prefix contains it. Only which items are packages is kept, and a
+    leaf sorts before a package of equal weight. Items are packed into one int
+    (weight * 2 + is_package) so every merge is a single sorted() call.
+    """
+    n = len(weights)
+    if n > 1 << max_length:
+        raise ValueError(f'{n} symbols do not fit in codes of at most {max_length} bits')
+    if n == 1:
+        return [1]
+    keep = 2 * n - 2
+    leaves = [w << 1 for w in weights]
+    levels: List[bytearray] = []
+    prev: List[int] = []
+    for _ in range(max_length):
+        packages = [((prev[i] >> 1) + (prev[i + 1] >> 1)) << 1 | 1 for i in range(0, len(prev) - 1, 2)]
+        prev = sorted(leaves + packages)[:keep]
+        levels.append(bytearray(item & 1 for item in prev))
+
+    # walk from the top level down: count selected leaves, pass 2 * packages on
+    selected = [0] * (n + 1)
+    count = keep
+    for flags in reversed(levels):
+        packages = flags.count(1, 0, count)
+        selected[count - packages] += 1
+        count = 2 * packages
+    lengths = [0] * n
+    depth = 0
+    for i in range(n - 1, -1, -1):
+        depth += selected[i + 1]
+        lengths[i] = depth
+    return lengths
+
+
+EDIT_PROBE = 1 << 16
+
+
+def _common_run(a: str, b: str, n: int, suffix: bool) -> int:
+    # length of the common prefix (or suffix) within the first n symbols:
+    # whole probes are compared by slice equality (memcmp in C), and only
+    # the first differing probe is bisected
+    def same(lo: int, hi: int) -> bool:
+        if suffix:
+            return a[len(a) - hi:len(a) - lo] == b[len(b) - hi:len(b) - lo]
+        return a[lo:hi] == b[lo:hi]
+
+    lo = 0
+    while lo < n and same(lo, min(lo + EDIT_PROBE, n)):
+        lo += EDIT_PROBE
+    if lo >= n:
+        return n
+    hi = min(lo + EDIT_PROBE, n)
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if same(lo, mid):
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+def edit_span(old: str, new: str) -> Tuple[int, int, int]:
+    """
+    Smallest single edit turning old into new: (start, removed length,
+    inserted length), i.e. old[start:start + removed] was replaced by
+    new[start:start + inserted]. Found from the common prefix and suffix.
+    """
+    start = _common_run(old, new, min(len(old), len(new)), False)
+    end = _common_run(old, new, min(len(old), len(new)) - start, True)
+    return start, len(old) - start - end, len(new) - start - end
+
+
+class ContextCounts:
+    """
+    (order+1)-gram counts of a text for H(X | previous order symbols), kept
+    up to date under edits. The sums of c*log2(c) over grams and over their
+    contexts are maintained with the counts, so the entropy after an edit
+    costs only the grams the edit touches.
+    """
+
+    def __init__(self, text: str, order: int):
+        self.order = order
+        self.n = 0
+        self.grams: Counter = Counter()
+        self.contexts: Counter = Counter()
+        self._gram_sum = 0.0
+        self._context_sum = 0.0
+        self._add(text, 1)
+
+    def _add(self, window: str, sign: int):
+        k = self.order
+        grams = Counter(window) if k == 0 else Counter(window[i:i + k + 1] for i in range(len(window) - k))
+        contexts: Counter = Counter()
+        for gram, c in grams.items():
+            self._gram_sum += self._shift(self.grams, gram, sign * c)
+            contexts[gram[:k]] += c
+        for context, c in contexts.items():
+            self._context_sum += self._shift(self.contexts, context, sign * c)
+        self.n += sign * sum(contexts.values())
+
+    @staticmethod
+    def _shift(counts: Counter, key: str, delta: int) -> float:
+        # change the count and return the change of its c*log2(c) term
+        old = counts[key]
+        new = old + delta
+        if new:
+            counts[key] = new
+        else:
+            del counts[key]
+        return xlogx(new) - xlogx(old)
+
+    def update(self, old: str, new: str, start: int, removed: int, inserted: int):
+        """Apply the edit old -> new described by edit_span."""
+        k = self.order
+        lo = max(0, start - k)
+        # grams starting up to order symbols before the edit overlap it
+        self._add(old[lo:start + removed + k], -1)
+        self._add(new[lo:start + inserted + k], 1)
+
+    def entropy(self) -> float:
+        # n*H = sum over contexts C*log2(C) - sum over grams c*log2(c)
+        return max(0.0, (self._context_sum - self._gram_sum) / self.n) if self.n > 0 else 0.0
+
+
+class TextCompression:
+    def __init__(self):
+        self.frequencies: Dict[str, int] = {}
+        # nodes for sorted list of dicts: {'symbol', 'probability', 'code'}
+        self.nodes: List[Dict] = []
+        self.fano_codes_map: Dict[str, str] = {}
+        self.huffman_codes_map: Dict[str, str] = {}
+        self._huffman_tree: Optional[Tuple[List[str], HuffmanTree]] = None
+        # cap on Huffman code lengths (None = unconstrained) and the resulting
+        # average-length penalty against unconstrained Huffman, in bits/symbol
+        self.max_code_length: Optional[int] = None
+        self.huffman_length_penalty = 0.0
+        # optional table cache: distributions with the same fingerprint reuse codes
+        self.code_cache: Optional[CodeTableCache] = None
+        self._fingerprint: Optional[str] = None
+
+    def calculate_frequencies(self, text: str):
+        # Counter counts in C and keeps first-occurrence order like the old per-char loop
+        self.set_frequencies(Counter(text))
+
+    def calculate_file_frequencies(self, path: str, workers: Optional[int] = None):
+        """Count a UTF-8 file in parallel chunks without reading it into a str."""
+        self.set_frequencies(count_file(path, workers))
+
+    def set_frequencies(self, frequencies: Dict[str, int]):
+        self.frequencies = dict(frequencies)
+        self._fingerprint = None
+        text_length = sum(self.frequencies.values())
+        self.nodes = []
+        if text_length == 0:
+            return
+
+        for symbol, freq in self.frequencies.items():
+            self.nodes.append({
+                'symbol': symbol,
+                'probability': freq / text_length,
+                'frequency': freq,
+                'code': ''
+            })
+
+        # sort descending by probability (and by symbol for stable order)
+        self.nodes.sort(key=lambda x: (-x['probability'], x['symbol']))
+
+    def update_frequencies(self, removed: str, inserted: str):
+        """
+        Apply the count deltas of an edit that replaced removed by inserted.
+        The code tables are not touched: they were built for the old counts,
+        so generate the codes again afterwards (cheap, it is over the alphabet).
+        """
+        delta = Counter(inserted)
+        delta.subtract(removed)
+        frequencies = self.frequencies
+        for sym, d in delta.items():
+            count = frequencies.get(sym, 0) + d
+            if count < 0:
+                raise ValueError(f'Removed symbol {sym!r} was not counted')
+            if count:
+                frequencies[sym] = count
+            else:
+                frequencies.pop(sym, None)
+        self.set_frequencies(frequencies)
+
+    def _cache_key(self, kind: str) -> str:
+        # one fingerprint per distribution, shared by the Fano and Huffman lookups
+        if self._fingerprint is None:
+            self._fingerprint = self.code_cache.fingerprint(self.frequencies)
+        return f'{kind}/{self._fingerprint}'
+
+    # ---------- Shannon-Fano ----------
+    def generate_shannon_fano_codes(self):
+        self.fano_codes_map.clear()
+        if not self.nodes:
+            return
+        key = entry = None
+        if self.code_cache is not None:
+            key = self._cache_key('fano')
+            entry = self.code_cache.get(key)
+        if entry is not None:
+            codes = entry['codes']
+        else:
+            # nodes are sorted by descending probability, i.e. descending frequency
+            codes = shannon_fano_codes([n['symbol'] for n in self.nodes],
+                                       [n['frequency'] for n in self.nodes])
+            if key is not None:
+                self.code_cache.put(key, {'codes': codes})
+
+        # codes are taken in node order, so the map keeps its previous ordering
+        self.fano_codes_map.update((n['symbol'], codes[n['symbol']]) for n in self.nodes)
+        for node in self.nodes:
+            node['code'] = codes[node['symbol']]
+
+    # ---------- Huffman ----------
+    def generate_huffman_codes(self):
+        self.huffman_codes_map.clear()
+        self._huffman_tree = None
+        self.huffman_length_penalty = 0.0
+        if not self.frequencies:
+            return
+        if len(self.frequencies) == 1:
+            # single symbol -> code '0'
+            only_symbol = next(iter(self.frequencies.keys()))
+            self.huffman_codes_map[only_symbol] = '0'
+            return
+
+        key = None
+        if self.code_cache is not None:
+            key = self._cache_key(f'huffman{self.max_code_length or ""}')
+            entry = self.code_cache.get(key)
+            if entry is not None:
+                self.huffman_codes_map.update(entry['codes'])
+                self.huffman_length_penalty = entry['penalty']
+                for node in self.nodes:
+                    node['code'] = self.huffman_codes_map.get(node['symbol'], '')
+                return
+
+        symbols = list(self.frequencies)
+        tree = HuffmanTree(list(self.frequencies.values()))
+        depths = tree.depths()
+        if self.max_code_length and max(depths) > self.max_code_length:
+            n = len(symbols)
+            limited = package_merge_lengths(tree.freq[:n], self.max_code_length)
+            extra = sum(f * (new - old) for f, new, old in zip(tree.freq, limited, depths))
+            self.huffman_length_penalty = extra / sum(tree.freq[:n])
+            depths = limited
+        else:
+            self._huffman_tree = (symbols, tree)
+        lengths = {symbols[tree.order[leaf]]: depth for leaf, depth in enumerate(depths)}
+        self.huffman_codes_map.update(canonical_codes(lengths))
+        if key is not None:
+            self.code_cache.put(key, {'codes': dict(self.huffman_codes_map),
+                                      'penalty': self.huffman_length_penalty})
+
+        # update nodes list codes if present
+        for node in self.nodes:
+            node['code'] = self.huffman_codes_map.get(node['symbol'], '')
+
+    def huffman_tree(self) -> Optional[Node]:
+        """
+        Node tree of the last Huffman build, for visualization. Its leaf depths
+        are the code lengths; the codes themselves are the canonical ones.
+        None when the lengths were limited or the codes came from the cache,
+        since then no merge tree produced them.
+        """
+        if self._huffman_tree is None:
+            return None
+        symbols, tree = self._huffman_tree
+        n = len(tree.order)
+        nodes = [Node(symbol=symbols[i], frequency=tree.freq[leaf]) for leaf, i in enumerate(tree.order)]
+        for k in range(n - 1):
+            parent = Node(symbol=None, frequency=tree.freq[n + k])
+            parent.left = nodes[tree.left[k]]
+            parent.right = nodes[tree.right[k]]
+            nodes.append(parent)
+        return nodes[-1]
+
+    # ---------- Metrics ----------
+    def calculate_entropy(self) -> float:
+        # from the integer counts: log2(N) - sum c*log2(c) / N
+        return entropy_from_counts(self.frequencies.values())
+
+    @staticmethod
+    def calculate_conditional_entropy(text: str, order: int) -> float:
+        """
+        H(X | previous order symbols) in bits per symbol from (order+1)-gram
+        counts over the positions that have a full context; order 0 is the
+        usual order-0 entropy.
+        """
+        return ContextCounts(text, order).entropy()
+
+    def calculate_average_length(self, codes_map: Dict[str, str]) -> float:
+        # from the current integer counts, so it follows every edit even when the codes are kept
+        total = sum(self.frequencies.values())
+        if not total or not codes_map:
+            return 0.0
+        return sum(count * len(codes_map.get(sym, '')) for sym, count in self.frequencies.items()) / total
+
+    def calculate_redundancy(self, avg_length: float, entropy: float) -> float:
+        if avg_length == 0:
+            return 0.0
+        return (avg_length - entropy) / avg_length
+
+    def encode_text(self, text: str, codes_map: Dict[str, str]) -> str:
+        if not codes_map:
+            return ''
+        out = []
+        for ch in text:
+            c = codes_map.get(ch, '')
+            out.append(c)
+        return ''.join(out)
+
+    def encode_packed(self, text: str) -> bytes:
+        """
+        Encode text with the canonical form of the Huffman code (same code
+        lengths as huffman_codes_map) into a self-describing packed stream.
+        """
+        if not self.huffman_codes_map:
+            self.calculate_frequencies(text)
+            self.generate_huffman_codes()
+        return encode_packed(text, self.huffman_codes_map)
+
+    def decode(self, data, codes_map: Optional[Dict[str, str]] = None) -> str:
+        """
+        Decode either a '0'/'1' string from encode_text (using codes_map,
+        Huffman codes by default) or a packed stream from encode_packed.
+        """
+        if isinstance(data, str):
+            codes_map = codes_map if codes_map is not None else self.huffman_codes_map
+            return TableDecoder(codes_map).decode_bits(data)
+        return decode_packed(data)
@@ -0,0 +1,67 @@
+import math
+from array import array
+from typing import Dict, Hashable, Iterable, Optional
+
+# Entropy straight from integer counts, H = log2(N) - sum c*log2(c) / N,
+# with c*log2(c) taken from a table for small counts
+TABLE_SIZE = 1 << 16
+XLOGX = array('d', [0.0] + [c * math.log2(c) for c in range(1, TABLE_SIZE)])
+# incremental updates between recomputations of the running sum
+RESYNC = 1 << 20
+
+
+def xlogx(c: int) -> float:
+    """c*log2(c), 0 for c = 0."""
+    return XLOGX[c] if c < TABLE_SIZE else c * math.log2(c)
+
+
+def entropy_from_counts(counts: Iterable[int]) -> float:
+    """Entropy in bits of a count histogram (0 for an empty one)."""
+    counts = list(counts)
+    n = sum(counts)
+    if n <= 0:
+        return 0.0
+    try:
+        s = sum(map(XLOGX.__getitem__, counts))
+    except IndexError:  # a count past the table
+        s = sum(map(xlogx, counts))
+    return max(0.0, math.log2(n) - s / n)
+
+
+class CountEntropy:
+    """
+    Symbol counts with their entropy kept up to date: the sum of c*log2(c)
+    changes by two table lookups per count update, so add() and entropy()
+    are O(1). The sum is recomputed from the counts every RESYNC updates so
+    rounding errors do not accumulate.
+    """
+
+    def __init__(self, counts: Optional[Dict[Hashable, int]] = None):
+        self.counts: Dict[Hashable, int] = dict(counts or {})
+        self.resync()
+
+    def resync(self):
+        self.n = sum(self.counts.values())
+        self._sum = math.fsum(map(xlogx, self.counts.values()))
+        self._updates = 0
+
+    def add(self, symbol: Hashable, delta: int = 1):
+        counts = self.counts
+        old = counts.get(symbol, 0)
+        new = old + delta
+        if new < 0:
+            raise ValueError(f'Count of {symbol!r} would become negative')
+        if new:
+            counts[symbol] = new
+        else:
+            del counts[symbol]
+        self.n += delta
+        self._sum += xlogx(new) - xlogx(old)
+        self._updates += 1
+        if self._updates >= RESYNC:
+            self.resync()
+
+    def entropy(self) -> float:
+        if self.n <= 0:
+            return 0.0
+        return max(0.0, math.log2(self.n) - self._sum / self.n)
@@ -0,0 +1,68 @@
+import mmap
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import Dict, List, Optional, Tuple
+
+CHUNK_SIZE = 16 << 20
+
+
+def count_chunk(data: bytes) -> Dict[str, int]:
+    """
+    Character counts of a UTF-8 chunk in first-occurrence order.
+    Pure-ASCII chunks skip decoding: one bytes.count pass per distinct byte.
+    """
+    if data.isascii():
+        return {chr(b): data.count(b) for b in sorted(set(data), key=data.index)}
+    return Counter(data.decode('utf-8'))
+
+
+def utf8_chunks(buf, chunk_size: int = CHUNK_SIZE) -> List[Tuple[int, int]]:
+    """
+    Split buf into (start, end) ranges of about chunk_size bytes, moving each
+    boundary forward past UTF-8 continuation bytes so no character is cut.
+    """
+    size = len(buf)
+    ranges = []
+    start = 0
+    while start < size:
+        end = min(start + chunk_size, size)
+        while end < size and buf[end] & 0xC0 == 0x80:
+            end += 1
+        ranges.append((start, end))
+        start = end
+    return ranges
+
+
+def _count_range(path: str, start: int, end: int) -> Dict[str, int]:
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        return count_chunk(mm[start:end])
+
+
+def count_file(path: str, workers: Optional[int] = None, chunk_size: int = CHUNK_SIZE) -> Dict[str, int]:
+    """
+    Count the characters of a UTF-8 file without loading it whole: the file
+    is memory-mapped, split at character boundaries and the chunks are counted
+    in a process pool (workers=1 counts in this process). The merged dict keeps
+    first-occurrence order, as TextCompression.calculate_frequencies does.
+    """
+    if os.path.getsize(path) == 0:
+        return {}
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        ranges = utf8_chunks(mm, chunk_size)
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(ranges) == 1:
+        parts = (_count_range(path, start, end) for start, end in ranges)
+        return merge_counts(parts)
+    starts, ends = zip(*ranges)
+    with ProcessPoolExecutor(max_workers=min(workers, len(ranges))) as pool:
+        return merge_counts(pool.map(_count_range, repeat(path), starts, ends))
+
+
+def merge_counts(parts) -> Dict[str, int]:
+    total: Dict[str, int] = {}
+    for part in parts:
+        for sym, n in part.items():
+            total[sym] = total.get(sym, 0) + n
+    return total
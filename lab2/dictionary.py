@@ -0,0 +1,110 @@
+import hashlib
+import json
+from collections import Counter
+from typing import Dict, Iterable, List, Optional
+
+from bitio import read_varint, write_varint
+from codec import TableDecoder, canonical_codes, pack_bits
+from compression import TextCompression
+
+# Static-dictionary stream layout:
+#   DICT_MAGIC | 8 byte dictionary ID | varint text length |
+#   varint escaped symbol count | per escaped symbol (ascending): varint code point |
+#   code bits, MSB first, zero-padded to a whole byte
+# The code itself lives in a shared dictionary file, so a stream carries
+# only its ID. Symbols the dictionary lacks are coded as the escape code
+# followed by their 21-bit code point.
+DICT_MAGIC = b'HD'
+ID_SIZE = 8
+ESCAPE = ''
+ESCAPE_BITS = 21
+
+
+def dictionary_id(lengths: Dict[str, int]) -> bytes:
+    """ID of a code: a hash of its (symbol, length) pairs, which fix the canonical code."""
+    h = hashlib.sha1()
+    for sym in sorted(lengths):
+        h.update(f'{ord(sym) if sym else -1:x}:{lengths[sym]};'.encode('ascii'))
+    return h.digest()[:ID_SIZE]
+
+
+class StaticDictionary:
+    """Pre-trained canonical Huffman code shared by many streams."""
+
+    def __init__(self, lengths: Dict[str, int]):
+        if ESCAPE not in lengths:
+            raise ValueError('Dictionary has no escape code')
+        self.lengths = dict(lengths)
+        self.codes = canonical_codes(self.lengths)
+        self.id = dictionary_id(self.lengths)
+
+    @classmethod
+    def train(cls, texts: Iterable[str], max_length: Optional[int] = None) -> 'StaticDictionary':
+        """Huffman code over the training texts plus an escape of weight 1."""
+        counts = Counter()
+        for text in texts:
+            counts.update(text)
+        counts[ESCAPE] = 1
+        tc = TextCompression()
+        tc.max_code_length = max_length
+        tc.set_frequencies(counts)
+        tc.generate_huffman_codes()
+        return cls({sym: len(code) for sym, code in tc.huffman_codes_map.items()})
+
+    def extended_codes(self, escaped: List[str]) -> Dict[str, str]:
+        """Dictionary codes plus escape + code point for every symbol in escaped."""
+        codes = {sym: code for sym, code in self.codes.items() if sym != ESCAPE}
+        escape = self.codes[ESCAPE]
+        for sym in escaped:
+            codes[sym] = escape + format(ord(sym), f'0{ESCAPE_BITS}b')
+        return codes
+
+    def save(self, path: str):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'id': self.id.hex(), 'lengths': self.lengths}, f)
+
+    @classmethod
+    def load(cls, path: str) -> 'StaticDictionary':
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        dictionary = cls(data['lengths'])
+        if dictionary.id.hex() != data['id']:
+            raise ValueError(f'Dictionary {path} does not match its ID')
+        return dictionary
+
+
+def encode_with_dictionary(text: str, dictionary: StaticDictionary) -> bytes:
+    escaped = sorted(set(text) - dictionary.codes.keys())
+    out = bytearray(DICT_MAGIC)
+    out += dictionary.id
+    write_varint(out, len(text))
+    write_varint(out, len(escaped))
+    for sym in escaped:
+        write_varint(out, ord(sym))
+    out, _ = pack_bits(text, dictionary.extended_codes(escaped), out)
+    return bytes(out)
+
+
+def stream_dictionary_id(data) -> bytes:
+    if bytes(data[:len(DICT_MAGIC)]) != DICT_MAGIC:
+        raise ValueError('Not a static-dictionary stream')
+    return bytes(data[len(DICT_MAGIC):len(DICT_MAGIC) + ID_SIZE])
+
+
+def decode_with_dictionary(data, dictionary: StaticDictionary) -> str:
+    """Decode a stream produced by encode_with_dictionary with the same dictionary."""
+    if stream_dictionary_id(data) != dictionary.id:
+        raise ValueError('Stream was coded with a different dictionary')
+    length, pos = read_varint(data, len(DICT_MAGIC) + ID_SIZE)
+    count, pos = read_varint(data, pos)
+    escaped = []
+    for _ in range(count):
+        cp, pos = read_varint(data, pos)
+        escaped.append(chr(cp))
+    if length == 0:
+        return ''
+    pieces, _ = TableDecoder(dictionary.extended_codes(escaped)).decode_bytes(memoryview(data)[pos:])
+    out = ''.join(pieces)
+    if len(out) < length:
+        raise ValueError('Dictionary stream is truncated or corrupt')
+    return out[:length]
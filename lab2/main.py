@@ -1,205 +1,179 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, scrolledtext
-import math
-from typing import Dict, List, Tuple, Optional
-from copy import deepcopy
-import heapq
-import itertools
-
-
-class Node:
-    def __init__(self, symbol: Optional[str] = None, frequency: float = 0.0):
-        self.symbol = symbol
-        self.frequency = frequency
-        self.left: Optional["Node"] = None
-        self.right: Optional["Node"] = None
-
-    def is_leaf(self):
-        return self.left is None and self.right is None
-
-
-class TextCompression:
-    def __init__(self):
-        self.frequencies: Dict[str, int] = {}
-        # nodes for sorted list of dicts: {'symbol', 'probability', 'code'}
-        self.nodes: List[Dict] = []
-        self.fano_codes_map: Dict[str, str] = {}
-        self.huffman_codes_map: Dict[str, str] = {}
-
-    def calculate_frequencies(self, text: str):
-        self.frequencies.clear()
-        for ch in text:
-            self.frequencies[ch] = self.frequencies.get(ch, 0) + 1
-
-        text_length = len(text)
-        self.nodes = []
-        if text_length == 0:
-            return
-
-        for symbol, freq in self.frequencies.items():
-            self.nodes.append({
-                'symbol': symbol,
-                'probability': freq / text_length,
-                'frequency': freq,
-                'code': ''
-            })
-
-        # sort descending by probability (and by symbol for stable order)
-        self.nodes.sort(key=lambda x: (-x['probability'], x['symbol']))
-
-    # ---------- Shannon-Fano ----------
-    def _split_index(self, probs: List[float]) -> int:
-        """
-        Return index to split list into two parts with sums as close as possible.
-        """
-        if not probs:
-            return -1
-        total = sum(probs)
-        acc = 0.0
-        best_idx = 0
-        best_diff = float('inf')
-        for i in range(len(probs)):
-            acc += probs[i]
-            diff = abs(acc - (total - acc))
-            if diff < best_diff:
-                best_diff = diff
-                best_idx = i
-        return best_idx
-
-    def _shannon_fano_recursive(self, items: List[Tuple[str, float]], codes: Dict[str, str]):
-        """
-        items: list of (symbol, probability) sorted descending by probability
-        codes: dict to fill with binary strings
-        """
-        n = len(items)
-        if n == 0:
-            return
-        if n == 1:
-            # single item — if it has no code yet, give '0' (handled externally if needed)
-            if codes.get(items[0][0], '') == '':
-                codes[items[0][0]] = codes.get(items[0][0], '') or '0'
-            return
-
-        probs = [p for (_, p) in items]
-        split = self._split_index(probs)
-        # left: 0..split, right: split+1..end
-        left = items[:split + 1]
-        right = items[split + 1:]
-
-        for sym, _ in left:
-            codes[sym] = codes.get(sym, '') + '0'
-        for sym, _ in right:
-            codes[sym] = codes.get(sym, '') + '1'
-
-        # recurse
-        self._shannon_fano_recursive(left, codes)
-        self._shannon_fano_recursive(right, codes)
-
-    def generate_shannon_fano_codes(self):
-        self.fano_codes_map.clear()
-        if not self.nodes:
-            return
-        # build items list sorted by probability desc
-        items = [(n['symbol'], n['probability']) for n in self.nodes]
-        codes: Dict[str, str] = {symbol: '' for symbol, _ in items}
-        self._shannon_fano_recursive(items, codes)
-
-        # Ensure single-symbol case gets at least '0'
-        if len(items) == 1:
-            codes[items[0][0]] = codes[items[0][0]] or '0'
-
-        # update nodes and map
-        for node in self.nodes:
-            node['code'] = codes[node['symbol']]
-            self.fano_codes_map[node['symbol']] = node['code']
-
-    # ---------- Huffman ----------
-    def generate_huffman_codes(self):
-        self.huffman_codes_map.clear()
-        if not self.frequencies:
-            return
-        if len(self.frequencies) == 1:
-            # single symbol -> code '0'
-            only_symbol = next(iter(self.frequencies.keys()))
-            self.huffman_codes_map[only_symbol] = '0'
+from tkinter import font as tkfont
+from functools import partial
+import threading
+import time
+from typing import List, NamedTuple, Optional
+
+from codec import PackedBits, bits_at
+from codecache import CodeTableCache
+from compression import ContextCounts, TextCompression, edit_span
+
+BITS_PER_LINE = 128
+# orders k of the conditional entropies H(X | previous k symbols) shown next to H(X)
+CONTEXT_ORDERS = (1, 2, 3)
+# an edit touching more than this share of the text is re-analyzed from scratch
+INCREMENTAL_SHARE = 0.5
+# live re-analysis starts after this long without further edits
+LIVE_DELAY_MS = 300
+
+
+class Analysis(NamedTuple):
+    """Last analyzed text and the state an edit of it can update in place."""
+    text: str
+    max_length: int
+    cached: bool
+    contexts: List[ContextCounts]
+    bits: List[PackedBits]
+
+
+class PagedText(ttk.Frame):
+    """
+    Read-only text view that keeps only the visible lines in the Text widget.
+    Lines are produced on demand by line_source(start, count), so the size of
+    the underlying data does not affect rendering time.
+    """
+
+    def __init__(self, master, height: int = 6, font=None):
+        super().__init__(master)
+        self.text = tk.Text(self, height=height, font=font, wrap=tk.NONE, state=tk.DISABLED)
+        self.scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self.yview)
+        self.text.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.text.bind("<Configure>", lambda e: self.render())
+        for seq in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            self.text.bind(seq, self._on_wheel)
+        self.line_count = 0
+        self.line_source = None
+        self.top = 0
+
+    def set_source(self, line_count: int, line_source):
+        self.line_count = line_count
+        self.line_source = line_source
+        self.top = 0
+        self.render()
+
+    def clear(self):
+        self.set_source(0, None)
+
+    def visible_lines(self) -> int:
+        linespace = tkfont.Font(font=self.text.cget("font")).metrics("linespace")
+        return max(1, self.text.winfo_height() // max(1, linespace))
+
+    def yview(self, *args):
+        visible = self.visible_lines()
+        if args[0] == "moveto":
+            top = int(float(args[1]) * self.line_count)
+        else:
+            step = int(args[1]) * (visible if args[2] == "pages" else 1)
+            top = self.top + step
+        self.top = max(0, min(top, self.line_count - visible))
+        self.render()
+
+    def _on_wheel(self, event):
+        up = event.num == 4 or getattr(event, "delta", 0) > 0
+        self.yview("scroll", -3 if up else 3, "units")
+        return "break"
+
+    def render(self):
+        self.text.configure(state=tk.NORMAL)
+        self.text.delete(1.0, tk.END)
+        if not self.line_count:
+            self.scrollbar.set(0.0, 1.0)
+        else:
+            count = min(self.visible_lines(), self.line_count - self.top)
+            self.text.insert(1.0, "\n".join(self.line_source(self.top, count)))
+            self.scrollbar.set(self.top / self.line_count, (self.top + count) / self.line_count)
+        self.text.configure(state=tk.DISABLED)
+
+
+class Cancelled(Exception):
+    pass
+
+
+class BackgroundRunner:
+    """
+    Runs one job at a time in a worker thread so the Tk main loop stays free.
+    The job is called as work(report); report(fraction) updates the progress
+    bar and raises Cancelled once cancel() was requested. Results are picked
+    up on the Tk thread by polling with root.after.
+    """
+
+    POLL_MS = 100
+
+    def __init__(self, root, progressbar: ttk.Progressbar, status: ttk.Label,
+                 buttons: List[ttk.Button], cancel_button: ttk.Button):
+        self.root = root
+        self.progressbar = progressbar
+        self.status = status
+        self.buttons = buttons
+        self.cancel_button = cancel_button
+        self.cancel_button.configure(command=self.cancel, state=tk.DISABLED)
+        self.thread: Optional[threading.Thread] = None
+
+    @property
+    def busy(self) -> bool:
+        return self.thread is not None
+
+    def start(self, work, on_done, units: int = 0, error_message: str = "Ошибка") -> bool:
+        if self.busy:
+            return False
+        self._cancel = threading.Event()
+        self._fraction = 0.0
+        self._result = None
+        self._units = units
+        self._t0 = time.perf_counter()
+        self._on_done = on_done
+        self._error_message = error_message
+        for button in self.buttons:
+            button.configure(state=tk.DISABLED)
+        self.cancel_button.configure(state=tk.NORMAL)
+        self.thread = threading.Thread(target=self._run, args=(work,), daemon=True)
+        self.thread.start()
+        self.root.after(self.POLL_MS, self._poll)
+        return True
+
+    def cancel(self):
+        if self.busy:
+            self._cancel.set()
+
+    def _report(self, fraction: float):
+        if self._cancel.is_set():
+            raise Cancelled()
+        self._fraction = fraction
+
+    def _run(self, work):
+        try:
+            self._result = ('ok', work(self._report))
+        except Cancelled:
+            self._result = ('cancelled', None)
+        except Exception as e:
+            self._result = ('error', e)
+
+    def _poll(self):
+        elapsed = time.perf_counter() - self._t0
+        self.progressbar['value'] = 100 * self._fraction
+        rate = self._fraction * self._units / elapsed / 1e6 if elapsed > 0 else 0.0
+        self.status.config(text=f"{100 * self._fraction:.0f}%  {rate:.2f} млн симв./с")
+        if self.thread.is_alive():
+            self.root.after(self.POLL_MS, self._poll)
             return
-
-        # build heap of (freq, count, node)
-        heap = []
-        counter = itertools.count()
-        for sym, freq in self.frequencies.items():
-            node = Node(symbol=sym, frequency=freq)
-            heapq.heappush(heap, (freq, next(counter), node))
-
-        # merge
-        while len(heap) > 1:
-            f1, _, n1 = heapq.heappop(heap)
-            f2, _, n2 = heapq.heappop(heap)
-            parent = Node(symbol=None, frequency=f1 + f2)
-            parent.left = n1
-            parent.right = n2
-            heapq.heappush(heap, (parent.frequency, next(counter), parent))
-
-        # root
-        _, _, root = heap[0]
-
-        # traverse tree to assign codes
-        codes: Dict[str, str] = {}
-
-        def _traverse(node: Node, prefix: str):
-            if node is None:
-                return
-            if node.is_leaf():
-                # leaf
-                # If prefix is empty (single-symbol case already handled), give '0'
-                codes[node.symbol] = prefix or '0'
-                return
-            _traverse(node.left, prefix + '0')
-            _traverse(node.right, prefix + '1')
-
-        _traverse(root, '')
-
-        # store
-        self.huffman_codes_map = codes
-
-        # update nodes list codes if present
-        for node in self.nodes:
-            node['code'] = self.huffman_codes_map.get(node['symbol'], '')
-
-    # ---------- Metrics ----------
-    def calculate_entropy(self) -> float:
-        if not self.nodes:
-            return 0.0
-        ent = 0.0
-        for node in self.nodes:
-            p = node['probability']
-            if p > 0:
-                ent -= p * math.log2(p)
-        return ent
-
-    def calculate_average_length(self, codes_map: Dict[str, str]) -> float:
-        if not self.nodes or not codes_map:
-            return 0.0
-        avg = 0.0
-        for node in self.nodes:
-            p = node['probability']
-            code = codes_map.get(node['symbol'], '')
-            avg += p * len(code)
-        return avg
-
-    def calculate_redundancy(self, avg_length: float, entropy: float) -> float:
-        if avg_length == 0:
-            return 0.0
-        return (avg_length - entropy) / avg_length
-
-    def encode_text(self, text: str, codes_map: Dict[str, str]) -> str:
-        if not codes_map:
-            return ''
-        out = []
-        for ch in text:
-            c = codes_map.get(ch, '')
-            out.append(c)
-        return ''.join(out)
+        self.thread = None
+        for button in self.buttons:
+            button.configure(state=tk.NORMAL)
+        self.cancel_button.configure(state=tk.DISABLED)
+        status, value = self._result
+        if status == 'ok':
+            self.progressbar['value'] = 100
+            self.status.config(text=f"Готово за {elapsed:.2f} с")
+            self._on_done(value)
+        elif status == 'cancelled':
+            self.progressbar['value'] = 0
+            self.status.config(text="Отменено")
+        else:
+            self.status.config(text="")
+            messagebox.showerror("Ошибка", f"{self._error_message}: {str(value)}")
 
 
 class TextCompressionGUI:
@@ -209,6 +183,14 @@ class TextCompressionGUI:
         self.root.geometry("1200x800")
 
         self.compressor = TextCompression()
+        # opt-in: a hit reuses tables built for a distribution that only rounds
+        # to the same fingerprint, so its codes and statistics are approximate
+        self.code_cache = CodeTableCache()
+        self._analysis: Optional[Analysis] = None
+        # Treeview rows per table: symbol -> (item id, shown values)
+        self._rows = {}
+        self._live_ready = False
+        self._live_job = None
 
         self.create_widgets()
 
@@ -224,13 +206,39 @@ class TextCompressionGUI:
 
         self.text_input = scrolledtext.ScrolledText(input_frame, height=6, font=("Consolas", 10))
         self.text_input.pack(fill=tk.BOTH, expand=True)
+        self.text_input.bind("<<Modified>>", self._on_text_modified)
 
         buttons_frame = ttk.Frame(input_frame)
         buttons_frame.pack(fill=tk.X, pady=(10, 0))
 
-        ttk.Button(buttons_frame, text="Загрузить из файла", command=self.load_file).pack(side=tk.LEFT, padx=(0, 10))
-        ttk.Button(buttons_frame, text="Анализировать", command=self.analyze_text).pack(side=tk.LEFT, padx=(0, 10))
-        ttk.Button(buttons_frame, text="Очистить", command=self.clear_all).pack(side=tk.LEFT)
+        load_button = ttk.Button(buttons_frame, text="Загрузить из файла", command=self.load_file)
+        load_button.pack(side=tk.LEFT, padx=(0, 10))
+        analyze_button = ttk.Button(buttons_frame, text="Анализировать", command=self.analyze_text)
+        analyze_button.pack(side=tk.LEFT, padx=(0, 10))
+        clear_button = ttk.Button(buttons_frame, text="Очистить", command=self.clear_all)
+        clear_button.pack(side=tk.LEFT)
+
+        ttk.Label(buttons_frame, text="Макс. длина кода Хаффмана (0 — без ограничения):").pack(side=tk.LEFT, padx=(20, 5))
+        self.max_length_var = tk.IntVar(value=0)
+        max_length_spin = ttk.Spinbox(buttons_frame, from_=0, to=64, width=4, textvariable=self.max_length_var)
+        max_length_spin.pack(side=tk.LEFT)
+
+        self.live_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(buttons_frame, text="Пересчитывать при правке",
+                        variable=self.live_var).pack(side=tk.LEFT, padx=(20, 0))
+
+        self.cache_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(buttons_frame, text="Кэш таблиц кодов (приближённо)",
+                        variable=self.cache_var).pack(side=tk.LEFT, padx=(20, 0))
+
+        cancel_button = ttk.Button(buttons_frame, text="Отмена")
+        cancel_button.pack(side=tk.RIGHT)
+        progressbar = ttk.Progressbar(buttons_frame, length=200, maximum=100)
+        progressbar.pack(side=tk.RIGHT, padx=(10, 10))
+        status_label = ttk.Label(buttons_frame, text="")
+        status_label.pack(side=tk.RIGHT)
+        self.runner = BackgroundRunner(self.root, progressbar, status_label,
+                                       [load_button, analyze_button, clear_button], cancel_button)
 
         self.notebook = ttk.Notebook(main_frame)
         self.notebook.pack(fill=tk.BOTH, expand=True)
@@ -316,6 +324,18 @@ class TextCompressionGUI:
         self.huffman_redundancy = ttk.Label(stats_grid, text="0.000")
         self.huffman_redundancy.grid(row=4, column=3, sticky=tk.W, pady=2)
 
+        ttk.Label(stats_grid, text="Потери от ограничения длины:").grid(row=5, column=0, sticky=tk.W, padx=(0, 20), pady=2)
+        self.huffman_penalty = ttk.Label(stats_grid, text="0.000")
+        self.huffman_penalty.grid(row=5, column=3, sticky=tk.W, pady=2)
+
+        ttk.Label(stats_grid, text="Условная энтропия:").grid(row=6, column=0, sticky=tk.W, padx=(0, 20), pady=2)
+        self.conditional_entropy_value = ttk.Label(stats_grid, text="")
+        self.conditional_entropy_value.grid(row=6, column=1, columnspan=3, sticky=tk.W, pady=2)
+
+        ttk.Label(stats_grid, text="Кэш таблиц кодов:").grid(row=7, column=0, sticky=tk.W, padx=(0, 20), pady=2)
+        self.cache_value = ttk.Label(stats_grid, text="")
+        self.cache_value.grid(row=7, column=1, columnspan=3, sticky=tk.W, pady=2)
+
         encoded_frame = ttk.LabelFrame(results_frame, text="Закодированный текст", padding=10)
         encoded_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=(0, 10))
 
@@ -325,13 +345,13 @@ class TextCompressionGUI:
         fano_encoded_frame = ttk.Frame(encoded_notebook)
         encoded_notebook.add(fano_encoded_frame, text="Шеннон-Фано")
 
-        self.fano_encoded_text = scrolledtext.ScrolledText(fano_encoded_frame, height=6, font=("Consolas", 9))
+        self.fano_encoded_text = PagedText(fano_encoded_frame, height=6, font=("Consolas", 9))
         self.fano_encoded_text.pack(fill=tk.BOTH, expand=True)
 
         huffman_encoded_frame = ttk.Frame(encoded_notebook)
         encoded_notebook.add(huffman_encoded_frame, text="Хаффман")
 
-        self.huffman_encoded_text = scrolledtext.ScrolledText(huffman_encoded_frame, height=6, font=("Consolas", 9))
+        self.huffman_encoded_text = PagedText(huffman_encoded_frame, height=6, font=("Consolas", 9))
         self.huffman_encoded_text.pack(fill=tk.BOTH, expand=True)
 
     def load_file(self):
@@ -351,13 +371,14 @@ class TextCompressionGUI:
 
     def clear_all(self):
         self.text_input.delete(1.0, tk.END)
+        self._live_ready = False
+        self._analysis = None
         self.clear_results()
 
     def clear_results(self):
-        for item in self.fano_tree.get_children():
-            self.fano_tree.delete(item)
-        for item in self.huffman_tree.get_children():
-            self.huffman_tree.delete(item)
+        for tree in (self.fano_tree, self.huffman_tree):
+            tree.delete(*tree.get_children())
+            self._rows[tree] = {}
 
         self.length_value.config(text="0")
         self.entropy_value.config(text="0.000")
@@ -365,42 +386,123 @@ class TextCompressionGUI:
         self.huffman_avg_length.config(text="0.000")
         self.fano_redundancy.config(text="0.000")
         self.huffman_redundancy.config(text="0.000")
+        self.huffman_penalty.config(text="0.000")
+        self.conditional_entropy_value.config(text="")
+
+        self.fano_encoded_text.clear()
+        self.huffman_encoded_text.clear()
 
-        self.fano_encoded_text.delete(1.0, tk.END)
-        self.huffman_encoded_text.delete(1.0, tk.END)
+    def _on_text_modified(self, event=None):
+        if not self.text_input.edit_modified():
+            return
+        self.text_input.edit_modified(False)
+        if not (self._live_ready and self.live_var.get()):
+            return
+        if self._live_job is not None:
+            self.root.after_cancel(self._live_job)
+        self._live_job = self.root.after(LIVE_DELAY_MS, self._live_analyze)
+
+    def _live_analyze(self):
+        self._live_job = None
+        if self.runner.busy:
+            self._live_job = self.root.after(LIVE_DELAY_MS, self._live_analyze)
+            return
+        self.analyze_text(live=True)
 
-    def analyze_text(self):
+    def analyze_text(self, live: bool = False):
         text = self.text_input.get(1.0, tk.END).rstrip('\n')
         if not text:
-            messagebox.showwarning("Предупреждение", "Введите текст для анализа!")
+            if not live:
+                messagebox.showwarning("Предупреждение", "Введите текст для анализа!")
+            return
+        if self.runner.busy:
             return
         try:
+            max_length = self.max_length_var.get()
+        except tk.TclError:
+            max_length = -1
+        if max_length < 0:
+            if not live:
+                messagebox.showerror("Ошибка", "Максимальная длина кода должна быть целым числом не меньше 0")
+            return
+        # the previous state is handed to the job; a cancelled or failed job leaves none
+        previous, self._analysis = self._analysis, None
+        span = None
+        cached = self.cache_var.get()
+        if previous is not None and (previous.max_length, previous.cached) == (max_length, cached):
+            span = edit_span(previous.text, text)
+            if span[1] + span[2] > INCREMENTAL_SHARE * len(text):
+                span = None
+        if span is None:
             self.clear_results()
-            self.compressor.calculate_frequencies(text)
-            self.compressor.generate_shannon_fano_codes()
-            self.compressor.generate_huffman_codes()
-            self.update_tables()
-            self.update_statistics(text)
-            self.update_encoded_text(text)
-        except Exception as e:
-            messagebox.showerror("Ошибка", f"Ошибка при анализе текста: {str(e)}")
+        compressor = self.compressor
+        compressor.max_code_length = max_length or None
+        compressor.code_cache = self.code_cache if cached else None
+
+        def work(report):
+            if span is None:
+                compressor.calculate_frequencies(text)
+                contexts = [ContextCounts(text, k) for k in CONTEXT_ORDERS]
+            else:
+                # apply only the edit to the counts
+                start, removed, inserted = span
+                compressor.update_frequencies(previous.text[start:start + removed],
+                                              text[start:start + inserted])
+                contexts = previous.contexts
+                for counts in contexts:
+                    counts.update(previous.text, text, *span)
+            report(0.2)
+            # the codes are always rebuilt from the current counts (it is over
+            # the alphabet); an edit only reuses the packed bits if they came out the same
+            compressor.generate_shannon_fano_codes()
+            report(0.3)
+            compressor.generate_huffman_codes()
+            report(0.4)
+            bits = []
+            for k, codes_map in enumerate((compressor.fano_codes_map, compressor.huffman_codes_map)):
+                packed = previous.bits[k] if span is not None else None
+                if packed is not None and packed.codes_map == codes_map:
+                    # same codes: splice in the bits of the edit, keep the rest
+                    packed.replace(previous.text, text, *span)
+                else:
+                    packed = PackedBits(codes_map)
+                    packed.pack(text, lambda f, k=k: report(0.4 + 0.3 * (k + f)))
+                bits.append(packed)
+            return Analysis(text, max_length, cached, contexts, bits)
+
+        self.runner.start(work, self.show_results, len(text) if span is None else span[2],
+                          "Ошибка при анализе текста")
+
+    def show_results(self, analysis: Analysis):
+        self._analysis = analysis
+        self._live_ready = True
+        self.update_tables()
+        self.update_statistics(analysis.text)
+        self.conditional_entropy_value.config(
+            text=";  ".join(f"H(X|{k}) = {counts.entropy():.4f}" for k, counts in zip(CONTEXT_ORDERS, analysis.contexts)))
+        self.update_encoded_text([(packed.data, packed.total_bits) for packed in analysis.bits])
 
     def update_tables(self):
-        for node in self.compressor.nodes:
-            sym = node['symbol']
-            symbol_display = repr(sym) if sym in [' ', '\n', '\t'] else sym
-            freq = node.get('frequency', self.compressor.frequencies.get(sym, 0))
-            prob = f"{node['probability']:.4f}"
-            code_fano = self.compressor.fano_codes_map.get(sym, '')
-            self.fano_tree.insert('', 'end', values=(symbol_display, freq, prob, code_fano))
-
-        for node in self.compressor.nodes:
-            sym = node['symbol']
-            symbol_display = repr(sym) if sym in [' ', '\n', '\t'] else sym
-            freq = node.get('frequency', self.compressor.frequencies.get(sym, 0))
-            prob = f"{node['probability']:.4f}"
-            code_huff = self.compressor.huffman_codes_map.get(sym, '')
-            self.huffman_tree.insert('', 'end', values=(symbol_display, freq, prob, code_huff))
+        # rows are rebuilt only when the symbol order changed; otherwise just
+        # the rows whose shown values differ are updated
+        nodes = self.compressor.nodes
+        order = [node['symbol'] for node in nodes]
+        for tree, codes_map in ((self.fano_tree, self.compressor.fano_codes_map),
+                                (self.huffman_tree, self.compressor.huffman_codes_map)):
+            rows = self._rows.setdefault(tree, {})
+            rebuild = list(rows) != order
+            if rebuild:
+                tree.delete(*tree.get_children())
+                rows.clear()
+            for node in nodes:
+                sym = node['symbol']
+                symbol_display = repr(sym) if sym in [' ', '\n', '\t'] else sym
+                values = (symbol_display, node['frequency'], f"{node['probability']:.4f}", codes_map.get(sym, ''))
+                if rebuild:
+                    rows[sym] = (tree.insert('', 'end', values=values), values)
+                elif rows[sym][1] != values:
+                    tree.item(rows[sym][0], values=values)
+                    rows[sym] = (rows[sym][0], values)
 
     def update_statistics(self, text):
         self.length_value.config(text=str(len(text)))
@@ -418,12 +520,23 @@ class TextCompressionGUI:
 
         self.fano_redundancy.config(text=f"{fano_redundancy:.4f}")
         self.huffman_redundancy.config(text=f"{huffman_redundancy:.4f}")
-
-    def update_encoded_text(self, text):
-        fano_encoded = self.compressor.encode_text(text, self.compressor.fano_codes_map)
-        huffman_encoded = self.compressor.encode_text(text, self.compressor.huffman_codes_map)
-        self.fano_encoded_text.insert(1.0, fano_encoded)
-        self.huffman_encoded_text.insert(1.0, huffman_encoded)
+        # extra bits per symbol paid for the length cap, relative to unconstrained Huffman
+        self.huffman_penalty.config(text=f"{self.compressor.huffman_length_penalty:.4f}")
+        cache = self.compressor.code_cache
+        if cache is None:
+            self.cache_value.config(text="выключен")
+        else:
+            self.cache_value.config(text=f"попаданий: {cache.hits}, промахов: {cache.misses}, таблиц: {len(cache)}")
+
+    def update_encoded_text(self, packed):
+        # the encodings are kept packed (1 bit per bit); the views render only visible lines
+        for view, (data, nbits) in zip((self.fano_encoded_text, self.huffman_encoded_text), packed):
+            view.set_source(-(-nbits // BITS_PER_LINE), partial(self._bit_lines, data, nbits))
+
+    @staticmethod
+    def _bit_lines(data, nbits, start, count):
+        return [bits_at(data, i * BITS_PER_LINE, min(BITS_PER_LINE, nbits - i * BITS_PER_LINE))
+                for i in range(start, start + count)]
 
 
 def main():
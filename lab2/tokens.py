@@ -0,0 +1,193 @@
+import operator
+import re
+from collections import Counter
+from itertools import compress
+from typing import Dict, List, Optional, Tuple
+
+from bitio import read_varint, write_varint
+from codec import decode_packed, encode_packed
+from compression import TextCompression
+
+# Token stream layout:
+#   TOKEN_MAGIC | 1 byte mode index | token table | encode_packed stream of the token IDs
+# Token table: varint token count | per token: varint UTF-8 length, UTF-8 bytes
+TOKEN_MAGIC = b'HT'
+MODES = ('chars', 'words', 'ngrams', 'bpe')
+WORD_RE = re.compile(r'\w+|\W')
+BPE_MERGES = 256
+BPE_SAMPLE = 1 << 16
+# merged BPE tokens are written as private-use characters of plane 15 while merging
+BPE_BASE = 0xF0000
+BPE_LIMIT = 0xFFFFE - BPE_BASE
+
+
+def id_char(i: int) -> str:
+    """Token ID -> the one-character symbol that stands for it (surrogates skipped)."""
+    return chr(i if i < 0xD800 else i + 0x800)
+
+
+class TokenTable:
+    """
+    Interning table: token i is tokens[i]. A tokenized text is kept as an ID
+    string with one character per token (id_char), so Counter, the code
+    builders and pack_bits work on the IDs unchanged.
+    """
+
+    def __init__(self, tokens: Optional[List[str]] = None):
+        self.tokens: List[str] = list(tokens or [])
+
+    def intern(self, tokens) -> str:
+        """Intern an iterable of tokens in first-occurrence order; return the ID string."""
+        index = {tok: id_char(i) for i, tok in enumerate(self.tokens)}
+        for tok in dict.fromkeys(tokens):
+            if tok not in index:
+                index[tok] = id_char(len(self.tokens))
+                self.tokens.append(tok)
+        return ''.join(map(index.__getitem__, tokens))
+
+    def expand(self, ids: str) -> str:
+        """ID string -> text; str.translate substitutes every token in C."""
+        return ids.translate({ord(id_char(i)): tok for i, tok in enumerate(self.tokens)})
+
+    def write(self, out: bytearray):
+        write_varint(out, len(self.tokens))
+        for tok in self.tokens:
+            raw = tok.encode('utf-8', 'surrogatepass')
+            write_varint(out, len(raw))
+            out += raw
+
+    @classmethod
+    def read(cls, data, pos: int) -> Tuple['TokenTable', int]:
+        count, pos = read_varint(data, pos)
+        tokens = []
+        for _ in range(count):
+            size, pos = read_varint(data, pos)
+            tokens.append(bytes(data[pos:pos + size]).decode('utf-8', 'surrogatepass'))
+            pos += size
+        return cls(tokens), pos
+
+
+def learn_bpe(text: str, merges: int = BPE_MERGES, sample: int = BPE_SAMPLE) -> List[str]:
+    """
+    Learn up to merges byte-pair merges on the first sample characters.
+    Return the merged pairs in merge order, each as a two-character string
+    over the text's characters and earlier merges (BPE_BASE + k).
+
+    The sample is a linked list of symbols with the count and the positions
+    of every adjacent pair. A merge visits only the positions of its pair,
+    left to right like str.replace, and updates the counts of the pairs
+    around each merge site. Ties go to the pair that occurs first, as
+    Counter.most_common over a fresh count would pick.
+    """
+    if merges > BPE_LIMIT:
+        raise ValueError(f'At most {BPE_LIMIT} BPE merges are supported')
+    sym: List[Optional[str]] = list(text[:sample])
+    n = len(sym)
+    sym.append(None)  # sentinel after the last symbol; removed symbols become None too
+    nxt = list(range(1, n + 1))
+    prv = list(range(-1, n - 1))
+    counts: Counter = Counter(map(operator.add, sym[:n], sym[1:n]))
+    where: Dict[str, List[int]] = {}
+    for i, pair in enumerate(map(operator.add, sym[:n], sym[1:n])):
+        where.setdefault(pair, []).append(i)
+
+    def first(pair: str) -> int:
+        # new occurrences of a pair are only made together with its merged
+        # symbol, so every position list is ascending
+        a, b = pair
+        return next(i for i in where[pair] if sym[i] == a and sym[nxt[i]] == b)
+
+    def drop(pair: str):
+        counts[pair] -= 1
+        if not counts[pair]:
+            del counts[pair]
+
+    def add(pair: str, i: int):
+        counts[pair] += 1
+        where.setdefault(pair, []).append(i)
+
+    pairs: List[str] = []
+    for k in range(merges):
+        if not counts:
+            break
+        count = max(counts.values())
+        if count < 2:
+            break
+        tied = list(compress(counts, map(count.__eq__, counts.values())))
+        pair = min(tied, key=first) if len(tied) > 1 else tied[0]
+        a, b = pair
+        merged = chr(BPE_BASE + k)
+        for i in where.pop(pair):
+            j = nxt[i]
+            if sym[i] != a or sym[j] != b:
+                continue  # overlapped by an earlier merge site
+            p, q = prv[i], nxt[j]
+            if p >= 0:
+                drop(sym[p] + a)
+                add(sym[p] + merged, p)
+            if q < n:
+                drop(b + sym[q])
+                add(merged + sym[q], i)
+                prv[q] = i
+            drop(pair)
+            sym[i] = merged
+            sym[j] = None
+            nxt[i] = q
+        pairs.append(pair)
+    return pairs
+
+
+def apply_bpe(text: str, pairs: List[str]) -> Tuple[str, Dict[str, str]]:
+    """
+    Merge text with learned pairs (str.replace is the same greedy left-to-right
+    pass used while learning). Return the merged string and the expansion of
+    every merged character.
+    """
+    if any(ord(ch) >= BPE_BASE for ch in set(text)):
+        raise ValueError('Text uses plane-15 private characters reserved for BPE merges')
+    expansions: Dict[str, str] = {}
+    for k, pair in enumerate(pairs):
+        merged = chr(BPE_BASE + k)
+        expansions[merged] = expansions.get(pair[0], pair[0]) + expansions.get(pair[1], pair[1])
+        text = text.replace(pair, merged)
+    return text, expansions
+
+
+def tokenize(text: str, mode: str = 'words', n: int = 2, merges: int = BPE_MERGES) -> Tuple[TokenTable, str]:
+    """Split text into tokens and intern them; return (table, ID string)."""
+    table = TokenTable()
+    if mode == 'chars':
+        return table, table.intern(text)
+    if mode == 'words':
+        return table, table.intern(WORD_RE.findall(text))
+    if mode == 'ngrams':
+        if n < 1:
+            raise ValueError('n-gram length must be positive')
+        return table, table.intern([text[i:i + n] for i in range(0, len(text), n)])
+    if mode == 'bpe':
+        merged, expansions = apply_bpe(text, learn_bpe(text, merges))
+        return table, table.intern([expansions.get(ch, ch) for ch in merged])
+    raise ValueError(f'Unknown token mode: {mode!r}')
+
+
+def encode_tokens(text: str, mode: str = 'words', n: int = 2, merges: int = BPE_MERGES,
+                  max_length: Optional[int] = None) -> bytes:
+    """Huffman-code text over its tokens; the token table is stored in the stream."""
+    table, ids = tokenize(text, mode, n, merges)
+    tc = TextCompression()
+    tc.max_code_length = max_length
+    tc.calculate_frequencies(ids)
+    tc.generate_huffman_codes()
+    out = bytearray(TOKEN_MAGIC)
+    out.append(MODES.index(mode))
+    table.write(out)
+    out += encode_packed(ids, tc.huffman_codes_map)
+    return bytes(out)
+
+
+def decode_tokens(data) -> str:
+    """Decode a stream produced by encode_tokens."""
+    if bytes(data[:len(TOKEN_MAGIC)]) != TOKEN_MAGIC:
+        raise ValueError('Not a token stream')
+    table, pos = TokenTable.read(data, len(TOKEN_MAGIC) + 1)
+    return table.expand(decode_packed(memoryview(data)[pos:]))
@@ -0,0 +1,208 @@
+from rangecoder import MAX_TOTAL, RangeDecoder, RangeEncoder
+
+# Адаптивная (однопроходная) модель: частоты обновляются по мере кодирования,
+# поэтому ни кодеру, ни декодеру не нужен предварительный проход по тексту.
+# Слот 0 — ESC (за ним идёт код нового символа), слот 1 — конец потока.
+
+ESC = 0
+EOF = 1
+INCREMENT = 32
+MAGIC = b"RA"
+CHUNK_SIZE = 1 << 16
+
+
+class FenwickTree:
+    # Дерево Фенвика над частотами слотов: префиксная сумма, обновление и
+    # поиск слота по накопленной частоте — за O(log n)
+    def __init__(self, freqs):
+        self.n = len(freqs)
+        tree = [0] + list(freqs)
+        for i in range(1, self.n + 1):
+            j = i + (i & -i)
+            if j <= self.n:
+                tree[j] += tree[i]
+        self.tree = tree
+        self.step = 1 << (self.n.bit_length() - 1) if self.n else 0
+
+    def add(self, i, delta):
+        i += 1
+        tree, n = self.tree, self.n
+        while i <= n:
+            tree[i] += delta
+            i += i & -i
+
+    def prefix(self, i):
+        # сумма частот слотов [0, i)
+        s = 0
+        tree = self.tree
+        while i > 0:
+            s += tree[i]
+            i &= i - 1
+        return s
+
+    def find(self, target):
+        # слот, чей интервал [prefix(i), prefix(i+1)) содержит target
+        pos = 0
+        tree, n = self.tree, self.n
+        step = self.step
+        while step:
+            nxt = pos + step
+            if nxt <= n and tree[nxt] <= target:
+                pos = nxt
+                target -= tree[nxt]
+            step >>= 1
+        return pos
+
+
+class AdaptiveModel:
+    def __init__(self, capacity=64):
+        self.symbols = [None, None]
+        self.index = {}
+        self.freqs = [1, 1]
+        self.total = 2
+        self._rebuild(capacity)
+
+    def _rebuild(self, capacity):
+        self.tree = FenwickTree(self.freqs + [0] * (capacity - len(self.freqs)))
+
+    def add_symbol(self, ch):
+        i = len(self.symbols)
+        if i == self.tree.n:
+            self._rebuild(2 * i)
+        self.symbols.append(ch)
+        self.index[ch] = i
+        self.freqs.append(0)
+        self.update(i)
+
+    def update(self, i):
+        self.freqs[i] += INCREMENT
+        self.tree.add(i, INCREMENT)
+        self.total += INCREMENT
+        if self.total > MAX_TOTAL:
+            # масштабирование: делим частоты пополам, не опуская ниже 1
+            self.freqs = [max(1, f >> 1) for f in self.freqs]
+            self.total = sum(self.freqs)
+            self._rebuild(self.tree.n)
+
+    def encode(self, enc, ch):
+        i = self.index.get(ch)
+        if i is None:
+            enc.encode(self.tree.prefix(ESC), self.freqs[ESC], self.total)
+            cp = ord(ch)
+            for shift in (14, 7, 0):
+                enc.encode((cp >> shift) & 0x7F, 1, 128)
+            self.add_symbol(ch)
+            return
+        enc.encode(self.tree.prefix(i), self.freqs[i], self.total)
+        self.update(i)
+
+    def encode_eof(self, enc):
+        enc.encode(self.tree.prefix(EOF), self.freqs[EOF], self.total)
+
+    def decode(self, dec):
+        # возвращает символ или None в конце потока
+        i = self.tree.find(dec.get_freq(self.total))
+        dec.decode(self.tree.prefix(i), self.freqs[i])
+        if i == EOF:
+            return None
+        if i == ESC:
+            cp = 0
+            for _ in range(3):
+                d = dec.get_freq(128)
+                dec.decode(d, 1)
+                cp = (cp << 7) | d
+            ch = chr(cp)
+            self.add_symbol(ch)
+            return ch
+        self.update(i)
+        return self.symbols[i]
+
+
+class AdaptiveEncoder:
+    # Потоковый кодер: write() принимает очередной кусок текста и возвращает
+    # уже готовые байты, finish() — остаток потока
+    def __init__(self):
+        self.model = AdaptiveModel()
+        self.enc = RangeEncoder()
+        self.enc.out += MAGIC
+
+    def _take(self):
+        out = bytes(self.enc.out)
+        self.enc.out.clear()
+        return out
+
+    def write(self, text):
+        model, enc = self.model, self.enc
+        for ch in text:
+            model.encode(enc, ch)
+        return self._take()
+
+    def finish(self):
+        self.model.encode_eof(self.enc)
+        self.enc.finish()
+        return self._take()
+
+
+def encode(text, progress=None):
+    coder = AdaptiveEncoder()
+    out = bytearray()
+    for start in range(0, len(text), CHUNK_SIZE):
+        out += coder.write(text[start:start + CHUNK_SIZE])
+        if progress is not None:
+            progress(min(1.0, (start + CHUNK_SIZE) / len(text)))
+    return bytes(out + coder.finish())
+
+
+def decode_stream(chunks):
+    """Генератор кусков текста по итератору кусков байтов (или одному bytes)."""
+    if isinstance(chunks, (bytes, bytearray, memoryview)):
+        chunks = [bytes(chunks)]
+    buf = bytearray()
+    it = iter(chunks)
+    # заголовок и первые 5 байт кодера
+    for chunk in it:
+        buf += chunk
+        if len(buf) >= len(MAGIC) + 5:
+            break
+    if bytes(buf[:len(MAGIC)]) != MAGIC:
+        raise ValueError("Это не поток адаптивного кодера")
+    dec = RangeDecoder(buf, len(MAGIC))
+    model = AdaptiveModel()
+    exhausted = False
+    while True:
+        # держим в буфере запас байтов, которых хватит на любой символ
+        while not exhausted and len(buf) - dec.pos < 16:
+            chunk = next(it, None)
+            if chunk is None:
+                exhausted = True
+            else:
+                buf += chunk
+        if dec.pos > CHUNK_SIZE:
+            del buf[:dec.pos]
+            dec.pos = 0
+        out = []
+        # символ занимает не больше 6 байт (ESC + три 7-битные цифры)
+        limit = CHUNK_SIZE if exhausted else (len(buf) - dec.pos - 16) // 8
+        for _ in range(max(limit, 1)):
+            ch = model.decode(dec)
+            if ch is None:
+                if out:
+                    yield "".join(out)
+                return
+            out.append(ch)
+        if exhausted and dec.pos > len(buf) + 8:
+            raise ValueError("Поток адаптивного кодера обрезан")
+        yield "".join(out)
+
+
+def decode(data, progress=None):
+    data = bytes(data)
+
+    def chunks():
+        # доля поданных декодеру байтов
+        for start in range(0, len(data), CHUNK_SIZE):
+            if progress is not None:
+                progress(start / len(data))
+            yield data[start:start + CHUNK_SIZE]
+
+    return "".join(decode_stream(chunks()))
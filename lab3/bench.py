@@ -0,0 +1,145 @@
+import argparse
+import random
+import time
+from bisect import bisect_right
+
+import adaptive
+import context
+import rangecoder
+import tokens
+
+
+def make_corpus(size, seed=0):
+    # псевдотекст: слова с распределением Ципфа над латиницей и кириллицей
+    rng = random.Random(seed)
+    letters = "etaoinshrdlucmfwypvbgkjqxzоеаинтсрвлкмдпуяыьгзбчйхжшюцщэфъё"
+    vocab = ["".join(rng.choice(letters) for _ in range(rng.randint(1, 9))) for _ in range(5000)]
+    weights = [1.0 / (rank + 1) for rank in range(len(vocab))]
+    parts = []
+    total = 0
+    while total < size:
+        for word in rng.choices(vocab, weights, k=10000):
+            parts.append(word)
+            parts.append("\n" if rng.random() < 0.05 else " ")
+            total += len(word) + 1
+    return "".join(parts)[:size]
+
+
+def _timed(fn, *args):
+    t0 = time.perf_counter()
+    res = fn(*args)
+    return res, time.perf_counter() - t0
+
+
+def _mbps(nbytes, seconds):
+    return nbytes / 1e6 / seconds if seconds > 0 else float("inf")
+
+
+def bench_models(text):
+    nbytes = len(text.encode("utf-8"))
+    print(f"вход: {len(text)} символов, {nbytes} байт UTF-8")
+    for name, module in (("статическая", rangecoder), ("адаптивная", adaptive)):
+        data, t_enc = _timed(module.encode, text)
+        decoded, t_dec = _timed(module.decode, data)
+        assert decoded == text, f"{name}: декодирование не совпало"
+        print(f"  {name:12s}: {len(data)} байт, {8 * len(data) / len(text):.3f} бит/символ, "
+              f"кодирование {_mbps(nbytes, t_enc):.2f} MB/s, декодирование {_mbps(nbytes, t_dec):.2f} MB/s")
+    raw = text.encode("utf-8")
+    data, t_enc = _timed(rangecoder.encode_bytes, raw)
+    decoded, t_dec = _timed(rangecoder.decode_bytes, data)
+    assert decoded == raw, "байтовая: декодирование не совпало"
+    print(f"  {'байтовая':12s}: {len(data)} байт, {8 * len(data) / len(raw):.3f} бит/байт, "
+          f"кодирование {_mbps(nbytes, t_enc):.2f} MB/s, декодирование {_mbps(nbytes, t_dec):.2f} MB/s")
+
+
+def _alphabet(size):
+    # кодовые точки без суррогатов, чтобы каждая была отдельным символом str
+    return [chr(cp) for cp in range(0x100, 0x100 + size + 0x800) if not 0xD800 <= cp <= 0xDFFF][:size]
+
+
+def bench_lookup(_text, sizes=(2, 16, 256, 4096, 65536), n=200000):
+    rng = random.Random(1)
+    print("поиск символа по накопленной частоте, нс на символ:")
+    for size in sizes:
+        alphabet = _alphabet(size)
+        weights = [1.0 / (rank + 1) for rank in range(size)]
+        text = "".join(rng.choices(alphabet, weights, k=n))
+        model = rangecoder.StaticModel.from_text(text)
+        targets = [rng.randrange(model.total) for _ in range(n)]
+        cum, lookup = model.cum, model.lookup
+
+        def linear(ts):
+            # прежний способ: перебор интервалов по порядку
+            out = []
+            for t in ts:
+                for i in range(len(cum) - 1):
+                    if cum[i] <= t < cum[i + 1]:
+                        out.append(i)
+                        break
+            return out
+
+        few = targets[:max(200, n // size)]
+        ref, t_lin = _timed(linear, few)
+        res_b, t_bis = _timed(lambda ts: [bisect_right(cum, t) - 1 for t in ts], targets)
+        res_t, t_tab = _timed(lambda ts: [lookup(t) for t in ts], targets)
+        assert res_b[:len(few)] == ref and res_t == res_b
+        data, _ = _timed(rangecoder.encode, text)
+        _, t_dec = _timed(rangecoder.decode, data)
+        print(f"  |A|={size:6d} (в тексте {len(model.symbols):5d}): перебор {1e9 * t_lin / len(few):10.0f}, "
+              f"бисекция {1e9 * t_bis / n:5.0f}, таблица {1e9 * t_tab / n:5.0f}; "
+              f"декодирование {1e9 * t_dec / n:6.0f} нс/символ")
+
+
+def bench_context(text, orders=(0, 1, 2, 3, 4)):
+    nbytes = len(text.encode("utf-8"))
+    print(f"вход: {len(text)} символов, {nbytes} байт UTF-8")
+    for k in orders:
+        data, t_enc = _timed(context.encode, text, k)
+        decoded, t_dec = _timed(context.decode, data)
+        assert decoded == text, f"порядок {k}: декодирование не совпало"
+        print(f"  k={k}: H(X|k) = {context.conditional_entropy(text, k):.3f}, "
+              f"код {8 * len(data) / len(text):.3f} бит/символ, "
+              f"кодирование {_mbps(nbytes, t_enc):.2f} MB/s, декодирование {_mbps(nbytes, t_dec):.2f} MB/s")
+    for bits in (8, 12):
+        data = context.encode(text, 3, bits)
+        print(f"  k=3, {1 << bits} слотов: {8 * len(data) / len(text):.3f} бит/символ")
+
+
+def bench_tokens(text):
+    nbytes = len(text.encode("utf-8"))
+    print(f"вход: {len(text)} символов, {nbytes} байт UTF-8")
+    for mode in tokens.MODES:
+        data, t_enc = _timed(tokens.encode, text, mode)
+        decoded, t_dec = _timed(tokens.decode, data)
+        assert decoded == text, f"{mode}: декодирование не совпало"
+        table, ids = tokens.tokenize(text, mode)
+        print(f"  {mode:6s}: {len(table.tokens):6d} токенов в таблице, {len(ids):8d} в тексте, "
+              f"{8 * len(data) / len(text):.3f} бит/символ, "
+              f"кодирование {_mbps(nbytes, t_enc):.2f} MB/s, декодирование {_mbps(nbytes, t_dec):.2f} MB/s")
+
+
+BENCHMARKS = {
+    "models": bench_models,
+    "lookup": bench_lookup,
+    "context": bench_context,
+    "tokens": bench_tokens,
+}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Бенчмарки lab3")
+    parser.add_argument("which", nargs="*", help=f"бенчмарки: {', '.join(BENCHMARKS)} (по умолчанию все)")
+    parser.add_argument("--size", type=int, default=10**6, help="размер корпуса в символах")
+    parser.add_argument("--file", help="взять текст из UTF-8 файла вместо сгенерированного")
+    args = parser.parse_args()
+    unknown = [name for name in args.which if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"неизвестный бенчмарк: {', '.join(unknown)}")
+
+    if args.file:
+        with open(args.file, "r", encoding="utf-8") as f:
+            corpus = f.read()
+    else:
+        corpus = make_corpus(args.size)
+    for name in args.which or BENCHMARKS:
+        BENCHMARKS[name](corpus)
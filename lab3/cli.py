@@ -0,0 +1,271 @@
+"""
+Консольный режим lab3 без tkinter: данные идут в stdout, статистика —
+JSON в stderr (analyze печатает JSON в stdout).
+
+    python cli.py compress   [--static] [--bytes | -t tokens] [input] [-o output]
+    python cli.py compress   -k order [--table-bits bits] [input] [-o output]
+    python cli.py decompress [input] [-o output]
+    python cli.py analyze    [-k order] [--bytes | -t tokens] [input]
+
+По умолчанию input/output — stdin/stdout ('-'). Контекстная модель (-k)
+всегда адаптивная, поэтому --static с ней не сочетается, а --table-bits
+без -k не используется; такие сочетания отклоняются.
+"""
+import argparse
+import codecs
+import json
+import math
+import sys
+import time
+from collections import Counter
+
+import adaptive
+import context
+import rangecoder
+import tokens
+
+CHUNK_SIZE = 1 << 16
+
+
+def open_input(path):
+    return sys.stdin.buffer if path == "-" else open(path, "rb")
+
+
+def open_output(path):
+    return sys.stdout.buffer if path == "-" else open(path, "wb")
+
+
+def read_chunks(f, size=CHUNK_SIZE):
+    while True:
+        chunk = f.read(size)
+        if not chunk:
+            return
+        yield chunk
+
+
+def report(stats, stream=None):
+    print(json.dumps(stats, ensure_ascii=False), file=stream or sys.stderr)
+
+
+def entropy(freq):
+    n = sum(freq.values())
+    if n == 0:
+        return 0.0
+    return -sum(c / n * math.log2(c / n) for c in freq.values())
+
+
+def code_stats(freq, input_bytes, output_bytes, seconds):
+    n = sum(freq.values())
+    h = entropy(freq)
+    avg = 8 * output_bytes / n if n else 0.0
+    return {
+        "input_bytes": input_bytes,
+        "output_bytes": output_bytes,
+        "ratio": input_bytes / output_bytes if output_bytes else None,
+        "seconds": seconds,
+        "mb_per_s": round(input_bytes / 1e6 / seconds, 3) if seconds > 0 else None,
+        "length": n,
+        "entropy": h,
+        "bits_per_symbol": avg,
+        "redundancy": (avg - h) / avg if avg else 0.0,
+    }
+
+
+def cmd_compress(args):
+    freq = Counter()
+    in_bytes = out_bytes = 0
+    t0 = time.perf_counter()
+    with open_input(args.input) as src, open_output(args.output) as dst:
+        if args.bytes:
+            # любой файл: символы — значения байтов, UTF-8 не декодируется
+            data = src.read()
+            freq = byte_freq(data)
+            out = rangecoder.encode_bytes(data)
+            dst.write(out)
+            in_bytes, out_bytes = len(data), len(out)
+        elif args.tokens != "chars":
+            data = src.read()
+            text = data.decode("utf-8")
+            table, ids = tokens.tokenize(text, args.tokens, args.ngram, args.merges)
+            freq.update(ids)
+            out = tokens.encode_ids(table, ids, args.tokens, static=args.static)
+            dst.write(out)
+            in_bytes, out_bytes = len(data), len(out)
+        elif args.order:
+            data = src.read()
+            text = data.decode("utf-8")
+            freq.update(text)
+            out = context.encode(text, args.order, args.table_bits)
+            dst.write(out)
+            in_bytes, out_bytes = len(data), len(out)
+        elif args.static:
+            data = src.read()
+            text = data.decode("utf-8")
+            freq.update(text)
+            out = rangecoder.encode(text)
+            dst.write(out)
+            in_bytes, out_bytes = len(data), len(out)
+        else:
+            # адаптивная модель: кодируем по мере чтения, без буферизации всего входа
+            utf8 = codecs.getincrementaldecoder("utf-8")()
+            coder = adaptive.AdaptiveEncoder()
+            for chunk in read_chunks(src):
+                text = utf8.decode(chunk)
+                freq.update(text)
+                out = coder.write(text)
+                dst.write(out)
+                in_bytes += len(chunk)
+                out_bytes += len(out)
+            utf8.decode(b"", final=True)
+            out = coder.finish()
+            dst.write(out)
+            out_bytes += len(out)
+    if args.bytes:
+        model = "bytes"
+    elif args.tokens != "chars":
+        model = f"tokens-{args.tokens}" + ("-static" if args.static else "-adaptive")
+    elif args.order:
+        model = f"context-{args.order}"
+    else:
+        model = "static" if args.static else "adaptive"
+    stats = {"command": "compress", "model": model}
+    stats.update(code_stats(freq, in_bytes, out_bytes, time.perf_counter() - t0))
+    if args.order and not args.bytes:
+        # избыточность выше считается от энтропии порядка 0, поэтому может быть < 0
+        stats["conditional_entropy"] = context.conditional_entropy(text, args.order)
+    report(stats)
+
+
+def cmd_decompress(args):
+    in_bytes = out_bytes = 0
+    t0 = time.perf_counter()
+    with open_input(args.input) as src, open_output(args.output) as dst:
+        head = src.read(len(adaptive.MAGIC))
+        if head == adaptive.MAGIC:
+            def chunks():
+                nonlocal in_bytes
+                in_bytes += len(head)
+                yield head
+                for chunk in read_chunks(src):
+                    in_bytes += len(chunk)
+                    yield chunk
+
+            for text in adaptive.decode_stream(chunks()):
+                out = text.encode("utf-8")
+                dst.write(out)
+                out_bytes += len(out)
+        else:
+            data = head + src.read()
+            if head == rangecoder.BYTE_MAGIC:
+                out = rangecoder.decode_bytes(data)
+            elif head == tokens.MAGIC:
+                out = tokens.decode(data).encode("utf-8")
+            else:
+                coder = context if head == context.MAGIC else rangecoder
+                out = coder.decode(data).encode("utf-8")
+            dst.write(out)
+            in_bytes, out_bytes = len(data), len(out)
+    seconds = time.perf_counter() - t0
+    report({
+        "command": "decompress",
+        "input_bytes": in_bytes,
+        "output_bytes": out_bytes,
+        "seconds": seconds,
+        "mb_per_s": round(out_bytes / 1e6 / seconds, 3) if seconds > 0 else None,
+    })
+
+
+def byte_freq(data):
+    counts = rangecoder.byte_counts(data)
+    return {b: c for b, c in enumerate(counts) if c}
+
+
+def cmd_analyze(args):
+    with open_input(args.input) as src:
+        data = src.read()
+    t0 = time.perf_counter()
+    if args.bytes:
+        out = rangecoder.encode_bytes(data)
+        freq = byte_freq(data)
+        stats = {"command": "analyze", "alphabet": "bytes", "symbols": len(freq)}
+        stats.update(code_stats(freq, len(data), len(out), time.perf_counter() - t0))
+        report(stats, sys.stdout)
+        return
+    text = data.decode("utf-8")
+    if args.tokens != "chars":
+        table, ids = tokens.tokenize(text, args.tokens, args.ngram, args.merges)
+        out = tokens.encode_ids(table, ids, args.tokens)
+        stats = {"command": "analyze", "tokens": args.tokens, "symbols": len(table.tokens),
+                 "characters": len(text), "bits_per_char": 8 * len(out) / len(text) if text else 0.0}
+        stats.update(code_stats(Counter(ids), len(data), len(out), time.perf_counter() - t0))
+        report(stats, sys.stdout)
+        return
+    out = rangecoder.encode(text)
+    stats = {"command": "analyze", "symbols": len(set(text))}
+    stats.update(code_stats(Counter(text), len(data), len(out), time.perf_counter() - t0))
+    # H(X | k предыдущих символов) рядом с энтропией порядка 0
+    stats["conditional_entropy"] = {k: context.conditional_entropy(text, k) for k in range(1, args.order + 1)}
+    report(stats, sys.stdout)
+
+
+def add_token_arguments(p, group):
+    group.add_argument("-t", "--tokens", choices=tokens.MODES, default="chars",
+                   help="символы алфавита: буквы, слова, n-граммы или токены BPE")
+    p.add_argument("-n", "--ngram", type=int, default=2, help="длина n-граммы для --tokens ngrams")
+    p.add_argument("--merges", type=int, default=tokens.BPE_MERGES, help="число склеек для --tokens bpe")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Арифметическое (range) кодирование без GUI")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("compress", help="сжать UTF-8 текст")
+    p.add_argument("input", nargs="?", default="-")
+    p.add_argument("-o", "--output", default="-")
+    p.add_argument("--static", action="store_true", help="двухпроходная статическая модель вместо адаптивной")
+    # модели взаимоисключающие: иначе лишний флаг молча игнорировался бы
+    model = p.add_mutually_exclusive_group()
+    model.add_argument("-k", "--order", type=int, default=0, help="контекстная модель порядка k (0 — без контекста)")
+    model.add_argument("--bytes", action="store_true", help="статическая модель над байтами: любой файл без декодирования UTF-8")
+    p.add_argument("--table-bits", type=int, default=None,
+                   help=f"log2 числа слотов хеш-таблицы контекстов (ограничивает память), "
+                        f"только с -k; по умолчанию {context.TABLE_BITS}")
+    add_token_arguments(p, model)
+    p.set_defaults(func=cmd_compress)
+
+    p = sub.add_parser("decompress", help="восстановить текст (тип потока определяется по заголовку)")
+    p.add_argument("input", nargs="?", default="-")
+    p.add_argument("-o", "--output", default="-")
+    p.set_defaults(func=cmd_decompress)
+
+    p = sub.add_parser("analyze", help="энтропия, бит на символ и избыточность в JSON")
+    p.add_argument("input", nargs="?", default="-")
+    p.add_argument("-k", "--order", type=int, default=2, help="условная энтропия для порядков 1..k")
+    alphabet = p.add_mutually_exclusive_group()
+    alphabet.add_argument("--bytes", action="store_true", help="статистика по значениям байтов, а не по символам")
+    add_token_arguments(p, alphabet)
+    p.set_defaults(func=cmd_analyze)
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command == "compress":
+        # иначе флаг молча игнорировался бы, а статистика называла бы неиспользованную модель
+        if args.order and args.static:
+            parser.error("--static не сочетается с -k: контекстная модель всегда адаптивная")
+        if args.table_bits is not None and not args.order:
+            parser.error("--table-bits задаёт таблицу контекстной модели и требует -k")
+        if args.table_bits is None:
+            args.table_bits = context.TABLE_BITS
+    try:
+        args.func(args)
+    except (OSError, UnicodeDecodeError, ValueError) as e:
+        print(f"ошибка: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,187 @@
+import math
+import zlib
+from bisect import bisect_right
+from collections import Counter
+from itertools import accumulate
+
+import adaptive
+from rangecoder import RangeDecoder, RangeEncoder
+
+# Контекстная модель порядка k (PPM, оценка ухода по методу C): символ
+# кодируется в самом длинном из k предыдущих символов контексте, где он уже
+# встречался; иначе кодируется уход (ESC) и пробуется контекст короче.
+# Последняя ступень — адаптивная модель порядка 0 из adaptive.py.
+# Таблицы контекстов лежат в хеш-таблице фиксированного размера: при
+# коллизии старый контекст вытесняется, так что память ограничена числом слотов.
+
+MAGIC = b"RK"
+MAX_ORDER = 8
+TABLE_BITS = 16
+CONTEXT_LIMIT = 1 << 13  # сумма частот контекста, после которой они делятся пополам
+PROGRESS_STEP = 1 << 12
+
+
+class ContextTable:
+    __slots__ = ("ctx", "symbols", "counts", "sum")
+
+    def __init__(self, ctx, ch):
+        self.ctx = ctx
+        self.symbols = [ch]
+        self.counts = [1]
+        self.sum = 1
+
+    @property
+    def escape(self):
+        # метод C: частота ухода равна числу разных символов контекста
+        return len(self.symbols)
+
+    def add(self, ch):
+        try:
+            i = self.symbols.index(ch)
+        except ValueError:
+            self.symbols.append(ch)
+            self.counts.append(1)
+            self.sum += 1
+        else:
+            self.counts[i] += 1
+            self.sum += 1
+        if self.sum + len(self.symbols) > CONTEXT_LIMIT:
+            self.counts = [max(1, c >> 1) for c in self.counts]
+            self.sum = sum(self.counts)
+
+
+def context_hash(ctx):
+    # детерминированный хеш: hash() для str зависит от процесса (PYTHONHASHSEED)
+    return zlib.crc32(ctx.encode("utf-8", "surrogatepass"))
+
+
+class ContextModel:
+    def __init__(self, order=2, table_bits=TABLE_BITS):
+        if not 0 <= order <= MAX_ORDER:
+            raise ValueError(f"Порядок контекста должен быть от 0 до {MAX_ORDER}")
+        self.order = order
+        self.mask = (1 << table_bits) - 1
+        self.slots = [None] * (1 << table_bits)
+        self.order0 = adaptive.AdaptiveModel()
+        self.history = ""
+
+    def _lookup(self):
+        # (слот, контекст, таблица или None) от самого длинного контекста к короткому
+        slots, mask, hist = self.slots, self.mask, self.history
+        found = []
+        for o in range(len(hist), 0, -1):
+            ctx = hist[-o:]
+            slot = context_hash(ctx) & mask
+            table = slots[slot]
+            found.append((slot, ctx, table if table is not None and table.ctx == ctx else None))
+        return found
+
+    def _update(self, found, ch):
+        slots = self.slots
+        for slot, ctx, table in found:
+            if table is None:
+                slots[slot] = ContextTable(ctx, ch)
+            else:
+                table.add(ch)
+        if self.order:
+            self.history = (self.history + ch)[-self.order:]
+
+    def encode(self, enc, ch):
+        found = self._lookup()
+        coded = False
+        for _, _, table in found:
+            if table is None:
+                continue
+            total = table.sum + table.escape
+            try:
+                i = table.symbols.index(ch)
+            except ValueError:
+                enc.encode(table.sum, table.escape, total)
+                continue
+            enc.encode(sum(table.counts[:i]), table.counts[i], total)
+            coded = True
+            break
+        if not coded:
+            self.order0.encode(enc, ch)
+        self._update(found, ch)
+
+    def encode_eof(self, enc):
+        for _, _, table in self._lookup():
+            if table is not None:
+                enc.encode(table.sum, table.escape, table.sum + table.escape)
+        self.order0.encode_eof(enc)
+
+    def decode(self, dec):
+        # возвращает символ или None в конце потока
+        found = self._lookup()
+        ch = None
+        for _, _, table in found:
+            if table is None:
+                continue
+            target = dec.get_freq(table.sum + table.escape)
+            if target >= table.sum:
+                dec.decode(table.sum, table.escape)
+                continue
+            ends = list(accumulate(table.counts))
+            i = bisect_right(ends, target)
+            dec.decode(ends[i] - table.counts[i], table.counts[i])
+            ch = table.symbols[i]
+            break
+        if ch is None:
+            ch = self.order0.decode(dec)
+            if ch is None:
+                return None
+        self._update(found, ch)
+        return ch
+
+
+def encode(text, order=2, table_bits=TABLE_BITS, progress=None):
+    """Текст -> байты: MAGIC, порядок, log2 числа слотов и выход range-кодера."""
+    model = ContextModel(order, table_bits)
+    enc = RangeEncoder()
+    enc.out += MAGIC + bytes([order, table_bits])
+    n = len(text)
+    for start in range(0, n, PROGRESS_STEP):
+        for ch in text[start:start + PROGRESS_STEP]:
+            model.encode(enc, ch)
+        if progress is not None:
+            progress(min(1.0, (start + PROGRESS_STEP) / n))
+    model.encode_eof(enc)
+    return bytes(enc.finish())
+
+
+def decode(data, progress=None):
+    data = bytes(data)
+    if data[:len(MAGIC)] != MAGIC or len(data) < len(MAGIC) + 2:
+        raise ValueError("Это не поток контекстной модели")
+    order, table_bits = data[len(MAGIC)], data[len(MAGIC) + 1]
+    model = ContextModel(order, table_bits)
+    dec = RangeDecoder(data, len(MAGIC) + 2)
+    out = []
+    while True:
+        for _ in range(PROGRESS_STEP):
+            ch = model.decode(dec)
+            if ch is None:
+                return "".join(out)
+            out.append(ch)
+        if dec.pos > len(data) + 8:
+            raise ValueError("Поток контекстной модели обрезан")
+        if progress is not None:
+            progress(min(1.0, dec.pos / len(data)))
+
+
+def conditional_entropy(text, order):
+    """H(X | k предыдущих символов) по частотам (k+1)-грамм, бит на символ.
+
+    Считается по позициям, у которых есть полный контекст; order=0 даёт
+    обычную энтропию порядка 0.
+    """
+    n = len(text) - order
+    if n <= 0:
+        return 0.0
+    grams = Counter(text[i:i + order + 1] for i in range(n)) if order else Counter(text)
+    contexts = Counter(text[i:i + order] for i in range(n)) if order else {"": n}
+    h = 0.0
+    for gram, c in grams.items():
+        h -= c * math.log2(c / contexts[gram[:order]])
+    return h / n
@@ -1,11 +1,172 @@
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
 from decimal import Decimal, getcontext, ROUND_HALF_EVEN
+from bisect import bisect_right
 from collections import Counter
+from functools import partial
+import threading
+import time
+
+import adaptive
+import context
+import rangecoder
 
 getcontext().prec = 30
 getcontext().rounding = ROUND_HALF_EVEN
 
+STEP_CHECKPOINT = 256   # через сколько шагов трассировки сохраняется [L;H)
+CHAIN_PREVIEW = 40      # сколько последних символов цепочки показывать
+DISPLAY_LIMIT = 4096    # максимум символов в полях кода и результата
+
+
+class PagedTree(ttk.Frame):
+    # Treeview, в котором созданы только видимые строки: их отдаёт
+    # row_source(start, count), поэтому объём данных не влияет на отрисовку
+    def __init__(self, master, columns, headings):
+        super().__init__(master)
+        self.tree = ttk.Treeview(self, columns=columns, show="headings")
+        for col, title in zip(columns, headings):
+            self.tree.heading(col, text=title)
+        self.scrollbar = ttk.Scrollbar(self, orient="vertical", command=self.yview)
+        self.tree.pack(side="left", fill="both", expand=True)
+        self.scrollbar.pack(side="right", fill="y")
+        self.tree.bind("<Configure>", lambda e: self.render())
+        for seq in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            self.tree.bind(seq, self._on_wheel)
+        self.row_count = 0
+        self.row_source = None
+        self.top = 0
+
+    def set_source(self, row_count, row_source):
+        self.row_count = row_count
+        self.row_source = row_source
+        self.top = 0
+        self.render()
+
+    def clear(self):
+        self.set_source(0, None)
+
+    def visible_rows(self):
+        rowheight = int(ttk.Style().lookup("Treeview", "rowheight") or 20)
+        # одна строка уходит на заголовки
+        return max(1, self.tree.winfo_height() // rowheight - 1)
+
+    def yview(self, *args):
+        visible = self.visible_rows()
+        if args[0] == "moveto":
+            top = int(float(args[1]) * self.row_count)
+        else:
+            top = self.top + int(args[1]) * (visible if args[2] == "pages" else 1)
+        self.top = max(0, min(top, self.row_count - visible))
+        self.render()
+
+    def _on_wheel(self, event):
+        up = event.num == 4 or getattr(event, "delta", 0) > 0
+        self.yview("scroll", -3 if up else 3, "units")
+        return "break"
+
+    def render(self):
+        self.tree.delete(*self.tree.get_children())
+        if not self.row_count:
+            self.scrollbar.set(0.0, 1.0)
+            return
+        count = min(self.visible_rows(), self.row_count - self.top)
+        for values in self.row_source(self.top, count):
+            self.tree.insert("", "end", values=values)
+        self.scrollbar.set(self.top / self.row_count, (self.top + count) / self.row_count)
+
+
+class Cancelled(Exception):
+    pass
+
+
+class BackgroundRunner:
+    # Выполняет по одной задаче в рабочем потоке, чтобы главный цикл Tk не
+    # блокировался. Задача вызывается как work(report); report(доля) двигает
+    # индикатор и бросает Cancelled после cancel(). Результат забирается в
+    # потоке Tk опросом через root.after.
+    POLL_MS = 100
+
+    def __init__(self, root, progressbar, status, buttons, cancel_button):
+        self.root = root
+        self.progressbar = progressbar
+        self.status = status
+        self.buttons = buttons
+        self.cancel_button = cancel_button
+        self.cancel_button.configure(command=self.cancel, state="disabled")
+        self.thread = None
+
+    @property
+    def busy(self):
+        return self.thread is not None
+
+    def start(self, work, on_done, units=0, error_message="Ошибка"):
+        if self.busy:
+            return False
+        self._cancel = threading.Event()
+        self._fraction = 0.0
+        self._result = None
+        self._units = units
+        self._t0 = time.perf_counter()
+        self._on_done = on_done
+        self._error_message = error_message
+        for button in self.buttons:
+            button.configure(state="disabled")
+        self.cancel_button.configure(state="normal")
+        self.thread = threading.Thread(target=self._run, args=(work,), daemon=True)
+        self.thread.start()
+        self.root.after(self.POLL_MS, self._poll)
+        return True
+
+    def cancel(self):
+        if self.busy:
+            self._cancel.set()
+
+    def _report(self, fraction):
+        if self._cancel.is_set():
+            raise Cancelled()
+        self._fraction = fraction
+
+    def _run(self, work):
+        try:
+            self._result = ("ok", work(self._report))
+        except Cancelled:
+            self._result = ("cancelled", None)
+        except Exception as e:
+            self._result = ("error", e)
+
+    def _poll(self):
+        elapsed = time.perf_counter() - self._t0
+        self.progressbar["value"] = 100 * self._fraction
+        rate = self._fraction * self._units / elapsed / 1e6 if elapsed > 0 else 0.0
+        self.status.config(text=f"{100 * self._fraction:.0f}%  {rate:.2f} млн симв./с")
+        if self.thread.is_alive():
+            self.root.after(self.POLL_MS, self._poll)
+            return
+        self.thread = None
+        for button in self.buttons:
+            button.configure(state="normal")
+        self.cancel_button.configure(state="disabled")
+        status, value = self._result
+        if status == "ok":
+            self.progressbar["value"] = 100
+            self.status.config(text=f"Готово за {elapsed:.2f} с")
+            self._on_done(value)
+        elif status == "cancelled":
+            self.progressbar["value"] = 0
+            self.status.config(text="Отменено")
+        else:
+            self.status.config(text="")
+            messagebox.showerror("Ошибка", f"{self._error_message}: {value}")
+
+
+def set_entry(entry, value):
+    # в поле попадает не больше DISPLAY_LIMIT символов; возвращает показанный текст
+    shown = value if len(value) <= DISPLAY_LIMIT else value[:DISPLAY_LIMIT] + "…"
+    entry.delete(0, tk.END)
+    entry.insert(0, shown)
+    return shown
+
 
 class ArithmeticCodingApp:
     def __init__(self, root):
@@ -17,9 +178,34 @@ class ArithmeticCodingApp:
         frame_top = tk.Frame(root)
         frame_top.pack(fill="x", pady=4)
 
-        tk.Button(frame_top, text="Открыть файл", command=self.open_file, width=14).pack(side="left", padx=6)
-        tk.Button(frame_top, text="Кодировать", command=self.encode, width=14, bg="#4CAF50", fg="white").pack(side="left", padx=6)
-        tk.Button(frame_top, text="Декодировать", command=self.decode, width=14, bg="#2196F3", fg="white").pack(side="left", padx=6)
+        open_button = tk.Button(frame_top, text="Открыть файл", command=self.open_file, width=14)
+        open_button.pack(side="left", padx=6)
+        encode_button = tk.Button(frame_top, text="Кодировать", command=self.encode, width=14, bg="#4CAF50", fg="white")
+        encode_button.pack(side="left", padx=6)
+        decode_button = tk.Button(frame_top, text="Декодировать", command=self.decode, width=14, bg="#2196F3", fg="white")
+        decode_button.pack(side="left", padx=6)
+        # Decimal-кодирование оставлено как учебная трассировка шагов; без неё работает range-кодер
+        self.trace_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(frame_top, text="Учебная трассировка (Decimal)", variable=self.trace_var).pack(side="left", padx=6)
+        # адаптивная модель кодирует за один проход, без таблицы частот в заголовке
+        self.adaptive_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(frame_top, text="Адаптивная модель", variable=self.adaptive_var).pack(side="left", padx=6)
+        # порядок контекстной модели: 0 — без контекста, иначе кодирует context.py
+        tk.Label(frame_top, text="Порядок контекста:").pack(side="left", padx=(6, 0))
+        self.order_var = tk.IntVar(value=0)
+        tk.Spinbox(frame_top, from_=0, to=context.MAX_ORDER, width=3, textvariable=self.order_var).pack(side="left", padx=6)
+
+        # === Ход выполнения фоновой задачи ===
+        frame_progress = tk.Frame(root)
+        frame_progress.pack(fill="x", padx=8)
+        cancel_button = tk.Button(frame_progress, text="Отмена", width=10)
+        cancel_button.pack(side="right")
+        progressbar = ttk.Progressbar(frame_progress, length=200, maximum=100)
+        progressbar.pack(side="right", padx=6)
+        status_label = tk.Label(frame_progress, text="", anchor="e")
+        status_label.pack(side="right", fill="x", expand=True)
+        self.runner = BackgroundRunner(root, progressbar, status_label,
+                                       [open_button, encode_button, decode_button], cancel_button)
 
         # === Поле ввода ===
         tk.Label(root, text="Исходный текст:", anchor="w").pack(fill="x", padx=8)
@@ -36,15 +222,16 @@ class ArithmeticCodingApp:
         self.entry_decoded = tk.Entry(frame_code, width=40)
         self.entry_decoded.pack(side="left", padx=6)
 
+        # энтропия порядка 0, условная энтропия и фактическая длина кода
+        self.label_entropy = tk.Label(root, text="", anchor="w")
+        self.label_entropy.pack(fill="x", padx=8)
+
         # === Таблицы ===
         nb = ttk.Notebook(root)
         nb.pack(fill="both", expand=True, padx=8, pady=4)
 
         # таблица шагов
-        self.tree_steps = ttk.Treeview(nb, columns=("step", "chain", "interval"), show="headings")
-        self.tree_steps.heading("step", text="Шаг")
-        self.tree_steps.heading("chain", text="Цепочка")
-        self.tree_steps.heading("interval", text="Интервал [L;H)")
+        self.tree_steps = PagedTree(nb, ("step", "chain", "interval"), ("Шаг", "Цепочка", "Интервал [L;H)"))
         nb.add(self.tree_steps, text="Шаги кодирования")
 
         # таблица вероятностей
@@ -60,6 +247,7 @@ class ArithmeticCodingApp:
         self.high = None
         self.symbols = None
         self.code = None
+        self.code_shown = None
 
     # === Открыть файл ===
     def open_file(self):
@@ -75,7 +263,7 @@ class ArithmeticCodingApp:
         total = Decimal(len(text))
         probs = {c: Decimal(freq[c]) / total for c in freq}
         # сортировка как в C# — по вероятности (убывание), затем по символу (возрастание)
-        symbols = sorted(probs.keys(), key=lambda c: (-probs[c], c))
+        symbols = rangecoder.order_symbols(freq)
         low, high = {}, {}
         cumulative = Decimal(0)
         for c in symbols:
@@ -90,23 +278,49 @@ class ArithmeticCodingApp:
         if not text:
             messagebox.showwarning("Ошибка", "Введите или выберите текст для кодирования!")
             return
+        if self.runner.busy:
+            return
 
-        self.freq, self.low, self.high, self.symbols = self.compute_freq(text)
+        trace = self.trace_var.get()
+        try:
+            order = self.order_var.get()
+        except tk.TclError:
+            order = -1
+        if not 0 <= order <= context.MAX_ORDER:
+            messagebox.showerror("Ошибка", f"Порядок контекста должен быть целым числом от 0 до {context.MAX_ORDER}!")
+            return
+        if order:
+            coder = partial(context.encode, order=order)
+        else:
+            coder = adaptive.encode if self.adaptive_var.get() else rangecoder.encode
+        self.tree_steps.clear()
 
-        L, H = Decimal(0), Decimal(1)
-        self.tree_steps.delete(*self.tree_steps.get_children())
+        def work(report):
+            tables = self.compute_freq(text)
+            entropies = (context.conditional_entropy(text, 0),
+                         context.conditional_entropy(text, order) if order else None)
+            if trace:
+                return tables, entropies, self.encode_trace(text, tables[1], tables[2], report)
+            return tables, entropies, coder(text, progress=report)
 
-        for i, symbol in enumerate(text):
-            range_ = H - L
-            H = L + range_ * self.high[symbol]
-            L = L + range_ * self.low[symbol]
-            chain = text[:i + 1]
-            self.tree_steps.insert("", "end", values=(i + 1, chain, f"[{L:.28f}; {H:.28f})"))
+        self.runner.start(work, partial(self.show_encoded, text, trace, order), len(text), "Ошибка кодирования")
 
-        code = (L + H) / 2
+    def show_encoded(self, text, trace, order, result):
+        (self.freq, self.low, self.high, self.symbols), (h0, hk), code = result
+        info = f"Энтропия H0 = {h0:.4f} бит/символ"
+        if hk is not None:
+            info += f";  условная H(X | {order} предыдущих) = {hk:.4f}"
+        if not trace:
+            info += f";  код: {8 * len(code) / len(text):.4f} бит/символ"
+        self.label_entropy.config(text=info)
+        if trace:
+            code, checkpoints = code
+            self.tree_steps.set_source(len(text), partial(self.trace_rows, text, checkpoints, self.low, self.high))
+            code_str = str(code)
+        else:
+            code_str = code.hex()
         self.code = code
-        self.entry_code.delete(0, tk.END)
-        self.entry_code.insert(0, str(code))
+        self.code_shown = set_entry(self.entry_code, code_str)
 
         # таблица вероятностей
         self.tree_freq.delete(*self.tree_freq.get_children())
@@ -119,8 +333,62 @@ class ArithmeticCodingApp:
                         f"{self.high[c]:.4f}")
             )
 
+    # === Учебная трассировка: сужение [L;H) в Decimal ===
+    @staticmethod
+    def narrow(L, H, lo, hi):
+        range_ = H - L
+        return L + range_ * lo, L + range_ * hi
+
+    def encode_trace(self, text, low, high, report):
+        # хранится только каждая STEP_CHECKPOINT-я пара [L;H), строки таблицы
+        # пересчитываются от ближайшей сохранённой точки при прокрутке
+        L, H = Decimal(0), Decimal(1)
+        checkpoints = []
+        for i, symbol in enumerate(text):
+            if i % STEP_CHECKPOINT == 0:
+                checkpoints.append((L, H))
+                report(i / len(text))
+            L, H = self.narrow(L, H, low[symbol], high[symbol])
+        return (L + H) / 2, checkpoints
+
+    def trace_rows(self, text, checkpoints, low, high, start, count):
+        k = start // STEP_CHECKPOINT
+        L, H = checkpoints[k]
+        rows = []
+        for i in range(k * STEP_CHECKPOINT, start + count):
+            symbol = text[i]
+            L, H = self.narrow(L, H, low[symbol], high[symbol])
+            if i >= start:
+                chain = text[:i + 1] if i < CHAIN_PREVIEW else "…" + text[i + 1 - CHAIN_PREVIEW:i + 1]
+                rows.append((i + 1, chain, f"[{L:.28f}; {H:.28f})"))
+        return rows
+
     # === Декодирование ===
     def decode(self):
+        if self.runner.busy:
+            return
+        if not self.trace_var.get():
+            code_str = self.entry_code.get()
+            if isinstance(self.code, bytes) and code_str == self.code_shown:
+                # в поле показано начало кода — берём полный поток
+                data = self.code
+            else:
+                try:
+                    data = bytes.fromhex(code_str.strip())
+                except ValueError:
+                    messagebox.showerror("Ошибка", "Код не является корректным потоком range-кодера!")
+                    return
+            if data.startswith(adaptive.MAGIC):
+                coder = adaptive
+            elif data.startswith(context.MAGIC):
+                coder = context
+            else:
+                coder = rangecoder
+            self.runner.start(lambda report: coder.decode(data, progress=report),
+                              partial(set_entry, self.entry_decoded), len(data),
+                              "Код не является корректным потоком range-кодера")
+            return
+
         code_str = self.entry_code.get().replace(",", ".")
         try:
             code = Decimal(code_str)
@@ -135,17 +403,27 @@ class ArithmeticCodingApp:
 
         if not self.freq:
             self.freq, self.low, self.high, self.symbols = self.compute_freq(text)
+        low, high, symbols = self.low, self.high, self.symbols
 
-        decoded = ""
-        for _ in range(len(text)):
-            for s in self.symbols:
-                if self.low[s] <= code < self.high[s]:
-                    decoded += s
-                    code = (code - self.low[s]) / (self.high[s] - self.low[s])
+        def work(report):
+            nonlocal code
+            # нижние границы интервалов возрастают — символ ищем бисекцией за O(log n)
+            bounds = [low[s] for s in symbols]
+            decoded = []
+            for step in range(len(text)):
+                if step % STEP_CHECKPOINT == 0:
+                    report(step / len(text))
+                i = bisect_right(bounds, code) - 1
+                if i < 0:
+                    break
+                s = symbols[i]
+                if not code < high[s]:
                     break
+                decoded.append(s)
+                code = (code - low[s]) / (high[s] - low[s])
+            return "".join(decoded)
 
-        self.entry_decoded.delete(0, tk.END)
-        self.entry_decoded.insert(0, decoded)
+        self.runner.start(work, partial(set_entry, self.entry_decoded), len(text), "Ошибка декодирования")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,274 @@
+from array import array
+from collections import Counter
+
+# Целочисленный интервальный (range) кодер: 32-битный range, low с битом
+# переноса, нормализация побайтно. Частоты модели не должны превышать MAX_TOTAL
+# в сумме, чтобы range // total не обнулялся.
+
+TOP = 1 << 24
+MASK32 = 0xFFFFFFFF
+MAX_TOTAL = 1 << 16
+MAGIC = b"RC"
+BYTE_MAGIC = b"RY"
+PROGRESS_STEP = 1 << 14  # раз в столько символов вызывается progress
+
+
+def order_symbols(freq):
+    # как в C# — по частоте (убывание), затем по символу (возрастание)
+    return sorted(freq, key=lambda c: (-freq[c], c))
+
+
+def write_varint(out, value):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def read_varint(data, pos):
+    value = shift = 0
+    while True:
+        b = data[pos]
+        pos += 1
+        value |= (b & 0x7F) << shift
+        if b < 0x80:
+            return value, pos
+        shift += 7
+
+
+class RangeEncoder:
+    def __init__(self):
+        self.low = 0
+        self.range = MASK32
+        self.cache = 0
+        self.cache_size = 1
+        self.out = bytearray()
+
+    def encode(self, cum, freq, total):
+        r = self.range // total
+        self.low += r * cum
+        self.range = r * freq
+        while self.range < TOP:
+            self.range <<= 8
+            self.shift_low()
+
+    def shift_low(self):
+        low = self.low
+        if low < 0xFF000000 or low > MASK32:
+            # перенос из low уходит в отложенный байт и в цепочку 0xFF за ним
+            carry = low >> 32
+            out = self.out
+            out.append((self.cache + carry) & 0xFF)
+            if self.cache_size > 1:
+                out += bytes([(0xFF + carry) & 0xFF]) * (self.cache_size - 1)
+            self.cache_size = 0
+            self.cache = (low >> 24) & 0xFF
+        self.cache_size += 1
+        self.low = (low << 8) & MASK32
+
+    def finish(self):
+        for _ in range(5):
+            self.shift_low()
+        return self.out
+
+
+class RangeDecoder:
+    def __init__(self, data, pos=0):
+        self.data = data
+        self.pos = pos + 5
+        self.range = MASK32
+        self.code = int.from_bytes(bytes(data[pos:pos + 5]).ljust(5, b"\0"), "big") & MASK32
+        self.r = 1
+
+    def get_freq(self, total):
+        self.r = self.range // total
+        return min(self.code // self.r, total - 1)
+
+    def decode(self, cum, freq):
+        self.code -= cum * self.r
+        self.range = self.r * freq
+        while self.range < TOP:
+            b = self.data[self.pos] if self.pos < len(self.data) else 0
+            self.pos += 1
+            self.code = ((self.code << 8) | b) & MASK32
+            self.range <<= 8
+
+
+class StaticModel:
+    # Частоты в порядке compute_freq, масштабированные до суммы <= MAX_TOTAL
+    def __init__(self, symbols, freqs):
+        self.symbols = list(symbols)
+        self.freqs = list(freqs)
+        self.cum = [0]
+        for f in self.freqs:
+            self.cum.append(self.cum[-1] + f)
+        self.total = self.cum[-1]
+        self.index = {s: i for i, s in enumerate(self.symbols)}
+        # прямой индекс: накопленная частота -> номер символа (total <= MAX_TOTAL)
+        self.slot = array("I")
+        for i, f in enumerate(self.freqs):
+            self.slot.extend(array("I", [i]) * f)
+
+    @classmethod
+    def from_text(cls, text):
+        freq = Counter(text)
+        symbols = order_symbols(freq)
+        return cls(symbols, scale_freqs([freq[s] for s in symbols]))
+
+    def write(self, out):
+        write_varint(out, len(self.symbols))
+        for s, f in zip(self.symbols, self.freqs):
+            write_varint(out, ord(s))
+            write_varint(out, f)
+
+    @classmethod
+    def read(cls, data, pos):
+        n, pos = read_varint(data, pos)
+        symbols, freqs = [], []
+        for _ in range(n):
+            cp, pos = read_varint(data, pos)
+            f, pos = read_varint(data, pos)
+            symbols.append(chr(cp))
+            freqs.append(f)
+        return cls(symbols, freqs), pos
+
+    def lookup(self, target):
+        # символ, в интервал которого попала накопленная частота, — за O(1)
+        return self.slot[target]
+
+
+def scale_freqs(counts, max_total=MAX_TOTAL):
+    total = sum(counts)
+    if total <= max_total:
+        return list(counts)
+    if len(counts) > max_total:
+        raise ValueError("Слишком большой алфавит для range-кодера")
+    target = max_total
+    while True:
+        scaled = [max(1, c * target // total) for c in counts]
+        if sum(scaled) <= max_total:
+            return scaled
+        target -= sum(scaled) - max_total
+
+
+def encode(text, progress=None):
+    """Текст -> байты: заголовок (длина, модель) и выход range-кодера.
+
+    progress(доля) вызывается каждые PROGRESS_STEP символов.
+    """
+    out = bytearray(MAGIC)
+    write_varint(out, len(text))
+    if not text:
+        return bytes(out)
+    model = StaticModel.from_text(text)
+    model.write(out)
+    enc = RangeEncoder()
+    cum, freqs, index, total = model.cum, model.freqs, model.index, model.total
+    n = len(text)
+    for start in range(0, n, PROGRESS_STEP):
+        for ch in text[start:start + PROGRESS_STEP]:
+            i = index[ch]
+            enc.encode(cum[i], freqs[i], total)
+        if progress is not None:
+            progress(min(1.0, (start + PROGRESS_STEP) / n))
+    return bytes(out + enc.finish())
+
+
+def decode(data, progress=None):
+    if bytes(data[:len(MAGIC)]) != MAGIC:
+        raise ValueError("Это не поток range-кодера")
+    n, pos = read_varint(data, len(MAGIC))
+    if n == 0:
+        return ""
+    model, pos = StaticModel.read(data, pos)
+    dec = RangeDecoder(data, pos)
+    cum, freqs, symbols, total, slot = model.cum, model.freqs, model.symbols, model.total, model.slot
+    out = []
+    for start in range(0, n, PROGRESS_STEP):
+        for _ in range(min(PROGRESS_STEP, n - start)):
+            i = slot[dec.get_freq(total)]
+            dec.decode(cum[i], freqs[i])
+            out.append(symbols[i])
+        if progress is not None:
+            progress(min(1.0, (start + PROGRESS_STEP) / n))
+    return "".join(out)
+
+
+# === Байтовый алфавит: символы — 256 значений байта, без декодирования UTF-8 ===
+# Частоты, накопленные частоты и таблица поиска — списки, индексируемые байтом.
+
+def byte_counts(data):
+    counts = [0] * 256
+    present = set(data)
+    if len(present) <= 64:
+        # мало разных байтов (текст) — по проходу bytes.count на каждый
+        for b in present:
+            counts[b] = data.count(b)
+    else:
+        for b, c in Counter(data).items():
+            counts[b] = c
+    return counts
+
+
+def byte_tables(freqs):
+    cum = [0] * 257
+    for b in range(256):
+        cum[b + 1] = cum[b] + freqs[b]
+    slot = array("B")
+    for b in range(256):
+        slot.extend(array("B", [b]) * freqs[b])
+    return cum, slot
+
+
+def encode_bytes(data, progress=None):
+    """Байты -> MAGIC, длина, частоты использованных байтов и выход range-кодера."""
+    data = bytes(data)
+    out = bytearray(BYTE_MAGIC)
+    write_varint(out, len(data))
+    if not data:
+        return bytes(out)
+    counts = byte_counts(data)
+    used = [b for b in range(256) if counts[b]]
+    scaled = scale_freqs([counts[b] for b in used])
+    freqs = [0] * 256
+    for b, f in zip(used, scaled):
+        freqs[b] = f
+    write_varint(out, len(used))
+    for b in used:
+        out.append(b)
+        write_varint(out, freqs[b])
+    cum, _ = byte_tables(freqs)
+    total = cum[256]
+    enc = RangeEncoder()
+    n = len(data)
+    for start in range(0, n, PROGRESS_STEP):
+        for b in data[start:start + PROGRESS_STEP]:
+            enc.encode(cum[b], freqs[b], total)
+        if progress is not None:
+            progress(min(1.0, (start + PROGRESS_STEP) / n))
+    return bytes(out + enc.finish())
+
+
+def decode_bytes(data, progress=None):
+    if bytes(data[:len(BYTE_MAGIC)]) != BYTE_MAGIC:
+        raise ValueError("Это не поток байтового range-кодера")
+    n, pos = read_varint(data, len(BYTE_MAGIC))
+    if n == 0:
+        return b""
+    count, pos = read_varint(data, pos)
+    freqs = [0] * 256
+    for _ in range(count):
+        b = data[pos]
+        freqs[b], pos = read_varint(data, pos + 1)
+    cum, slot = byte_tables(freqs)
+    total = cum[256]
+    dec = RangeDecoder(data, pos)
+    out = bytearray()
+    for start in range(0, n, PROGRESS_STEP):
+        for _ in range(min(PROGRESS_STEP, n - start)):
+            b = slot[dec.get_freq(total)]
+            dec.decode(cum[b], freqs[b])
+            out.append(b)
+        if progress is not None:
+            progress(min(1.0, (start + PROGRESS_STEP) / n))
+    return bytes(out)
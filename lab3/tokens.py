@@ -0,0 +1,183 @@
+import operator
+import re
+from collections import Counter
+from itertools import compress
+
+import adaptive
+import rangecoder
+from rangecoder import read_varint, write_varint
+
+# Токенизатор перед арифметическим кодером: символы, слова, n-граммы или
+# простой обученный BPE. Токены интернируются в таблицу и получают номера;
+# текст превращается в строку номеров (один символ на токен), которую
+# rangecoder и adaptive кодируют без изменений.
+# Поток: MAGIC | номер режима | таблица токенов | поток rangecoder или adaptive
+# Таблица: varint число токенов | для каждого varint длина UTF-8 и байты
+
+MAGIC = b"RT"
+MODES = ("chars", "words", "ngrams", "bpe")
+WORD_RE = re.compile(r"\w+|\W")
+BPE_MERGES = 256
+BPE_SAMPLE = 1 << 16
+# при обучении BPE склеенные пары обозначаются символами частной зоны 15-й плоскости
+BPE_BASE = 0xF0000
+BPE_LIMIT = 0xFFFFE - BPE_BASE
+
+
+def id_char(i):
+    # номер токена -> символ строки номеров (суррогаты пропускаются)
+    return chr(i if i < 0xD800 else i + 0x800)
+
+
+class TokenTable:
+    def __init__(self, tokens=None):
+        self.tokens = list(tokens or [])
+
+    def intern(self, tokens):
+        # номера выдаются в порядке первого появления; результат — строка номеров
+        index = {tok: id_char(i) for i, tok in enumerate(self.tokens)}
+        for tok in dict.fromkeys(tokens):
+            if tok not in index:
+                index[tok] = id_char(len(self.tokens))
+                self.tokens.append(tok)
+        return "".join(map(index.__getitem__, tokens))
+
+    def expand(self, ids):
+        # обратная замена номеров на токены одним str.translate
+        return ids.translate({ord(id_char(i)): tok for i, tok in enumerate(self.tokens)})
+
+    def write(self, out):
+        write_varint(out, len(self.tokens))
+        for tok in self.tokens:
+            raw = tok.encode("utf-8", "surrogatepass")
+            write_varint(out, len(raw))
+            out += raw
+
+    @classmethod
+    def read(cls, data, pos):
+        count, pos = read_varint(data, pos)
+        tokens = []
+        for _ in range(count):
+            size, pos = read_varint(data, pos)
+            tokens.append(bytes(data[pos:pos + size]).decode("utf-8", "surrogatepass"))
+            pos += size
+        return cls(tokens), pos
+
+
+def learn_bpe(text, merges=BPE_MERGES, sample=BPE_SAMPLE):
+    # склеиваем самую частую пару соседей, пока она встречается хотя бы дважды.
+    # Выборка — связный список символов со счётчиками и позициями всех пар
+    # соседей: склейка обходит только позиции своей пары (слева направо, как
+    # str.replace) и поправляет счётчики пар вокруг каждого места склейки.
+    # При равных счётчиках берётся пара, встретившаяся раньше, как у most_common
+    if merges > BPE_LIMIT:
+        raise ValueError(f"Поддерживается не больше {BPE_LIMIT} склеек BPE")
+    sym = list(text[:sample])
+    n = len(sym)
+    sym.append(None)  # ограничитель после последнего символа; удалённые тоже None
+    nxt = list(range(1, n + 1))
+    prv = list(range(-1, n - 1))
+    counts = Counter(map(operator.add, sym[:n], sym[1:n]))
+    where = {}
+    for i, pair in enumerate(map(operator.add, sym[:n], sym[1:n])):
+        where.setdefault(pair, []).append(i)
+
+    def first(pair):
+        # новые вхождения пары появляются только вместе с её склеенным
+        # символом, поэтому списки позиций возрастают
+        a, b = pair
+        return next(i for i in where[pair] if sym[i] == a and sym[nxt[i]] == b)
+
+    def drop(pair):
+        counts[pair] -= 1
+        if not counts[pair]:
+            del counts[pair]
+
+    def add(pair, i):
+        counts[pair] += 1
+        where.setdefault(pair, []).append(i)
+
+    pairs = []
+    for k in range(merges):
+        if not counts:
+            break
+        count = max(counts.values())
+        if count < 2:
+            break
+        tied = list(compress(counts, map(count.__eq__, counts.values())))
+        pair = min(tied, key=first) if len(tied) > 1 else tied[0]
+        a, b = pair
+        merged = chr(BPE_BASE + k)
+        for i in where.pop(pair):
+            j = nxt[i]
+            if sym[i] != a or sym[j] != b:
+                continue  # перекрыто предыдущей склейкой
+            p, q = prv[i], nxt[j]
+            if p >= 0:
+                drop(sym[p] + a)
+                add(sym[p] + merged, p)
+            if q < n:
+                drop(b + sym[q])
+                add(merged + sym[q], i)
+                prv[q] = i
+            drop(pair)
+            sym[i] = merged
+            sym[j] = None
+            nxt[i] = q
+        pairs.append(pair)
+    return pairs
+
+
+def apply_bpe(text, pairs):
+    # str.replace — тот же жадный проход слева направо, что и при обучении
+    if any(ord(ch) >= BPE_BASE for ch in set(text)):
+        raise ValueError("В тексте есть символы 15-й плоскости, занятые под склейки BPE")
+    expansions = {}
+    for k, pair in enumerate(pairs):
+        merged = chr(BPE_BASE + k)
+        expansions[merged] = expansions.get(pair[0], pair[0]) + expansions.get(pair[1], pair[1])
+        text = text.replace(pair, merged)
+    return text, expansions
+
+
+def tokenize(text, mode="words", n=2, merges=BPE_MERGES):
+    """Текст -> (таблица токенов, строка номеров)."""
+    table = TokenTable()
+    if mode == "chars":
+        return table, table.intern(text)
+    if mode == "words":
+        return table, table.intern(WORD_RE.findall(text))
+    if mode == "ngrams":
+        if n < 1:
+            raise ValueError("Длина n-граммы должна быть положительной")
+        return table, table.intern([text[i:i + n] for i in range(0, len(text), n)])
+    if mode == "bpe":
+        merged, expansions = apply_bpe(text, learn_bpe(text, merges))
+        return table, table.intern([expansions.get(ch, ch) for ch in merged])
+    raise ValueError(f"Неизвестный режим токенизации: {mode!r}")
+
+
+def encode(text, mode="words", n=2, merges=BPE_MERGES, static=True, progress=None):
+    table, ids = tokenize(text, mode, n, merges)
+    return encode_ids(table, ids, mode, static, progress)
+
+
+def encode_ids(table, ids, mode, static=True, progress=None):
+    # уже токенизированный текст: таблица и строка номеров из tokenize
+    out = bytearray(MAGIC)
+    out.append(MODES.index(mode))
+    table.write(out)
+    # статической модели нужно не больше MAX_TOTAL разных токенов
+    coder = rangecoder if static and len(table.tokens) <= rangecoder.MAX_TOTAL else adaptive
+    out += coder.encode(ids, progress=progress)
+    return bytes(out)
+
+
+def decode(data, progress=None):
+    data = bytes(data)
+    if data[:len(MAGIC)] != MAGIC:
+        raise ValueError("Это не поток токенов")
+    table, pos = TokenTable.read(data, len(MAGIC) + 1)
+    inner = data[pos:]
+    coder = adaptive if inner.startswith(adaptive.MAGIC) else rangecoder
+    return table.expand(coder.decode(inner, progress=progress))